@@ -48,11 +48,13 @@ def main():
         # Crear y ejecutar la aplicación
         logger.info("Iniciando aplicación InstaFix...")
         root = tk.Tk()
-        app = MainWindow(root)
+        app = MainWindow(root, db_manager)
         
         # Configurar el cierre de la aplicación
         def on_closing():
             logger.info("Cerrando aplicación...")
+            app.detener_tareas()
+            db_manager.close()
             root.quit()
             root.destroy()
         
@@ -61,6 +63,10 @@ def main():
         # Iniciar el loop principal
         root.mainloop()
         
+        # Cerrar conexiones también al salir desde el menú (Ctrl+Q)
+        app.detener_tareas()
+        db_manager.close()
+        
     except Exception as e:
         logger.error(f"Error fatal: {e}")
         messagebox.showerror("Error Fatal", f"Error al iniciar la aplicación:\n{e}")
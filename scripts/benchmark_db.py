@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+InstaFix - Benchmark de la base de datos
+Mide la latencia por operación del gestor de base de datos sobre una base temporal
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+# Agregar el directorio src al path para importar módulos
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from database.db_manager import DatabaseManager
+from database.perfiles import PERFILES, aplicar_perfil
+
+PRODUCTOS = ['PC de Escritorio', 'Notebook', 'Celular', 'Impresora', 'Calculadora']
+ESTADOS = ['pendiente', 'en_proceso', 'finalizado', 'retirado']
+
+
+def print_header():
+    print("⏱️  InstaFix - Benchmark de Base de Datos")
+    print("=" * 40)
+
+
+def datos_reparacion(i: int) -> dict:
+    """Generar datos de prueba para una reparación"""
+    return {
+        'cliente_nombre': f"Cliente{i}",
+        'cliente_apellido': f"Apellido{i % 500}",
+        'cliente_celular': f"11 {4000 + i % 5000:04d}-{i % 10000:04d}",
+        'producto': PRODUCTOS[i % len(PRODUCTOS)],
+        'descripcion': "Cambio de pantalla y limpieza general " * 3,
+        'costo_reparacion': float(1000 + i % 90000),
+        'estado': 'pendiente',
+    }
+
+
+def medir(nombre: str, funcion, iteraciones: int) -> float:
+    """Ejecutar una función varias veces e imprimir la latencia por operación"""
+    tiempos = []
+    for i in range(iteraciones):
+        inicio = time.perf_counter()
+        funcion(i)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    mediana = statistics.median(tiempos)
+    p95 = sorted(tiempos)[int(len(tiempos) * 0.95) - 1]
+    print(f"  {nombre:<38} mediana {mediana:8.3f} ms   p95 {p95:8.3f} ms")
+    return mediana
+
+
+# --- Implementación anterior: una conexión nueva por operación ---
+
+def conexion_sin_pool(db: DatabaseManager):
+    """
+    Conexión nueva con el mismo perfil (PRAGMA) que el pool: así la comparación
+    mide sólo el costo de abrirla en cada operación, no otro synchronous
+    """
+    conn = db.get_connection()
+    aplicar_perfil(conn, db.perfil, solo_lectura=False)
+    return conn
+
+
+def obtener_reparacion_sin_pool(db: DatabaseManager, numero: str):
+    """Lectura como se hacía antes: conexión nueva en cada llamada"""
+    with conexion_sin_pool(db) as conn:
+        row = conn.execute(
+            "SELECT * FROM reparaciones WHERE numero_presupuesto = ?", (numero,)
+        ).fetchone()
+        return dict(row) if row else None
+
+
+def actualizar_reparacion_sin_pool(db: DatabaseManager, numero: str, datos: dict):
+    """Actualización como se hacía antes: lectura previa y escritura en conexiones separadas"""
+    obtener_reparacion_sin_pool(db, numero)
+    with conexion_sin_pool(db) as conn:
+        conn.execute(
+            "UPDATE reparaciones SET estado = ?, fecha_actualizacion = CURRENT_TIMESTAMP "
+            "WHERE numero_presupuesto = ?",
+            (datos['estado'], numero)
+        )
+        conn.commit()
+
+
+def benchmark_pool(db: DatabaseManager, numeros: list, iteraciones: int):
+    """
+    Comparar latencias con conexión nueva por operación y con el pool
+
+    Las dos variantes usan el mismo perfil y, en el pool, la caché de
+    reparaciones se vacía antes de cada operación: la diferencia es sólo
+    la reutilización de conexiones. La caché se mide aparte.
+    """
+    print(f"\n🔌 Conexión nueva por operación vs pool de conexiones (perfil {db.perfil}):")
+
+    def leer_antes(i):
+        obtener_reparacion_sin_pool(db, numeros[i % len(numeros)])
+
+    def leer_despues(i):
+        db.cache.invalidar()
+        db.obtener_reparacion(numeros[i % len(numeros)])
+
+    def leer_con_cache(i):
+        # Pocas reparaciones repetidas, como las que se abren una y otra vez en el día
+        db.obtener_reparacion(numeros[i % min(len(numeros), 50)])
+
+    def actualizar_antes(i):
+        actualizar_reparacion_sin_pool(db, numeros[i % len(numeros)],
+                                       {'estado': ESTADOS[i % 3]})
+
+    def actualizar_despues(i):
+        db.cache.invalidar()
+        db.actualizar_reparacion(numeros[i % len(numeros)], {'estado': ESTADOS[i % 3]})
+
+    antes = medir("obtener_reparacion (antes)", leer_antes, iteraciones)
+    despues = medir("obtener_reparacion (pool)", leer_despues, iteraciones)
+    print(f"  → {antes / despues:.1f}x más rápido")
+    con_cache = medir("obtener_reparacion (pool + caché)", leer_con_cache, iteraciones)
+    print(f"  → la caché: {despues / con_cache:.1f}x sobre el pool solo")
+
+    antes = medir("actualizar_reparacion (antes)", actualizar_antes, iteraciones)
+    despues = medir("actualizar_reparacion (pool)", actualizar_despues, iteraciones)
+    print(f"  → {antes / despues:.1f}x más rápido")
+
+
+def benchmark_operaciones(db: DatabaseManager, numeros: list, iteraciones: int):
+    """Medir las operaciones principales del gestor"""
+    print("\n📋 Operaciones del gestor:")
+
+    medir("crear_reparacion", lambda i: db.crear_reparacion(datos_reparacion(i)), iteraciones)
+    medir("crear_reparaciones_lote (100 filas)",
+          lambda i: db.crear_reparaciones_lote(datos_reparacion(i * 100 + j) for j in range(100)),
+          max(iteraciones // 10, 5))
+    medir("obtener_reparacion", lambda i: db.obtener_reparacion(numeros[i % len(numeros)]),
+          iteraciones)
+    medir("buscar_reparaciones", lambda i: db.buscar_reparaciones(f"Cliente{i}"),
+          max(iteraciones // 10, 5))
+    medir("obtener_estadisticas", lambda i: db.obtener_estadisticas(),
+          max(iteraciones // 10, 5))
+    medir("obtener_todas_reparaciones", lambda i: db.obtener_todas_reparaciones(),
+          max(iteraciones // 50, 3))
+
+
+def benchmark_aproximado(db: DatabaseManager, iteraciones: int):
+    """Medir el índice de trigramas: construcción, consulta sola y consulta con sincronización"""
+    print("\n🔤 Búsqueda aproximada (trigramas):")
+
+    inicio = time.perf_counter()
+    with db.pool.lector() as conn:
+        db.trigramas.construir(conn)
+    print(f"  construcción del índice                {(time.perf_counter() - inicio) * 1000:8.1f} ms   "
+          f"{db.trigramas.estadisticas()}")
+
+    # Nombres con un error de tipeo, prefijos y tramos de celular
+    consultas = ["Clinete{} Apelido{}", "Client{}", "{:04d}"]
+    medir("IndiceTrigramas.buscar (top 10)",
+          lambda i: db.trigramas.buscar(consultas[i % 3].format(i, i % 500), 10), iteraciones)
+    medir("buscar_aproximado (con sincronización)",
+          lambda i: db.buscar_aproximado(consultas[i % 3].format(i, i % 500), 10), iteraciones)
+    medir("buscar_reparaciones (sin coincidencia exacta)",
+          lambda i: db.buscar_reparaciones(f"Clinete{i} Apelido{i % 500}"),
+          max(iteraciones // 10, 5))
+
+
+def benchmark_trigramas_grande(directorio: str, registros: int, iteraciones: int):
+    """
+    Medir el índice de trigramas sobre una base grande: construcción, consulta
+    y mantenimiento incremental cuando una reparación cambia de producto
+    (cada producto lo comparten registros / 5 reparaciones)
+    """
+    print(f"\n🔤 Búsqueda aproximada con {registros} reparaciones:")
+
+    db = DatabaseManager(os.path.join(directorio, 'trigramas.db'))
+    db.initialize_database()
+    try:
+        inicio = time.perf_counter()
+        numeros = []
+        for desde in range(0, registros, 5000):
+            numeros += db.crear_reparaciones_lote(
+                datos_reparacion(i) for i in range(desde, min(desde + 5000, registros)))['numeros']
+        print(f"  ✅ Carga completada en {time.perf_counter() - inicio:.2f} s")
+
+        inicio = time.perf_counter()
+        with db.pool.lector() as conn:
+            db.trigramas.construir(conn)
+        print(f"  construcción del índice                {(time.perf_counter() - inicio) * 1000:8.1f} ms   "
+              f"{db.trigramas.estadisticas()}")
+
+        medir("IndiceTrigramas.buscar (top 10)",
+              lambda i: db.trigramas.buscar(f"Clinete{i * 37 % registros} Apelido{i % 500}", 10),
+              iteraciones)
+
+        def cambiar_producto(i):
+            # Las más recientes: quedan al final de las listas de reparaciones.
+            # Sólo se mide la sincronización del índice, no la escritura
+            db.actualizar_reparacion(numeros[-1 - i % len(numeros)],
+                                     {'producto': PRODUCTOS[(i + 1) % len(PRODUCTOS)]})
+            inicio = time.perf_counter()
+            with db.pool.lector() as conn:
+                db.trigramas.sincronizar(conn)
+            return time.perf_counter() - inicio
+
+        tiempos = sorted(cambiar_producto(i) * 1000 for i in range(iteraciones))
+        print(f"  {'sincronizar (1 cambio de producto)':<38} mediana {statistics.median(tiempos):8.3f} ms   "
+              f"p95 {tiempos[int(len(tiempos) * 0.95) - 1]:8.3f} ms")
+    finally:
+        db.close()
+
+
+def benchmark_perfiles(directorio: str, operaciones: int):
+    """Medir el rendimiento de altas y actualizaciones con cada perfil"""
+    print("\n⚙️  Rendimiento por perfil (operaciones por segundo):")
+
+    for nombre in PERFILES:
+        db = DatabaseManager(os.path.join(directorio, f"perfil_{nombre}.db"))
+        db.initialize_database()
+        db.aplicar_perfil(nombre)
+
+        try:
+            inicio = time.perf_counter()
+            numeros = [db.crear_reparacion(datos_reparacion(i)) for i in range(operaciones)]
+            altas = operaciones / (time.perf_counter() - inicio)
+
+            inicio = time.perf_counter()
+            for i, numero in enumerate(numeros):
+                db.actualizar_reparacion(numero, {'estado': ESTADOS[(i % 3) + 1]})
+            cambios = operaciones / (time.perf_counter() - inicio)
+
+            modo = db.obtener_perfil_activo()['pragmas']['journal_mode']
+            print(f"  {nombre:<14} ({modo:<6}) crear_reparacion {altas:9.0f} op/s   "
+                  f"actualizar_reparacion {cambios:9.0f} op/s")
+        finally:
+            db.close()
+
+
+def poblar(db: DatabaseManager, registros: int) -> list:
+    """Cargar la base de prueba y devolver los números generados"""
+    print(f"📦 Cargando {registros} reparaciones de prueba...")
+    inicio = time.perf_counter()
+    numeros = [db.crear_reparacion(datos_reparacion(i)) for i in range(registros)]
+    print(f"  ✅ Carga completada en {time.perf_counter() - inicio:.2f} s")
+    return numeros
+
+
+def main():
+    """Función principal del benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark de la base de datos de InstaFix")
+    parser.add_argument('--registros', type=int, default=2000,
+                        help="Cantidad de reparaciones de prueba")
+    parser.add_argument('--iteraciones', type=int, default=500,
+                        help="Repeticiones por operación medida")
+    parser.add_argument('--registros-grande', type=int, default=100000,
+                        help="Reparaciones de la base grande del índice de trigramas (0 para omitir)")
+    args = parser.parse_args()
+
+    print_header()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        db = DatabaseManager(os.path.join(directorio, 'benchmark.db'))
+        db.initialize_database()
+
+        try:
+            numeros = poblar(db, args.registros)
+            benchmark_pool(db, numeros, args.iteraciones)
+            benchmark_operaciones(db, numeros, args.iteraciones)
+            benchmark_aproximado(db, args.iteraciones)
+        finally:
+            db.close()
+
+        if args.registros_grande:
+            benchmark_trigramas_grande(directorio, args.registros_grande, args.iteraciones)
+
+        benchmark_perfiles(directorio, args.iteraciones)
+
+    print("\n🎉 Benchmark completado")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
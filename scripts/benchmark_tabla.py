@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+InstaFix - Benchmark de la tabla principal
+Compara el refresco borrando y reinsertando todas las filas con la reconciliación por diferencias
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import tkinter as tk
+from tkinter import ttk
+
+# Agregar el directorio src al path para importar módulos
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from gui.tabla import ReconciliadorTabla
+
+COLUMNAS = ('numero_presupuesto', 'cliente_nombre', 'cliente_apellido', 'cliente_celular',
+            'producto', 'costo_reparacion', 'estado', 'fecha_ingreso')
+ESTADOS = ['pendiente', 'en_proceso', 'finalizado', 'retirado']
+
+
+def print_header():
+    print("⏱️  InstaFix - Benchmark de la Tabla Principal")
+    print("=" * 46)
+
+
+def generar_filas(cantidad: int) -> list:
+    """Generar filas (iid, valores, tags) como las que arma la ventana principal"""
+    filas = []
+    for i in range(cantidad):
+        numero = f"{cantidad - i:08d}"
+        estado = ESTADOS[i % len(ESTADOS)]
+        valores = (numero, f"Cliente{i}", f"Apellido{i % 500}", f"11 {i % 10000:04d}-0000",
+                   'Notebook', f"${1000 + i:,.2f}", estado.title(), '2026-01-01')
+        filas.append((numero, valores, (f"estado_{estado}",)))
+    return filas
+
+
+def con_un_cambio(filas: list, iteracion: int) -> list:
+    """Copia de las filas con una reparación que cambió de estado"""
+    filas = list(filas)
+    indice = (iteracion * 7919) % len(filas)
+    numero, valores, _ = filas[indice]
+    estado = ESTADOS[iteracion % len(ESTADOS)]
+    filas[indice] = (numero, valores[:6] + (f"{estado.title()} {iteracion}",) + valores[7:],
+                     (f"estado_{estado}",))
+    return filas
+
+
+def refrescar_completo(tree: ttk.Treeview, filas: list):
+    """Refresco anterior: vaciar la tabla, reinsertar todo y volver a configurar los colores"""
+    tree.delete(*tree.get_children())
+    for numero, valores, tags in filas:
+        tree.insert('', tk.END, iid=numero, values=valores, tags=tags)
+    tree.tag_configure('estado_pendiente', background='#fff2cc')
+    tree.tag_configure('estado_en_proceso', background='#d4edda')
+    tree.tag_configure('estado_finalizado', background='#cce5ff')
+    tree.tag_configure('estado_retirado', background='#e2e3e5')
+
+
+def medir(nombre: str, root: tk.Tk, funcion, iteraciones: int) -> float:
+    """Ejecutar un refresco varias veces (incluido el redibujado) e imprimir la latencia"""
+    tiempos = []
+    for i in range(iteraciones):
+        inicio = time.perf_counter()
+        funcion(i)
+        root.update_idletasks()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    mediana = statistics.median(tiempos)
+    print(f"  {nombre:<36} mediana {mediana:9.2f} ms   máx {max(tiempos):9.2f} ms")
+    return mediana
+
+
+def main():
+    """Función principal del benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark del refresco de la tabla principal")
+    parser.add_argument('--filas', type=int, default=10000, help="Filas cargadas en la tabla")
+    parser.add_argument('--iteraciones', type=int, default=20, help="Refrescos medidos")
+    args = parser.parse_args()
+
+    print_header()
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"❌ No se pudo abrir una ventana de Tk: {e}")
+        return False
+
+    try:
+        tree = ttk.Treeview(root, columns=COLUMNAS, show='headings')
+        tree.pack(fill=tk.BOTH, expand=True)
+        filas = generar_filas(args.filas)
+
+        print(f"\n🔄 Refresco de {args.filas} filas con una sola reparación modificada:")
+
+        refrescar_completo(tree, filas)
+        antes = medir("borrar todo e insertar todo", root,
+                      lambda i: refrescar_completo(tree, con_un_cambio(filas, i)),
+                      args.iteraciones)
+
+        tree.delete(*tree.get_children())
+        tabla = ReconciliadorTabla(tree)
+        tabla.reconciliar(filas)
+        despues = medir("reconciliar diferencias", root,
+                        lambda i: tabla.reconciliar(con_un_cambio(filas, i)),
+                        args.iteraciones)
+
+        print(f"  → {antes / despues:.1f}x más rápido")
+        print(f"  Último refresco: {tabla.reconciliar(con_un_cambio(filas, args.iteraciones))}")
+    finally:
+        root.destroy()
+
+    print("\n🎉 Benchmark completado")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
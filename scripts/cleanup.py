@@ -1,14 +1,19 @@
 #!/usr/bin/env python3
 """
 InstaFix - Script de Limpieza y Mantenimiento
-Limpia archivos temporales y organiza el proyecto
+Limpia archivos temporales y organiza el proyecto; con --mantenimiento
+mantiene la base de datos e informa el espacio de cada tabla e índice
 """
 
 import os
 import shutil
 import sys
+import argparse
 from pathlib import Path
 
+# Agregar el directorio src al path para importar módulos
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
 def print_header():
     print("🧹 InstaFix - Script de Limpieza")
     print("=" * 40)
@@ -203,11 +208,118 @@ def mostrar_estadisticas():
     doc_files = list(Path('docs').glob('*.md')) if os.path.exists('docs') else []
     print(f"  📚 Archivos de documentación: {len(doc_files)}")
 
+def formatear_bytes(cantidad: int) -> str:
+    """Tamaño legible (B, KB, MB o GB)"""
+    for unidad in ('B', 'KB', 'MB'):
+        if abs(cantidad) < 1024:
+            return f"{cantidad:.0f} {unidad}" if unidad == 'B' else f"{cantidad:.1f} {unidad}"
+        cantidad /= 1024
+    return f"{cantidad:.1f} GB"
+
+def mostrar_pasos(resultado):
+    """Mostrar la duración y el detalle de cada paso del mantenimiento"""
+    print("\n⏱️  Pasos del mantenimiento:")
+    for paso in resultado['pasos']:
+        detalle = ", ".join(f"{clave}: {valor}" for clave, valor in paso.items()
+                            if clave not in ('paso', 'duracion'))
+        print(f"  ✅ {paso['paso']:<20} {paso['duracion'] * 1000:>9.1f} ms"
+              + (f"  ({detalle})" if detalle else ""))
+    
+    antes, despues = resultado['antes'], resultado['despues']
+    print(f"  📏 Total: {resultado['duracion']:.2f} s")
+    print(f"  💾 Tamaño: {formatear_bytes(antes['bytes'])} → {formatear_bytes(despues['bytes'])} "
+          f"(páginas libres: {antes['libres']} → {despues['libres']})")
+    if despues['auto_vacuum'] != 'incremental':
+        print("  ⚠️  La base no usa auto_vacuum incremental: ejecute con --compactar "
+              "(VACUUM completo) para poder devolver espacio sin bloquearla")
+
+def mostrar_informe_espacio(informe):
+    """Mostrar el espacio que ocupa cada tabla e índice de cada base"""
+    for esquema, datos in informe.items():
+        estado = datos['estado']
+        print(f"\n📊 Espacio de la base '{esquema}': {formatear_bytes(estado['bytes'])} "
+              f"({estado['paginas']} páginas de {estado['tamano_pagina']} B, "
+              f"{estado['libres']} libres, auto_vacuum {estado['auto_vacuum']})")
+        
+        if datos['objetos'] is None:
+            print("  ⚠️  Esta versión de SQLite no incluye dbstat")
+            continue
+        
+        print(f"  {'Objeto':<52} {'Tipo':<6} {'Páginas':>8} {'Tamaño':>10} "
+              f"{'Sin usar':>10} {'Filas':>9}")
+        for objeto in datos['objetos']:
+            nombre = objeto['nombre']
+            if objeto['tipo'] == 'index' or objeto['tabla'] != nombre:
+                nombre = f"{objeto['tabla']}.{nombre}"
+            tipo = 'índice' if objeto['tipo'] == 'index' else 'tabla'
+            print(f"  {nombre[:52]:<52} {tipo:<6} {objeto['paginas']:>8} "
+                  f"{formatear_bytes(objeto['bytes']):>10} "
+                  f"{formatear_bytes(objeto['sin_usar']):>10} {objeto['filas']:>9}")
+
+def mantener_base_datos(ruta: str, compactar: bool = False, solo_informe: bool = False) -> bool:
+    """
+    Mantenimiento completo de la base: ANALYZE, PRAGMA optimize, vacuum
+    incremental y checkpoint del WAL, con el informe de espacio al final
+    
+    Args:
+        ruta (str): Ruta a la base de datos
+        compactar (bool): Pasar antes la base a auto_vacuum incremental (VACUUM completo)
+        solo_informe (bool): Mostrar el informe sin modificar la base
+        
+    Returns:
+        bool: True si terminó bien
+    """
+    from database.db_manager import DatabaseManager
+    from database.mantenimiento import informe_solo_lectura
+    
+    if not os.path.exists(ruta):
+        print(f"❌ No existe la base de datos: {ruta}")
+        return False
+    
+    print(f"🗄️  Base de datos: {ruta}")
+    
+    # El informe solo abre la base en modo lectura: sin migraciones ni VACUUM
+    if solo_informe:
+        mostrar_informe_espacio(informe_solo_lectura(ruta))
+        return True
+    
+    db_manager = DatabaseManager(ruta)
+    try:
+        db_manager.initialize_database()
+        
+        if compactar:
+            print("🔄 Compactando la base (VACUUM completo); puede tardar...")
+        resultado = db_manager.mantener_base(completo=True, compactar=compactar)
+        mostrar_pasos(resultado)
+        
+        mostrar_informe_espacio(db_manager.obtener_informe_espacio())
+        return True
+    finally:
+        db_manager.close()
+
 def main():
     """Función principal del script de limpieza"""
+    parser = argparse.ArgumentParser(description="Limpieza y mantenimiento de InstaFix")
+    parser.add_argument('--mantenimiento', action='store_true',
+                        help="Mantener la base de datos en lugar de limpiar el proyecto")
+    parser.add_argument('--db', default='instafix.db',
+                        help="Ruta a la base de datos (por defecto instafix.db)")
+    parser.add_argument('--compactar', action='store_true',
+                        help="Con --mantenimiento: pasar la base a auto_vacuum incremental "
+                             "con un VACUUM completo (bloquea la base mientras dura)")
+    parser.add_argument('--solo-informe', action='store_true',
+                        help="Con --mantenimiento: sólo mostrar el informe de espacio")
+    args = parser.parse_args()
+    
     try:
         print_header()
         
+        if args.mantenimiento:
+            if mantener_base_datos(args.db, args.compactar, args.solo_informe):
+                print("\n🎉 Mantenimiento completado!")
+                return True
+            return False
+        
         # Verificar que estamos en el directorio correcto
         if not os.path.exists('main.py'):
             print("❌ Este script debe ejecutarse desde el directorio raíz de InstaFix")
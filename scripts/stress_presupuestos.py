@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+InstaFix - Prueba de concurrencia de números de presupuesto
+Varios procesos crean reparaciones y reservan bloques sobre la misma base
+y se verifica que no haya números repetidos ni saltos
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import multiprocessing
+
+# Agregar el directorio src al path para importar módulos
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from database.db_manager import DatabaseManager
+
+
+def print_header():
+    print("🧪 InstaFix - Prueba de Concurrencia de Presupuestos")
+    print("=" * 40)
+
+
+def trabajador(db_path: str, indice: int, altas: int, bloque: int, inicio, resultados):
+    """Proceso que simula un mostrador creando reparaciones"""
+    db = DatabaseManager(db_path)
+    numeros = []
+
+    try:
+        # Todos los procesos arrancan a la vez para maximizar la contención
+        inicio.wait()
+
+        for i in range(altas):
+            numeros.append(db.crear_reparacion({
+                'cliente_nombre': f"Proceso{indice}",
+                'cliente_apellido': f"Alta{i}",
+                'cliente_celular': f"11{indice:04d}{i:04d}",
+                'producto': 'Celular',
+            }))
+
+            # Cada tanto reservar un bloque, como hace una carga masiva
+            if bloque and i % 10 == 0:
+                numeros.extend(db.reservar_numeros_presupuesto(bloque))
+    finally:
+        db.close()
+
+    resultados.put(numeros)
+
+
+def main():
+    """Función principal de la prueba"""
+    parser = argparse.ArgumentParser(description="Prueba de concurrencia de números de presupuesto")
+    parser.add_argument('--procesos', type=int, default=8, help="Procesos simultáneos")
+    parser.add_argument('--altas', type=int, default=200, help="Reparaciones por proceso")
+    parser.add_argument('--bloque', type=int, default=5,
+                        help="Tamaño de los bloques reservados (0 para no reservar)")
+    args = parser.parse_args()
+
+    print_header()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        db_path = os.path.join(directorio, 'stress.db')
+        db = DatabaseManager(db_path)
+        db.initialize_database()
+        db.close()
+
+        inicio = multiprocessing.Event()
+        resultados = multiprocessing.Queue()
+        procesos = [
+            multiprocessing.Process(target=trabajador,
+                                    args=(db_path, i, args.altas, args.bloque, inicio, resultados))
+            for i in range(args.procesos)
+        ]
+
+        for proceso in procesos:
+            proceso.start()
+
+        print(f"🚀 {args.procesos} procesos x {args.altas} altas (bloques de {args.bloque})...")
+        t0 = time.perf_counter()
+        inicio.set()
+
+        numeros = []
+        for _ in procesos:
+            numeros.extend(resultados.get())
+        for proceso in procesos:
+            proceso.join()
+        duracion = time.perf_counter() - t0
+
+        fallidos = [p for p in procesos if p.exitcode != 0]
+
+        db = DatabaseManager(db_path)
+        db.initialize_database()
+        with db.pool.lector() as conn:
+            guardados = [row[0] for row in conn.execute(
+                "SELECT numero_presupuesto FROM reparaciones"
+            )]
+            ultimo = int(conn.execute(
+                "SELECT valor FROM configuracion WHERE clave = 'ultimo_numero_presupuesto'"
+            ).fetchone()[0])
+        db.close()
+
+    duplicados = len(numeros) - len(set(numeros))
+    esperados = {f"INF-{n:06d}" for n in range(1, ultimo + 1)}
+
+    print(f"  ⏱️  {len(numeros)} números en {duracion:.2f} s "
+          f"({len(numeros) / duracion:.0f} por segundo)")
+    print(f"  📋 Reparaciones guardadas: {len(guardados)}")
+    print(f"  🔁 Números duplicados: {duplicados}")
+    print(f"  🕳️  Números faltantes en la secuencia: {len(esperados - set(numeros))}")
+
+    ok = (not fallidos and duplicados == 0 and set(numeros) == esperados
+          and len(guardados) == args.procesos * args.altas)
+
+    if ok:
+        print("\n✅ Sin duplicados ni saltos")
+    else:
+        print("\n❌ La prueba falló")
+    return ok
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
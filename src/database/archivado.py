@@ -0,0 +1,355 @@
+"""
+Archivo histórico de reparaciones para InstaFix
+Las reparaciones retiradas hace tiempo (y su historial de estados) se mueven
+a una base aparte, adjunta con ATTACH, para que el listado, las búsquedas y
+los índices de la base principal sólo contengan las reparaciones activas
+"""
+
+import os
+import sqlite3
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .consultas import ConsultaReparaciones
+from .validacion import normalizar_celular
+
+logger = logging.getLogger(__name__)
+
+# Nombre con el que se adjunta la base del archivo
+ESQUEMA_ARCHIVO = 'archivo'
+
+# Tablas que se archivan: la tabla y la columna con el id de la reparación
+TABLAS_ARCHIVADAS = [('reparaciones', 'id'), ('historial_estados', 'reparacion_id')]
+
+# Variable de entorno (.env) con los días desde el retiro para archivar
+VARIABLE_ENTORNO_ANTIGUEDAD = 'DB_ARCHIVO_DIAS'
+
+ANTIGUEDAD_POR_DEFECTO_DIAS = 365
+
+# Reglas de normalizar_celular con que está guardado el archivo (PRAGMA user_version);
+# la 1 es la del celular canónico con 549 (migración 9 de la base principal)
+VERSION_CELULARES_ARCHIVO = 1
+
+# Reparaciones por transacción al archivar o restaurar
+TAMANO_LOTE_ARCHIVADO = 500
+
+# Índices del archivo: búsqueda por número, celular, cliente y fecha, e historial
+INDICES_ARCHIVO = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS {esquema}.idx_archivo_numero "
+    "ON reparaciones (numero_presupuesto)",
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_archivo_celular "
+    "ON reparaciones (celular_normalizado)",
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_archivo_cliente "
+    "ON reparaciones (cliente_id, fecha_ingreso)",
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_archivo_fecha_ingreso "
+    "ON reparaciones (fecha_ingreso)",
+    "CREATE INDEX IF NOT EXISTS {esquema}.idx_archivo_historial "
+    "ON historial_estados (reparacion_id, fecha_cambio)",
+]
+
+# Reparaciones que se pueden archivar: retiradas antes de la fecha de corte
+_CONDICION_ARCHIVABLE = ("estado = 'retirado' "
+                         "AND COALESCE(fecha_retiro, fecha_actualizacion) < ?")
+
+
+def ruta_archivo(db_path: str) -> Optional[str]:
+    """
+    Ruta de la base del archivo junto a la principal (instafix.db -> instafix_archivo.db)
+
+    Returns:
+        Optional[str]: None para bases en memoria, que no pueden tener archivo
+    """
+    if db_path == ':memory:' or 'mode=memory' in db_path:
+        return None
+    base, extension = os.path.splitext(db_path)
+    return f"{base}_{ESQUEMA_ARCHIVO}{extension or '.db'}"
+
+
+def antiguedad_desde_entorno() -> Optional[int]:
+    """Leer los días de antigüedad para archivar desde el entorno (.env)"""
+    valor = os.getenv(VARIABLE_ENTORNO_ANTIGUEDAD)
+    if not valor:
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        logger.warning(f"{VARIABLE_ENTORNO_ANTIGUEDAD} inválido: '{valor}'")
+        return None
+
+
+def archivo_adjunto(conn: sqlite3.Connection) -> bool:
+    """Indicar si la conexión ya tiene el archivo adjunto"""
+    return any(fila[1] == ESQUEMA_ARCHIVO for fila in conn.execute("PRAGMA database_list"))
+
+
+def adjuntar_archivo(conn: sqlite3.Connection, ruta: str, solo_lectura: bool) -> bool:
+    """
+    Adjuntar la base del archivo a una conexión (fuera de una transacción)
+
+    El escritor la crea si no existe; un lector de solo lectura no puede, así
+    que sin archivo creado devuelve False.
+
+    Returns:
+        bool: True si el archivo quedó adjunto
+    """
+    if archivo_adjunto(conn):
+        return True
+
+    if solo_lectura:
+        if not os.path.exists(ruta):
+            return False
+        # Los lectores del pool se abren con URI: el archivo también es de solo lectura
+        conn.execute(f"ATTACH DATABASE ? AS {ESQUEMA_ARCHIVO}",
+                     (Path(ruta).resolve().as_uri() + "?mode=ro",))
+    else:
+        conn.execute(f"ATTACH DATABASE ? AS {ESQUEMA_ARCHIVO}", (ruta,))
+    return True
+
+
+def archivo_con_reparaciones(conn: sqlite3.Connection) -> bool:
+    """Indicar si el archivo está adjunto y ya tiene su tabla de reparaciones"""
+    return archivo_adjunto(conn) and bool(_columnas(conn, ESQUEMA_ARCHIVO, 'reparaciones'))
+
+
+def _columnas(conn: sqlite3.Connection, esquema: str, tabla: str) -> List[Tuple[str, str]]:
+    """Nombre y tipo de las columnas de una tabla (vacía si no existe)"""
+    return [(fila[1], fila[2]) for fila in conn.execute(f"PRAGMA {esquema}.table_info({tabla})")]
+
+
+def preparar_archivo(conn: sqlite3.Connection):
+    """
+    Crear las tablas del archivo o agregarles las columnas nuevas de la base principal
+
+    Las tablas copian las columnas de la principal sin sus restricciones: el
+    archivo guarda lo que ya se validó al cargarlo. Se debe llamar dentro de
+    una transacción del escritor, con el archivo adjunto.
+    """
+    for tabla, _ in TABLAS_ARCHIVADAS:
+        columnas = _columnas(conn, 'main', tabla)
+        existentes = {nombre for nombre, _ in _columnas(conn, ESQUEMA_ARCHIVO, tabla)}
+
+        if not existentes:
+            definiciones = ', '.join(
+                f"{nombre} INTEGER PRIMARY KEY" if nombre == 'id' else f"{nombre} {tipo}"
+                for nombre, tipo in columnas
+            )
+            conn.execute(f"CREATE TABLE {ESQUEMA_ARCHIVO}.{tabla} ({definiciones})")
+            continue
+
+        for nombre, tipo in columnas:
+            if nombre not in existentes:
+                conn.execute(f"ALTER TABLE {ESQUEMA_ARCHIVO}.{tabla} ADD COLUMN {nombre} {tipo}")
+
+    for indice in INDICES_ARCHIVO:
+        conn.execute(indice.format(esquema=ESQUEMA_ARCHIVO))
+
+    actualizar_celulares_archivo(conn)
+
+
+def actualizar_celulares_archivo(conn: sqlite3.Connection) -> int:
+    """
+    Volver a normalizar los celulares archivados si cambiaron las reglas
+
+    La base principal se actualiza con sus migraciones; el archivo guarda en
+    PRAGMA user_version con qué reglas se normalizó. Cada reparación vuelve a
+    apuntar al cliente de su celular (los clientes repetidos se unificaron).
+    Se debe llamar dentro de una transacción del escritor, con el archivo adjunto.
+
+    Returns:
+        int: Reparaciones archivadas cuyo celular normalizado cambió
+    """
+    if conn.execute(f"PRAGMA {ESQUEMA_ARCHIVO}.user_version").fetchone()[0] >= VERSION_CELULARES_ARCHIVO:
+        return 0
+
+    filas = conn.execute(
+        f"SELECT id, cliente_celular, celular_normalizado FROM {ESQUEMA_ARCHIVO}.reparaciones"
+    ).fetchall()
+    cambios = [(nuevo, fila[0]) for fila, nuevo in
+               ((fila, normalizar_celular(fila[1])) for fila in filas) if nuevo != fila[2]]
+    conn.executemany(
+        f"UPDATE {ESQUEMA_ARCHIVO}.reparaciones SET celular_normalizado = ? WHERE id = ?", cambios
+    )
+    conn.execute(f'''
+        UPDATE {ESQUEMA_ARCHIVO}.reparaciones
+        SET cliente_id = COALESCE((SELECT c.id FROM main.clientes c
+                                   WHERE c.celular_normalizado = reparaciones.celular_normalizado),
+                                  cliente_id)
+    ''')
+    conn.execute(f"PRAGMA {ESQUEMA_ARCHIVO}.user_version = {int(VERSION_CELULARES_ARCHIVO)}")
+
+    if cambios:
+        logger.info(f"Celulares del archivo normalizados otra vez: {len(cambios)}")
+    return len(cambios)
+
+
+def fecha_corte(conn: sqlite3.Connection, dias: int) -> str:
+    """Fecha de retiro límite, en el formato de CURRENT_TIMESTAMP (UTC)"""
+    if dias < 0:
+        raise ValueError("La antigüedad para archivar no puede ser negativa")
+    return conn.execute("SELECT datetime('now', ?)", (f"-{int(dias)} days",)).fetchone()[0]
+
+
+def contar_archivables(conn: sqlite3.Connection, corte: str) -> int:
+    """Contar las reparaciones retiradas antes de la fecha de corte"""
+    return conn.execute(
+        f"SELECT COUNT(*) FROM main.reparaciones WHERE {_CONDICION_ARCHIVABLE}", (corte,)
+    ).fetchone()[0]
+
+
+def seleccionar_lote(conn: sqlite3.Connection, corte: str, despues_de: int,
+                     tamano: int = TAMANO_LOTE_ARCHIVADO) -> List[Tuple[int, str]]:
+    """
+    Elegir el próximo lote de reparaciones archivables, en orden de id
+
+    Args:
+        despues_de (int): Último id del lote anterior (0 para empezar)
+
+    Returns:
+        List[Tuple[int, str]]: (id, numero_presupuesto) de cada reparación
+    """
+    return [tuple(fila) for fila in conn.execute(
+        f"SELECT id, numero_presupuesto FROM main.reparaciones "
+        f"WHERE {_CONDICION_ARCHIVABLE} AND id > ? ORDER BY id LIMIT ?",
+        (corte, despues_de, tamano)
+    )]
+
+
+def _lista(valores: Sequence) -> str:
+    """Marcadores para una consulta IN (...)"""
+    return ', '.join('?' * len(valores))
+
+
+def _copiar(conn: sqlite3.Connection, origen: str, destino: str, tabla: str,
+            columna: str, ids: Sequence[int], reemplazar: bool) -> int:
+    """Copiar las filas de ciertas reparaciones de una base a la otra"""
+    destino_columnas = {nombre for nombre, _ in _columnas(conn, destino, tabla)}
+    columnas = ', '.join(nombre for nombre, _ in _columnas(conn, origen, tabla)
+                         if nombre in destino_columnas)
+    conflicto = 'REPLACE' if reemplazar else 'IGNORE'
+    cursor = conn.execute(
+        f"INSERT OR {conflicto} INTO {destino}.{tabla} ({columnas}) "
+        f"SELECT {columnas} FROM {origen}.{tabla} WHERE {columna} IN ({_lista(ids)})",
+        list(ids)
+    )
+    return cursor.rowcount
+
+
+def copiar_al_archivo(conn: sqlite3.Connection, ids: Sequence[int]):
+    """
+    Primer paso de archivar: copiar un lote (con su historial) al archivo
+
+    Va en su propia transacción, antes de borrar de la principal. SQLite no
+    garantiza que una transacción entre una base en WAL y una adjunta sea
+    atómica en ambas: si se corta entre los dos pasos quedan filas repetidas,
+    nunca perdidas. La principal tiene prioridad y el próximo archivado las
+    vuelve a copiar.
+    """
+    for tabla, columna in TABLAS_ARCHIVADAS:
+        _copiar(conn, 'main', ESQUEMA_ARCHIVO, tabla, columna, ids, reemplazar=True)
+
+
+def quitar_de_principal(conn: sqlite3.Connection, ids: Sequence[int]) -> Tuple[List[str], int]:
+    """
+    Segundo paso de archivar: borrar de la principal lo que ya está en el archivo
+
+    Sólo se borran las reparaciones que siguen retiradas y sin cambios desde
+    la copia (otro proceso pudo modificarlas entre los dos pasos). Los
+    triggers de la principal anotan las bajas en el registro de cambios y
+    descuentan los contadores; los resúmenes diarios conservan su aporte.
+
+    Returns:
+        Tuple[List[str], int]: Números archivados y filas de historial movidas
+    """
+    copiadas = conn.execute(f'''
+        SELECT r.id, r.numero_presupuesto
+        FROM main.reparaciones r
+        JOIN {ESQUEMA_ARCHIVO}.reparaciones a ON a.id = r.id
+        WHERE r.id IN ({_lista(ids)}) AND r.estado = 'retirado'
+          AND a.fecha_actualizacion IS r.fecha_actualizacion
+    ''', list(ids)).fetchall()
+    if not copiadas:
+        return [], 0
+
+    movidas = [fila[0] for fila in copiadas]
+    historial = conn.execute(
+        f"DELETE FROM main.historial_estados WHERE reparacion_id IN ({_lista(movidas)})", movidas
+    ).rowcount
+    conn.execute(f"DELETE FROM main.reparaciones WHERE id IN ({_lista(movidas)})", movidas)
+    return [fila[1] for fila in copiadas], historial
+
+
+def ids_archivados(conn: sqlite3.Connection, numeros: Sequence[str]) -> List[int]:
+    """Ids en el archivo de ciertos números de presupuesto"""
+    return [fila[0] for fila in conn.execute(
+        f"SELECT id FROM {ESQUEMA_ARCHIVO}.reparaciones "
+        f"WHERE numero_presupuesto IN ({_lista(numeros)})", list(numeros)
+    )]
+
+
+def copiar_a_principal(conn: sqlite3.Connection, ids: Sequence[int]) -> int:
+    """
+    Primer paso de restaurar: volver a insertar un lote en la principal
+
+    Conserva ids y fechas, así los resúmenes diarios no cambian. Las que ya
+    estén en la principal (un archivado interrumpido) se dejan como están.
+
+    Returns:
+        int: Reparaciones restauradas
+    """
+    restauradas = _copiar(conn, ESQUEMA_ARCHIVO, 'main', 'reparaciones', 'id', ids,
+                          reemplazar=False)
+    _copiar(conn, ESQUEMA_ARCHIVO, 'main', 'historial_estados', 'reparacion_id', ids,
+            reemplazar=False)
+    return restauradas
+
+
+def quitar_del_archivo(conn: sqlite3.Connection, ids: Sequence[int]):
+    """Segundo paso de restaurar: borrar del archivo lo que ya está en la principal"""
+    en_principal = [fila[0] for fila in conn.execute(
+        f"SELECT id FROM main.reparaciones WHERE id IN ({_lista(ids)})", list(ids)
+    )]
+    if not en_principal:
+        return
+
+    for tabla, columna in TABLAS_ARCHIVADAS:
+        conn.execute(
+            f"DELETE FROM {ESQUEMA_ARCHIVO}.{tabla} WHERE {columna} IN ({_lista(en_principal)})",
+            en_principal
+        )
+
+
+def buscar_en_archivo(conn: sqlite3.Connection, termino: Optional[str],
+                      columnas: Optional[Sequence[str]] = None,
+                      limite: Optional[int] = None) -> List[Dict]:
+    """
+    Buscar reparaciones archivadas, de la más reciente a la más antigua
+
+    Un celular completo usa el índice del celular normalizado; cualquier otro
+    texto se busca por subcadena (el archivo no tiene índice FTS5).
+
+    Returns:
+        List[Dict]: Reparaciones archivadas con 'archivada' en True
+    """
+    consulta = (ConsultaReparaciones(columnas, tabla=f"{ESQUEMA_ARCHIVO}.reparaciones")
+                .buscar(termino, usar_fts=False)
+                .ordenar('recientes'))
+    sql, parametros = consulta.sql_pagina(tamano=limite)
+    return [dict(fila, archivada=True) for fila in conn.execute(sql, parametros)]
+
+
+def estadisticas_archivo(conn: sqlite3.Connection, ruta: str) -> Dict:
+    """
+    Tamaño del archivo
+
+    Returns:
+        Dict: 'ruta', 'reparaciones', 'historial' y 'bytes'
+    """
+    return {
+        'ruta': ruta,
+        'reparaciones': conn.execute(
+            f"SELECT COUNT(*) FROM {ESQUEMA_ARCHIVO}.reparaciones").fetchone()[0],
+        'historial': conn.execute(
+            f"SELECT COUNT(*) FROM {ESQUEMA_ARCHIVO}.historial_estados").fetchone()[0],
+        'bytes': os.path.getsize(ruta)
+    }
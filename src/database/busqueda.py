@@ -0,0 +1,129 @@
+"""
+Motor de búsqueda de reparaciones para InstaFix
+Índice FTS5 sobre los campos de búsqueda, sincronizado con triggers
+"""
+
+import re
+import sqlite3
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+TABLA_FTS = 'reparaciones_fts'
+
+# Columnas indexadas y su peso en el ranking bm25 (mayor peso = más relevante)
+COLUMNAS_FTS = [
+    ('numero_presupuesto', 10.0),
+    ('cliente_nombre', 5.0),
+    ('cliente_apellido', 5.0),
+    ('cliente_celular', 5.0),
+    ('producto', 2.0),
+    ('descripcion', 1.0),
+]
+
+TRIGGERS_FTS = ['reparaciones_fts_ai', 'reparaciones_fts_ad', 'reparaciones_fts_au']
+
+# Expresión de orden por relevancia para usar en ORDER BY
+ORDEN_BM25 = f"bm25({TABLA_FTS}, {', '.join(str(peso) for _, peso in COLUMNAS_FTS)})"
+
+# Mismos separadores que el tokenizador unicode61: letras y números
+_PATRON_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def fts5_disponible(conn: sqlite3.Connection) -> bool:
+    """Verificar si la versión de SQLite incluye el módulo FTS5"""
+    try:
+        modulos = {row[0] for row in conn.execute("PRAGMA module_list")}
+        if modulos:
+            return 'fts5' in modulos
+    except sqlite3.Error:
+        pass
+
+    opciones = {row[0] for row in conn.execute("PRAGMA compile_options")}
+    return 'ENABLE_FTS5' in opciones
+
+
+def indice_busqueda_existe(conn: sqlite3.Connection) -> bool:
+    """Verificar si la tabla FTS y sus triggers están creados"""
+    nombres = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE name = ? OR name IN (?, ?, ?)",
+            (TABLA_FTS, *TRIGGERS_FTS)
+        )
+    }
+    return nombres == {TABLA_FTS, *TRIGGERS_FTS}
+
+
+def crear_indice_busqueda(conn: sqlite3.Connection):
+    """
+    Crear la tabla FTS5 (contenido externo sobre reparaciones) y sus triggers
+
+    Se debe llamar dentro de una transacción y sólo si fts5_disponible() es True.
+    """
+    columnas = ', '.join(nombre for nombre, _ in COLUMNAS_FTS)
+    nuevas = ', '.join(f"new.{nombre}" for nombre, _ in COLUMNAS_FTS)
+    viejas = ', '.join(f"old.{nombre}" for nombre, _ in COLUMNAS_FTS)
+
+    # remove_diacritics: "gonzalez" encuentra "González"; prefix acelera las búsquedas "abc*"
+    conn.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5(
+            {columnas},
+            content='reparaciones',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+    ''')
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS reparaciones_fts_ai AFTER INSERT ON reparaciones BEGIN
+            INSERT INTO {TABLA_FTS} (rowid, {columnas}) VALUES (new.id, {nuevas});
+        END
+    ''')
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS reparaciones_fts_ad AFTER DELETE ON reparaciones BEGIN
+            INSERT INTO {TABLA_FTS} ({TABLA_FTS}, rowid, {columnas}) VALUES ('delete', old.id, {viejas});
+        END
+    ''')
+
+    # Sólo se dispara si cambia alguna columna indexada (no en los cambios de estado)
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS reparaciones_fts_au AFTER UPDATE OF {columnas} ON reparaciones BEGIN
+            INSERT INTO {TABLA_FTS} ({TABLA_FTS}, rowid, {columnas}) VALUES ('delete', old.id, {viejas});
+            INSERT INTO {TABLA_FTS} (rowid, {columnas}) VALUES (new.id, {nuevas});
+        END
+    ''')
+
+
+def eliminar_triggers_busqueda(conn: sqlite3.Connection):
+    """Quitar los triggers del índice (para poder escribir sin el módulo FTS5)"""
+    for trigger in TRIGGERS_FTS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+
+def reconstruir_indice(conn: sqlite3.Connection):
+    """Regenerar el contenido del índice FTS a partir de la tabla reparaciones"""
+    conn.execute(f"INSERT INTO {TABLA_FTS} ({TABLA_FTS}) VALUES ('rebuild')")
+
+
+def construir_consulta_fts(termino: str) -> Optional[str]:
+    """
+    Convertir el texto ingresado en una consulta FTS5
+
+    Cada palabra se busca como prefijo y todas deben coincidir (AND):
+    "gonz note" -> "gonz"* "note"*
+
+    Args:
+        termino (str): Texto de búsqueda del usuario
+
+    Returns:
+        Optional[str]: Consulta MATCH, o None si el texto no tiene palabras indexables
+    """
+    tokens = _PATRON_TOKEN.findall(termino)
+    if not tokens:
+        return None
+
+    # Entre comillas para que las palabras reservadas (AND, OR, NOT) se traten como texto
+    return ' '.join(f'"{token}"*' for token in tokens)
@@ -0,0 +1,133 @@
+"""
+Caché LRU de reparaciones para InstaFix
+Guarda las últimas reparaciones consultadas por número de presupuesto
+"""
+
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+TAMANO_CACHE_POR_DEFECTO = 256
+
+
+class CacheReparaciones:
+    """
+    Caché LRU acotada y segura entre hilos
+
+    Cada invalidación incrementa la generación: una lectura de la base que
+    empezó antes de una invalidación no puede guardar su resultado (ya viejo).
+    """
+
+    def __init__(self, capacidad: int = TAMANO_CACHE_POR_DEFECTO):
+        """
+        Inicializar la caché
+
+        Args:
+            capacidad (int): Cantidad máxima de reparaciones guardadas (0 la desactiva)
+        """
+        self.capacidad = max(0, capacidad)
+        self._datos: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._generacion = 0
+        self._version_datos: Optional[int] = None
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+        self.expulsiones = 0
+        self.vaciados_externos = 0
+
+    @property
+    def generacion(self) -> int:
+        """Generación actual (se pasa a guardar() para descartar lecturas viejas)"""
+        return self._generacion
+
+    def obtener(self, numero_presupuesto: str) -> Optional[Dict]:
+        """Obtener una copia de la reparación guardada, o None si no está"""
+        with self._lock:
+            reparacion = self._datos.get(numero_presupuesto)
+            if reparacion is None:
+                self.fallos += 1
+                return None
+
+            self._datos.move_to_end(numero_presupuesto)
+            self.aciertos += 1
+            return dict(reparacion)
+
+    def guardar(self, numero_presupuesto: str, reparacion: Dict, generacion: int):
+        """
+        Guardar una reparación leída de la base
+
+        Args:
+            numero_presupuesto (str): Clave
+            reparacion (Dict): Datos leídos
+            generacion (int): Valor de `generacion` antes de leer la base
+        """
+        if not self.capacidad:
+            return
+
+        with self._lock:
+            if generacion != self._generacion:
+                return
+
+            self._datos[numero_presupuesto] = dict(reparacion)
+            self._datos.move_to_end(numero_presupuesto)
+
+            while len(self._datos) > self.capacidad:
+                self._datos.popitem(last=False)
+                self.expulsiones += 1
+
+    def invalidar(self, numeros: Optional[Iterable[str]] = None):
+        """
+        Quitar reparaciones de la caché
+
+        Args:
+            numeros (Optional[Iterable[str]]): Números a quitar; None para vaciarla
+        """
+        with self._lock:
+            self._generacion += 1
+            self.invalidaciones += 1
+
+            if numeros is None:
+                self._datos.clear()
+            else:
+                for numero in numeros:
+                    self._datos.pop(numero, None)
+
+    def validar_version(self, version_datos: int):
+        """
+        Vaciar la caché si otra conexión modificó la base
+
+        Args:
+            version_datos (int): PRAGMA data_version del escritor; sólo cambia
+                cuando hace commit otra conexión u otro proceso
+        """
+        with self._lock:
+            anterior = self._version_datos
+            self._version_datos = version_datos
+            if anterior is None or anterior == version_datos:
+                return
+
+            self._generacion += 1
+            self.vaciados_externos += 1
+            self._datos.clear()
+
+        logger.debug("Caché de reparaciones vaciada: la base fue modificada por otro proceso")
+
+    def estadisticas(self) -> Dict:
+        """Informar el uso de la caché"""
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'capacidad': self.capacidad,
+                'tamano': len(self._datos),
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+                'invalidaciones': self.invalidaciones,
+                'expulsiones': self.expulsiones,
+                'vaciados_externos': self.vaciados_externos
+            }
@@ -0,0 +1,134 @@
+"""
+Registro de cambios de reparaciones para InstaFix
+Los triggers anotan cada alta, modificación y baja con una versión creciente;
+la interfaz pide sólo lo que cambió desde la última versión que conoce
+"""
+
+import sqlite3
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TABLA_CAMBIOS = 'cambios'
+
+TRIGGERS_CAMBIOS = ['cambios_reparaciones_ai', 'cambios_reparaciones_au', 'cambios_reparaciones_ad']
+
+# Cambios que se conservan; quien esté más atrasado recarga todo
+MAXIMO_CAMBIOS = 20000
+
+
+def crear_registro_cambios(conn: sqlite3.Connection):
+    """Crear la tabla de cambios y sus triggers (dentro de una transacción)"""
+    # AUTOINCREMENT: las versiones nunca se reutilizan, aun después de podar
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {TABLA_CAMBIOS} (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            numero_presupuesto TEXT NOT NULL,
+            operacion TEXT NOT NULL CHECK (operacion IN ('alta', 'modificacion', 'baja')),
+            fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS cambios_reparaciones_ai AFTER INSERT ON reparaciones BEGIN
+            INSERT INTO {TABLA_CAMBIOS} (numero_presupuesto, operacion)
+            VALUES (new.numero_presupuesto, 'alta');
+        END
+    ''')
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS cambios_reparaciones_au AFTER UPDATE ON reparaciones BEGIN
+            INSERT INTO {TABLA_CAMBIOS} (numero_presupuesto, operacion)
+            VALUES (new.numero_presupuesto, 'modificacion');
+        END
+    ''')
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS cambios_reparaciones_ad AFTER DELETE ON reparaciones BEGIN
+            INSERT INTO {TABLA_CAMBIOS} (numero_presupuesto, operacion)
+            VALUES (old.numero_presupuesto, 'baja');
+        END
+    ''')
+
+
+def version_actual(conn: sqlite3.Connection) -> int:
+    """Obtener la última versión registrada (0 si no hubo cambios)"""
+    fila = conn.execute(f"SELECT MAX(version) FROM {TABLA_CAMBIOS}").fetchone()
+    if fila[0] is not None:
+        return fila[0]
+
+    # Tabla vacía después de podar: la secuencia conserva la última versión
+    fila = conn.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = ?", (TABLA_CAMBIOS,)
+    ).fetchone()
+    return fila[0] if fila else 0
+
+
+def leer_cambios(conn: sqlite3.Connection, version: int, limite: int) -> Optional[Dict]:
+    """
+    Resumir los cambios posteriores a una versión por número de presupuesto
+
+    Args:
+        conn (sqlite3.Connection): Conexión de lectura
+        version (int): Última versión que conoce quien consulta
+        limite (int): Cantidad máxima de cambios a resumir
+
+    Returns:
+        Optional[Dict]: 'version' (la última leída), 'altas', 'modificaciones' y
+            'bajas' (listas de números); None si hay que recargar todo porque
+            los cambios pedidos ya se podaron o superan el límite
+    """
+    fila = conn.execute(f"SELECT MIN(version) FROM {TABLA_CAMBIOS}").fetchone()
+    if fila[0] is not None and version < fila[0] - 1:
+        return None
+
+    filas = conn.execute(
+        f"SELECT version, numero_presupuesto, operacion FROM {TABLA_CAMBIOS} "
+        f"WHERE version > ? ORDER BY version LIMIT ?",
+        (version, limite + 1)
+    ).fetchall()
+
+    if len(filas) > limite:
+        return None
+
+    # Primera y última operación de cada número (en orden de versión)
+    operaciones: Dict[str, List[str]] = {}
+    for _, numero, operacion in filas:
+        if numero in operaciones:
+            operaciones[numero][1] = operacion
+        else:
+            operaciones[numero] = [operacion, operacion]
+
+    altas, modificaciones, bajas = [], [], []
+    for numero, (primera, ultima) in operaciones.items():
+        if ultima == 'baja':
+            # Creada y borrada dentro del mismo intervalo: nunca se mostró
+            if primera != 'alta':
+                bajas.append(numero)
+        elif primera == 'alta':
+            altas.append(numero)
+        else:
+            modificaciones.append(numero)
+
+    return {
+        'version': filas[-1][0] if filas else version,
+        'altas': altas,
+        'modificaciones': modificaciones,
+        'bajas': bajas
+    }
+
+
+def podar_cambios(conn: sqlite3.Connection, conservar: int = MAXIMO_CAMBIOS) -> int:
+    """
+    Borrar los cambios más viejos y conservar sólo los últimos
+
+    Returns:
+        int: Cambios borrados
+    """
+    cursor = conn.execute(
+        f"DELETE FROM {TABLA_CAMBIOS} WHERE version <= "
+        f"(SELECT MAX(version) FROM {TABLA_CAMBIOS}) - ?",
+        (conservar,)
+    )
+    return cursor.rowcount
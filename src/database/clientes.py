@@ -0,0 +1,165 @@
+"""
+Clientes de InstaFix
+Una fila por cliente identificada por el celular normalizado; cada reparación
+apunta a su cliente con cliente_id para obtener su historial por índice
+"""
+
+import sqlite3
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .validacion import normalizar_celular
+
+logger = logging.getLogger(__name__)
+
+TABLA_CLIENTES = 'clientes'
+
+# Subconsulta para completar reparaciones.cliente_id en un INSERT o UPDATE
+SQL_ID_CLIENTE = f"(SELECT id FROM {TABLA_CLIENTES} WHERE celular_normalizado = ?)"
+
+# (celular_normalizado, nombre, apellido, celular tal como se ingresó)
+DatosCliente = Tuple[Optional[str], str, str, str]
+
+
+def crear_tabla_clientes(conn: sqlite3.Connection):
+    """Crear la tabla de clientes, la columna cliente_id y su índice (dentro de una transacción)"""
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {TABLA_CLIENTES} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            celular_normalizado TEXT NOT NULL UNIQUE,
+            nombre TEXT NOT NULL,
+            apellido TEXT NOT NULL,
+            celular TEXT NOT NULL,
+            fecha_alta TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    conn.execute(f"ALTER TABLE reparaciones ADD COLUMN cliente_id INTEGER "
+                 f"REFERENCES {TABLA_CLIENTES} (id)")
+
+    # Historial de un cliente de la más reciente a la más antigua
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reparaciones_cliente
+        ON reparaciones (cliente_id, fecha_ingreso)
+    ''')
+
+
+def cargar_clientes(conn: sqlite3.Connection) -> int:
+    """
+    Crear un cliente por celular distinto a partir de las reparaciones existentes
+
+    El nombre es el de la reparación más reciente de cada celular y la fecha de
+    alta la de la más antigua. Luego enlaza cada reparación con su cliente.
+
+    Returns:
+        int: Cantidad de clientes creados
+    """
+    cursor = conn.execute(f'''
+        INSERT OR IGNORE INTO {TABLA_CLIENTES}
+            (celular_normalizado, nombre, apellido, celular, fecha_alta, fecha_actualizacion)
+        SELECT celular_normalizado, cliente_nombre, cliente_apellido, cliente_celular,
+               primera, ultima
+        FROM (
+            SELECT celular_normalizado, cliente_nombre, cliente_apellido, cliente_celular,
+                   MIN(fecha_ingreso) OVER cliente AS primera,
+                   fecha_actualizacion AS ultima,
+                   ROW_NUMBER() OVER (cliente ORDER BY fecha_ingreso DESC, id DESC) AS orden
+            FROM reparaciones
+            WHERE celular_normalizado IS NOT NULL
+            WINDOW cliente AS (PARTITION BY celular_normalizado)
+        )
+        WHERE orden = 1
+    ''')
+    creados = cursor.rowcount
+
+    conn.execute(f'''
+        UPDATE reparaciones SET cliente_id = {SQL_ID_CLIENTE.replace('?', 'reparaciones.celular_normalizado')}
+        WHERE celular_normalizado IS NOT NULL
+    ''')
+    return creados
+
+
+def unificar_clientes(conn: sqlite3.Connection) -> int:
+    """
+    Volver a normalizar la clave de los clientes y unir los que quedan repetidos
+
+    Sirve cuando cambian las reglas de normalizar_celular: de cada grupo con la
+    misma clave queda el cliente más antiguo, con el nombre y el celular del
+    actualizado más recientemente; sus reparaciones pasan a apuntarle.
+
+    Returns:
+        int: Clientes que se unieron a otro
+    """
+    grupos: Dict[str, List[sqlite3.Row]] = {}
+    for fila in conn.execute(f'''
+        SELECT id, celular_normalizado, nombre, apellido, celular,
+               fecha_alta, fecha_actualizacion
+        FROM {TABLA_CLIENTES} ORDER BY id
+    '''):
+        clave = normalizar_celular(fila[1]) or fila[1]
+        grupos.setdefault(clave, []).append(fila)
+
+    unificados = 0
+    for clave, clientes in grupos.items():
+        conservado = clientes[0]
+        if len(clientes) == 1 and conservado[1] == clave:
+            continue
+
+        repetidos = [cliente[0] for cliente in clientes[1:]]
+        if repetidos:
+            marcas = ', '.join('?' * len(repetidos))
+            conn.execute(f"UPDATE reparaciones SET cliente_id = ? WHERE cliente_id IN ({marcas})",
+                         [conservado[0]] + repetidos)
+            conn.execute(f"DELETE FROM {TABLA_CLIENTES} WHERE id IN ({marcas})", repetidos)
+            unificados += len(repetidos)
+
+        reciente = max(clientes, key=lambda cliente: (cliente[6] or '', cliente[0]))
+        conn.execute(f'''
+            UPDATE {TABLA_CLIENTES}
+            SET celular_normalizado = ?, nombre = ?, apellido = ?, celular = ?,
+                fecha_alta = ?, fecha_actualizacion = ?
+            WHERE id = ?
+        ''', (clave, reciente[2], reciente[3], reciente[4],
+              min((cliente[5] for cliente in clientes if cliente[5]), default=conservado[5]),
+              reciente[6], conservado[0]))
+
+    return unificados
+
+
+def registrar_clientes(conn: sqlite3.Connection, clientes: Iterable[DatosCliente]):
+    """
+    Crear o actualizar los clientes de una o más reparaciones que se guardan
+
+    El cliente conserva el nombre y el celular de su última reparación
+    guardada. Los celulares no válidos (normalizado None) no crean clientes.
+
+    Args:
+        conn (sqlite3.Connection): Escritor con la transacción abierta
+        clientes (Iterable[DatosCliente]): Datos de cada cliente
+    """
+    conn.executemany(f'''
+        INSERT INTO {TABLA_CLIENTES} (celular_normalizado, nombre, apellido, celular)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (celular_normalizado) DO UPDATE SET
+            nombre = excluded.nombre,
+            apellido = excluded.apellido,
+            celular = excluded.celular,
+            fecha_actualizacion = CURRENT_TIMESTAMP
+        WHERE (nombre, apellido, celular) IS NOT (excluded.nombre, excluded.apellido,
+                                                  excluded.celular)
+    ''', [cliente for cliente in clientes if cliente[0]])
+
+
+def leer_cliente(conn: sqlite3.Connection, celular_normalizado: str) -> Optional[Dict]:
+    """
+    Obtener un cliente y la cantidad de reparaciones que tiene
+
+    Returns:
+        Optional[Dict]: Columnas de clientes más 'reparaciones', o None si no existe
+    """
+    fila = conn.execute(f'''
+        SELECT c.*, (SELECT COUNT(*) FROM reparaciones r WHERE r.cliente_id = c.id) AS reparaciones
+        FROM {TABLA_CLIENTES} c WHERE c.celular_normalizado = ?
+    ''', (celular_normalizado,)).fetchone()
+    return dict(fila) if fila else None
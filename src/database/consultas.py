@@ -0,0 +1,249 @@
+"""
+Constructor de consultas de reparaciones para InstaFix
+Combina búsqueda, filtro de estado, rango de fechas, orden y paginación
+en una sola sentencia SQL con parámetros enlazados
+"""
+
+from datetime import date, datetime
+from typing import List, Optional, Sequence, Tuple, Union
+
+from .busqueda import TABLA_FTS, ORDEN_BM25, construir_consulta_fts
+from .validacion import PATRON_CELULAR, normalizar_celular
+
+Fecha = Union[str, date, datetime]
+
+# Orden -> (expresión ORDER BY, operador de comparación para el cursor)
+ORDENES = {
+    'recientes': ("r.fecha_ingreso DESC, r.id DESC", '<'),
+    'antiguas': ("r.fecha_ingreso ASC, r.id ASC", '>'),
+    'relevancia': (f"{ORDEN_BM25}, r.fecha_ingreso DESC, r.id DESC", None),
+}
+
+# Campos de la búsqueda por subcadena (sin FTS5)
+CAMPOS_LIKE = [
+    'numero_presupuesto', 'cliente_nombre', 'cliente_apellido', 'cliente_celular', 'producto'
+]
+
+
+def _texto_fecha(valor: Fecha) -> str:
+    """Convertir una fecha al formato en que SQLite guarda CURRENT_TIMESTAMP"""
+    if isinstance(valor, datetime):
+        return valor.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return str(valor)
+
+
+class ConsultaReparaciones:
+    """Constructor encadenable de consultas SELECT sobre reparaciones"""
+
+    def __init__(self, columnas: Optional[Sequence[str]] = None, tabla: str = 'reparaciones'):
+        """
+        Inicializar la consulta
+
+        Args:
+            columnas (Optional[Sequence[str]]): Columnas a devolver; None para todas
+            tabla (str): Tabla a consultar ('archivo.reparaciones' para el archivo,
+                que no tiene índice FTS5: buscar con usar_fts=False)
+        """
+        self._tabla = tabla
+        if columnas:
+            self._columnas = ', '.join(f"r.{columna}" for columna in columnas)
+        else:
+            self._columnas = 'r.*'
+
+        self._condiciones: List[str] = []
+        self._parametros: List = []
+        self._join = ''
+        self._parametros_join: List = []
+        self._orden = 'recientes'
+
+    def buscar(self, termino: Optional[str], usar_fts: bool = True) -> 'ConsultaReparaciones':
+        """
+        Filtrar por texto libre
+
+        Args:
+            termino (Optional[str]): Texto ingresado; vacío o None no filtra
+            usar_fts (bool): False si la base no tiene índice FTS5
+        """
+        termino = (termino or '').strip()
+        if not termino:
+            return self
+
+        # Algo que parece un celular completo se busca también por el índice del
+        # celular normalizado; el texto sigue buscándose porque puede ser otro
+        # número (un IMEI, un número de serie) o un celular guardado sin normalizar
+        celular = None
+        if any(c.isdigit() for c in termino) and PATRON_CELULAR.match(termino):
+            celular = normalizar_celular(termino)
+
+        consulta_fts = construir_consulta_fts(termino) if usar_fts else None
+
+        if consulta_fts is not None and celular is None:
+            # El JOIN permite ordenar por relevancia con bm25()
+            self._join = f"JOIN {TABLA_FTS} ON {TABLA_FTS}.rowid = r.id"
+            self._condiciones.append(f"{TABLA_FTS} MATCH ?")
+            self._parametros.append(consulta_fts)
+            return self
+
+        if consulta_fts is not None:
+            # MATCH no se puede combinar con OR en el JOIN: va como subconsulta
+            # (sin bm25, así que el orden por relevancia pasa a 'recientes')
+            condicion = f"r.id IN (SELECT rowid FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH ?)"
+            parametros = [consulta_fts]
+        else:
+            condicion = '(' + ' OR '.join(f"r.{campo} LIKE ?" for campo in CAMPOS_LIKE) + ')'
+            parametros = [f"%{termino}%"] * len(CAMPOS_LIKE)
+
+        if celular is not None:
+            condicion = f"(r.celular_normalizado = ? OR {condicion})"
+            parametros.insert(0, celular)
+
+        self._condiciones.append(condicion)
+        self._parametros.extend(parametros)
+        return self
+
+    def numeros(self, numeros: Sequence[str]) -> 'ConsultaReparaciones':
+        """Limitar la consulta a ciertos números de presupuesto"""
+        self._condiciones.append(
+            f"r.numero_presupuesto IN ({', '.join('?' * len(numeros))})"
+        )
+        self._parametros.extend(numeros)
+        return self
+
+    def celular(self, celular_normalizado: str) -> 'ConsultaReparaciones':
+        """Limitar la consulta a un celular (ya normalizado con normalizar_celular)"""
+        self._condiciones.append("r.celular_normalizado = ?")
+        self._parametros.append(celular_normalizado)
+        return self
+
+    def cliente(self, cliente_id: int) -> 'ConsultaReparaciones':
+        """Limitar la consulta a las reparaciones de un cliente"""
+        self._condiciones.append("r.cliente_id = ?")
+        self._parametros.append(cliente_id)
+        return self
+
+    def ids(self, ids: Sequence[int]) -> 'ConsultaReparaciones':
+        """Limitar la consulta a ciertos ids de reparación"""
+        self._condiciones.append(f"r.id IN ({', '.join('?' * len(ids))})")
+        self._parametros.extend(ids)
+        return self
+
+    def estado(self, estado: Optional[str]) -> 'ConsultaReparaciones':
+        """Filtrar por estado ('todos' o None no filtra)"""
+        if estado and estado != 'todos':
+            self._condiciones.append("r.estado = ?")
+            self._parametros.append(estado)
+        return self
+
+    def rango_fechas(self, desde: Optional[Fecha] = None,
+                     hasta: Optional[Fecha] = None) -> 'ConsultaReparaciones':
+        """
+        Filtrar por fecha de ingreso
+
+        Args:
+            desde (Optional[Fecha]): Fecha inicial incluida
+            hasta (Optional[Fecha]): Fecha final incluida (un día completo si no tiene hora)
+        """
+        if desde:
+            self._condiciones.append("r.fecha_ingreso >= ?")
+            self._parametros.append(_texto_fecha(desde))
+
+        if hasta:
+            texto = _texto_fecha(hasta)
+            if len(texto) == 10:
+                self._condiciones.append("r.fecha_ingreso < date(?, '+1 day')")
+            else:
+                self._condiciones.append("r.fecha_ingreso <= ?")
+            self._parametros.append(texto)
+
+        return self
+
+    def ordenar(self, orden: str) -> 'ConsultaReparaciones':
+        """
+        Elegir el orden: 'recientes', 'antiguas' o 'relevancia'
+
+        'relevancia' sólo aplica a búsquedas con FTS5; sin ella se usa 'recientes'.
+        """
+        if orden not in ORDENES:
+            raise ValueError(f"Orden desconocido: {orden}")
+        self._orden = orden
+        return self
+
+    @property
+    def orden_efectivo(self) -> str:
+        """Orden que se usará realmente (relevancia requiere búsqueda FTS5)"""
+        if self._orden == 'relevancia' and not self._join:
+            return 'recientes'
+        return self._orden
+
+    def _where(self, extra: Optional[str] = None) -> str:
+        """Armar la cláusula WHERE"""
+        condiciones = list(self._condiciones)
+        if extra:
+            condiciones.append(extra)
+        if not condiciones:
+            return ''
+        return "WHERE " + " AND ".join(condiciones)
+
+    def sql_pagina(self, cursor=None, tamano: Optional[int] = None,
+                   desplazamiento: int = 0) -> Tuple[str, List]:
+        """
+        Generar la consulta de una página
+
+        Args:
+            cursor: Para órdenes por fecha, tupla (fecha_ingreso, id) de la última fila
+                de la página anterior; para 'relevancia', cantidad de filas ya leídas
+            tamano (Optional[int]): Filas a devolver; None para todas
+            desplazamiento (int): Filas a saltear después del cursor (OFFSET); sirve
+                para saltar a una posición sin haber leído las páginas anteriores
+
+        Returns:
+            Tuple[str, List]: Sentencia SQL y sus parámetros
+        """
+        orden = self.orden_efectivo
+        expresion_orden, comparacion = ORDENES[orden]
+        parametros = list(self._parametros)
+
+        extra = None
+        if cursor is not None and comparacion:
+            extra = f"(r.fecha_ingreso, r.id) {comparacion} (?, ?)"
+            parametros.extend(cursor)
+
+        sql = (f"SELECT {self._columnas} FROM {self._tabla} r {self._join} "
+               f"{self._where(extra)} ORDER BY {expresion_orden}")
+
+        if cursor is not None and not comparacion:
+            desplazamiento += int(cursor)
+
+        if tamano is not None:
+            sql += " LIMIT ?"
+            parametros.append(tamano)
+        elif desplazamiento:
+            sql += " LIMIT -1"
+
+        if desplazamiento:
+            sql += " OFFSET ?"
+            parametros.append(desplazamiento)
+
+        return sql, parametros
+
+    def sql_total(self) -> Tuple[str, List]:
+        """Generar la consulta que cuenta todas las filas que cumplen los filtros"""
+        sql = f"SELECT COUNT(*) FROM {self._tabla} r {self._join} {self._where()}"
+        return sql, list(self._parametros)
+
+    def siguiente_cursor(self, ultima: dict, cursor_actual, leidas: int,
+                         desplazamiento: int = 0):
+        """
+        Calcular el cursor de la página siguiente
+
+        Args:
+            ultima (dict): Última fila de la página actual (con fecha_ingreso e id)
+            cursor_actual: Cursor con el que se pidió la página actual
+            leidas (int): Filas devueltas en la página actual
+            desplazamiento (int): Desplazamiento con el que se pidió la página actual
+        """
+        if ORDENES[self.orden_efectivo][1]:
+            return (ultima['fecha_ingreso'], ultima['id'])
+        return int(cursor_actual or 0) + desplazamiento + leidas
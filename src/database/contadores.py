@@ -0,0 +1,109 @@
+"""
+Contadores de reparaciones por estado para InstaFix
+Una fila por estado que mantienen los triggers de la tabla reparaciones,
+así las estadísticas y el total del listado no recorren la tabla
+"""
+
+import sqlite3
+import logging
+from typing import Dict
+
+from .validacion import ESTADOS
+
+logger = logging.getLogger(__name__)
+
+TABLA_CONTADORES = 'contadores_estado'
+
+TRIGGERS_CONTADORES = ['contadores_estado_ai', 'contadores_estado_ad', 'contadores_estado_au']
+
+
+def contadores_existen(conn: sqlite3.Connection) -> bool:
+    """Verificar si la tabla de contadores y sus triggers están creados"""
+    nombres = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE name = ? OR name IN (?, ?, ?)",
+            (TABLA_CONTADORES, *TRIGGERS_CONTADORES)
+        )
+    }
+    return nombres == {TABLA_CONTADORES, *TRIGGERS_CONTADORES}
+
+
+def crear_contadores(conn: sqlite3.Connection):
+    """
+    Crear la tabla de contadores y los triggers que la mantienen
+
+    Se debe llamar dentro de una transacción; después hay que cargar los
+    valores iniciales con recalcular_contadores().
+    """
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {TABLA_CONTADORES} (
+            estado TEXT PRIMARY KEY,
+            cantidad INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+
+    # Una fila por estado: los triggers sólo necesitan UPDATE
+    conn.executemany(
+        f"INSERT OR IGNORE INTO {TABLA_CONTADORES} (estado, cantidad) VALUES (?, 0)",
+        [(estado,) for estado in ESTADOS]
+    )
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS contadores_estado_ai AFTER INSERT ON reparaciones BEGIN
+            UPDATE {TABLA_CONTADORES} SET cantidad = cantidad + 1 WHERE estado = new.estado;
+        END
+    ''')
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS contadores_estado_ad AFTER DELETE ON reparaciones BEGIN
+            UPDATE {TABLA_CONTADORES} SET cantidad = cantidad - 1 WHERE estado = old.estado;
+        END
+    ''')
+
+    # Sólo los cambios de estado mueven los contadores
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS contadores_estado_au AFTER UPDATE OF estado ON reparaciones
+        WHEN old.estado IS NOT new.estado BEGIN
+            UPDATE {TABLA_CONTADORES} SET cantidad = cantidad - 1 WHERE estado = old.estado;
+            UPDATE {TABLA_CONTADORES} SET cantidad = cantidad + 1 WHERE estado = new.estado;
+        END
+    ''')
+
+
+def contar_desde_tabla(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Contar las reparaciones por estado recorriendo la tabla (para verificar)"""
+    conteo = {estado: 0 for estado in ESTADOS}
+    for estado, cantidad in conn.execute(
+        "SELECT estado, COUNT(*) FROM reparaciones GROUP BY estado"
+    ):
+        if estado in conteo:
+            conteo[estado] = cantidad
+    return conteo
+
+
+def leer_contadores(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Leer los contadores mantenidos por los triggers"""
+    conteo = {estado: 0 for estado in ESTADOS}
+    for estado, cantidad in conn.execute(
+        f"SELECT estado, cantidad FROM {TABLA_CONTADORES}"
+    ):
+        conteo[estado] = cantidad
+    return conteo
+
+
+def recalcular_contadores(conn: sqlite3.Connection) -> Dict[str, int]:
+    """
+    Reemplazar los contadores por el conteo real de la tabla
+
+    Se debe llamar dentro de una transacción de escritura.
+
+    Returns:
+        Dict[str, int]: Cantidad de reparaciones por estado
+    """
+    conteo = contar_desde_tabla(conn)
+    conn.execute(f"DELETE FROM {TABLA_CONTADORES}")
+    conn.executemany(
+        f"INSERT INTO {TABLA_CONTADORES} (estado, cantidad) VALUES (?, ?)",
+        list(conteo.items())
+    )
+    return conteo
@@ -5,27 +5,117 @@ Maneja todas las operaciones de base de datos
 
 import sqlite3
 import logging
+import threading
+import time
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Iterable, Optional, Tuple
 import os
 
+from .pool import ConnectionPool
+from .cache import CacheReparaciones, TAMANO_CACHE_POR_DEFECTO
+from .perfiles import (
+    PERFILES, CLAVE_CONFIGURACION_PERFIL,
+    aplicar_perfil, perfil_desde_entorno, resolver_perfil
+)
+from .migraciones import aplicar_migraciones
+from .busqueda import (
+    fts5_disponible, indice_busqueda_existe, crear_indice_busqueda,
+    eliminar_triggers_busqueda, reconstruir_indice
+)
+from .consultas import ConsultaReparaciones, Fecha
+from .contadores import (
+    contadores_existen, crear_contadores, recalcular_contadores,
+    leer_contadores, contar_desde_tabla
+)
+from .validacion import normalizar_reparacion, normalizar_celular
+from .cambios import version_actual, leer_cambios, podar_cambios
+from .trigramas import IndiceTrigramas
+from .clientes import SQL_ID_CLIENTE, registrar_clientes, leer_cliente
+from .historial import leer_historiales
+from .archivado import (
+    ESQUEMA_ARCHIVO, ANTIGUEDAD_POR_DEFECTO_DIAS, TAMANO_LOTE_ARCHIVADO,
+    ruta_archivo, antiguedad_desde_entorno, adjuntar_archivo, archivo_con_reparaciones,
+    preparar_archivo,
+    fecha_corte, contar_archivables, seleccionar_lote, copiar_al_archivo, quitar_de_principal,
+    ids_archivados, copiar_a_principal, quitar_del_archivo, buscar_en_archivo, estadisticas_archivo
+)
+from .respaldos import CARPETA_RESPALDOS, ServicioRespaldos, carpeta_desde_entorno
+from .mantenimiento import (
+    activar_vacuum_incremental, informe_esquemas, mantener, mantenimiento_pendiente
+)
+from .resumenes import actualizar_resumenes, resumen_por_periodo, resumen_por_producto
+from .exportacion import Progreso, exportar_csv
+from .importacion import (
+    TAMANO_LOTE_IMPORTACION, MAXIMO_ERRORES_DETALLE, ImportacionCancelada,
+    DetectorDuplicados, abrir_csv, leer_filas, numero_secuencia
+)
+
 logger = logging.getLogger(__name__)
 
+# Columnas que muestra el listado principal (sin los textos largos descripcion/notas)
+COLUMNAS_LISTADO = [
+    'id', 'numero_presupuesto', 'cliente_nombre', 'cliente_apellido',
+    'cliente_celular', 'producto', 'costo_reparacion', 'estado', 'fecha_ingreso'
+]
+
+# Búsqueda aproximada cuando la exacta no encuentra nada
+LIMITE_SUGERENCIAS = 5
+PUNTAJE_MINIMO_APROXIMADO = 0.5
+MAXIMO_IDS_APROXIMADOS = 500
+
 class DatabaseManager:
     """Clase para gestionar la base de datos SQLite"""
     
-    def __init__(self, db_path: str = "instafix.db"):
+    def __init__(self, db_path: str = "instafix.db",
+                 tamano_cache: int = TAMANO_CACHE_POR_DEFECTO):
         """
         Inicializar el gestor de base de datos
         
         Args:
             db_path (str): Ruta al archivo de base de datos
+            tamano_cache (int): Reparaciones que guarda la caché de obtener_reparacion
+                (0 para desactivarla)
         """
         self.db_path = db_path
+        
+        # Perfil de rendimiento: el de .env si existe; initialize_database
+        # puede reemplazarlo por el guardado en la tabla configuracion
+        self.perfil = resolver_perfil(perfil_desde_entorno())
+        self.origen_perfil = 'entorno' if perfil_desde_entorno() else 'defecto'
+        
+        self.pool = ConnectionPool(db_path, configurar=self._configurar_conexion)
+        self.cache = CacheReparaciones(tamano_cache)
+        self.trigramas = IndiceTrigramas()
+        self.ruta_archivo = ruta_archivo(db_path)
+        self.respaldos = self._crear_servicio_respaldos()
+        self.version_esquema = 0
+        self.busqueda_fts = False
         logger.info(f"Inicializando base de datos: {db_path}")
     
+    def _crear_servicio_respaldos(self) -> Optional[ServicioRespaldos]:
+        """Respaldos de la base y del archivo (None para bases en memoria)"""
+        if self.ruta_archivo is None:
+            return None
+        carpeta = carpeta_desde_entorno() or os.path.join(
+            os.path.dirname(os.path.abspath(self.db_path)), CARPETA_RESPALDOS
+        )
+        return ServicioRespaldos([self.db_path, self.ruta_archivo], carpeta)
+    
+    def _configurar_conexion(self, conn: sqlite3.Connection, solo_lectura: bool):
+        """Aplicar el perfil de rendimiento activo a una conexión del pool"""
+        try:
+            aplicar_perfil(conn, self.perfil, solo_lectura)
+        except sqlite3.Error as e:
+            # Un PRAGMA rechazado (p. ej. base bloqueada) no impide trabajar
+            logger.warning(f"No se pudo aplicar el perfil '{self.perfil}': {e}")
+    
     def get_connection(self) -> sqlite3.Connection:
-        """Obtener una conexión a la base de datos"""
+        """
+        Obtener una conexión nueva e independiente a la base de datos
+        
+        Las operaciones del gestor usan el pool de conexiones; este método
+        queda para scripts y herramientas externas que necesitan su propia conexión.
+        """
         try:
             conn = sqlite3.connect(self.db_path)
             conn.row_factory = sqlite3.Row  # Para acceder por nombre de columna
@@ -35,92 +125,345 @@ class DatabaseManager:
             raise
     
     def initialize_database(self):
-        """Crear las tablas necesarias si no existen"""
+        """Crear o actualizar el esquema aplicando las migraciones pendientes"""
         logger.info("Inicializando estructura de base de datos...")
         
-        with self.get_connection() as conn:
+        # Si el esquema ya está al día no se ejecuta ningún DDL
+        with self.pool.escritor(transaccion=False) as conn:
+            self.version_esquema = aplicar_migraciones(conn)
+        
+        # Las bases nuevas (o chicas) pasan a auto_vacuum incremental al crearse.
+        # VACUUM necesita la base sólo para sí: si otro equipo la está leyendo se
+        # deja para el mantenimiento en lugar de impedir que la aplicación arranque
+        with self.pool.escritor(transaccion=False) as conn:
+            try:
+                activar_vacuum_incremental(conn)
+            except sqlite3.OperationalError as e:
+                logger.warning(f"No se pudo pasar la base a auto_vacuum incremental: {e}. "
+                               f"Se puede hacer con 'cleanup.py --mantenimiento --compactar'")
+        
+        self.busqueda_fts = self._verificar_indice_busqueda()
+        self._verificar_contadores_instalados()
+        
+        # El archivo no tiene migraciones: se pone al día con el esquema y con
+        # las reglas de normalización de la principal (ver preparar_archivo)
+        if self.ruta_archivo and os.path.exists(self.ruta_archivo):
+            with self.pool.escritor(transaccion=False) as conn:
+                self._adjuntar_archivo(conn, solo_lectura=False)
+            with self.pool.escritor() as conn:
+                preparar_archivo(conn)
+        
+        self.podar_registro_cambios()
+        
+        # Se lee con el escritor: SQLite no permite salir del modo WAL
+        # mientras haya otra conexión abierta (como un lector del pool)
+        with self.pool.escritor(transaccion=False) as conn:
             cursor = conn.cursor()
+            cursor.execute(
+                "SELECT valor FROM configuracion WHERE clave = ?",
+                (CLAVE_CONFIGURACION_PERFIL,)
+            )
+            perfil_guardado = cursor.fetchone()[0]
+        
+        # El .env tiene prioridad sobre la tabla configuracion. El modo de journal
+        # no se puede cambiar dentro de una transacción, por eso se aplica aquí.
+        if self.origen_perfil != 'entorno':
+            self.aplicar_perfil(perfil_guardado)
+            self.origen_perfil = 'configuracion'
+        
+        logger.info(f"Base de datos inicializada correctamente (perfil: {self.perfil})")
+    
+    def _verificar_indice_busqueda(self) -> bool:
+        """
+        Comprobar que el índice FTS5 se pueda usar en este equipo
+        
+        Returns:
+            bool: True si buscar_reparaciones puede usar FTS5
+        """
+        with self.pool.escritor() as conn:
+            disponible = fts5_disponible(conn)
+            existe = indice_busqueda_existe(conn)
             
-            # Tabla principal de reparaciones
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS reparaciones (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    numero_presupuesto TEXT UNIQUE NOT NULL,
-                    cliente_nombre TEXT NOT NULL,
-                    cliente_apellido TEXT NOT NULL,
-                    cliente_celular TEXT NOT NULL,
-                    producto TEXT NOT NULL,
-                    descripcion TEXT DEFAULT '',
-                    costo_reparacion REAL DEFAULT NULL,
-                    estado TEXT DEFAULT 'pendiente' CHECK (estado IN ('pendiente', 'en_proceso', 'finalizado', 'retirado')),
-                    fecha_ingreso TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    fecha_retiro TIMESTAMP DEFAULT NULL,
-                    notas TEXT DEFAULT ''
-                )
-            ''')
+            if disponible and existe:
+                return True
             
-            # Tabla de historial de estados (para auditoría)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS historial_estados (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    reparacion_id INTEGER NOT NULL,
-                    estado_anterior TEXT,
-                    estado_nuevo TEXT NOT NULL,
-                    fecha_cambio TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    notas TEXT DEFAULT '',
-                    FOREIGN KEY (reparacion_id) REFERENCES reparaciones (id)
-                )
-            ''')
+            if not disponible:
+                # Una base creada con FTS5 abierta con un SQLite sin FTS5: sin quitar
+                # los triggers fallaría cualquier alta o modificación
+                eliminar_triggers_busqueda(conn)
+                logger.warning("FTS5 no disponible: la búsqueda usará LIKE")
+                return False
+        
+        # Hay FTS5 pero falta el índice (o sus triggers): se regenera
+        return self.reconstruir_indice_busqueda()
+    
+    def _verificar_contadores_instalados(self):
+        """Volver a crear los contadores por estado si faltan la tabla o sus triggers"""
+        with self.pool.escritor() as conn:
+            if contadores_existen(conn):
+                return
             
-            # Tabla de configuración
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS configuracion (
-                    clave TEXT PRIMARY KEY,
-                    valor TEXT NOT NULL,
-                    descripcion TEXT DEFAULT '',
-                    fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            logger.warning("Faltan los contadores por estado: se vuelven a crear")
+            crear_contadores(conn)
+            recalcular_contadores(conn)
+    
+    def reconstruir_indice_busqueda(self) -> bool:
+        """
+        Crear (si falta) y regenerar por completo el índice de búsqueda FTS5
+        
+        Returns:
+            bool: True si el índice quedó disponible, False si SQLite no incluye FTS5
+        """
+        with self.pool.escritor() as conn:
+            if not fts5_disponible(conn):
+                logger.warning("No se puede reconstruir el índice: SQLite no incluye FTS5")
+                self.busqueda_fts = False
+                return False
+            
+            crear_indice_busqueda(conn)
+            reconstruir_indice(conn)
+        
+        self.busqueda_fts = True
+        logger.info("Índice de búsqueda reconstruido")
+        return True
+    
+    def aplicar_perfil(self, nombre: str, guardar: bool = False):
+        """
+        Activar un perfil de rendimiento en todas las conexiones
+        
+        Args:
+            nombre (str): Nombre del perfil (ver database.perfiles.PERFILES)
+            guardar (bool): True para guardarlo en la tabla configuracion
+        """
+        self.perfil = resolver_perfil(nombre)
+        self.pool.reconfigurar()
+        
+        if guardar:
+            with self.pool.escritor() as conn:
+                conn.execute(
+                    "UPDATE configuracion SET valor = ?, fecha_actualizacion = CURRENT_TIMESTAMP WHERE clave = ?",
+                    (self.perfil, CLAVE_CONFIGURACION_PERFIL)
                 )
-            ''')
+            self.origen_perfil = 'configuracion'
+        
+        logger.info(f"Perfil de base de datos activo: {self.perfil}")
+    
+    def obtener_perfil_activo(self) -> Dict:
+        """
+        Informar el perfil de rendimiento activo y los valores efectivos de SQLite
+        
+        Returns:
+            Dict: Nombre, origen, descripción y valores actuales de los PRAGMA
+        """
+        with self.pool.escritor(transaccion=False) as conn:
+            valores = {
+                pragma: conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+                for pragma in ('journal_mode', 'synchronous', 'cache_size', 'mmap_size',
+                               'temp_store', 'busy_timeout', 'wal_autocheckpoint')
+            }
+        
+        return {
+            'nombre': self.perfil,
+            'origen': self.origen_perfil,
+            'descripcion': PERFILES[self.perfil]['descripcion'],
+            'pragmas': valores
+        }
+    
+    def checkpoint(self, modo: str = 'PASSIVE') -> Tuple[int, int, int]:
+        """
+        Ejecutar un checkpoint del WAL
+        
+        Args:
+            modo (str): PASSIVE, FULL, RESTART o TRUNCATE
             
-            # Insertar configuración por defecto
-            cursor.execute('''
-                INSERT OR IGNORE INTO configuracion (clave, valor, descripcion) 
-                VALUES ('ultimo_numero_presupuesto', '0', 'Último número de presupuesto generado')
-            ''')
+        Returns:
+            Tuple[int, int, int]: (bloqueado, páginas en el WAL, páginas copiadas)
+        """
+        modo = modo.upper()
+        if modo not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+            raise ValueError(f"Modo de checkpoint inválido: {modo}")
+        
+        with self.pool.escritor(transaccion=False) as conn:
+            resultado = tuple(conn.execute(f"PRAGMA wal_checkpoint({modo})").fetchone())
+        
+        logger.debug(f"Checkpoint {modo}: {resultado}")
+        return resultado
+    
+    def crear_respaldo(self, progreso: Optional[Progreso] = None,
+                       cancelar: Optional[threading.Event] = None) -> Dict:
+        """
+        Respaldar ahora la base (y el archivo de reparaciones) sin detener la aplicación
+        
+        Pensado para un hilo de trabajo: la copia usa sus propias conexiones de
+        lectura y avanza de a pocas páginas, así nunca bloquea al escritor.
+        
+        Args:
+            progreso (Optional[Progreso]): Función que recibe (páginas copiadas, total)
+            cancelar (Optional[threading.Event]): Evento para cancelar el respaldo
+            
+        Returns:
+            Dict: Ver database.respaldos.ServicioRespaldos.respaldar
+        """
+        if self.respaldos is None:
+            raise ValueError("Una base en memoria no se puede respaldar")
+        return self.respaldos.respaldar(progreso=progreso, cancelar=cancelar)
+    
+    def iniciar_respaldos_automaticos(self):
+        """Respaldar periódicamente en segundo plano (cada 24 horas por defecto)"""
+        if self.respaldos is not None:
+            self.respaldos.iniciar()
+    
+    def obtener_metricas_respaldos(self) -> Optional[Dict]:
+        """
+        Informar duración y tamaño de los respaldos
+        
+        Returns:
+            Optional[Dict]: Ver database.respaldos.ServicioRespaldos.metricas, con
+                'carpeta'; None para bases en memoria
+        """
+        if self.respaldos is None:
+            return None
+        return dict(self.respaldos.metricas(), carpeta=self.respaldos.carpeta)
+    
+    def podar_registro_cambios(self) -> int:
+        """
+        Borrar los cambios más viejos del registro (se conservan los últimos
+        MAXIMO_CAMBIOS); se llama al iniciar y periódicamente durante la sesión
+        
+        Returns:
+            int: Cambios borrados
+        """
+        with self.pool.escritor() as conn:
+            podadas = podar_cambios(conn)
+        if podadas:
+            logger.info(f"Registro de cambios podado: {podadas} cambios viejos")
+        return podadas
+    
+    def mantener_base(self, completo: bool = False, compactar: bool = False) -> Dict:
+        """
+        Actualizar las estadísticas del planificador, liberar páginas y hacer un checkpoint
+        
+        El mantenimiento liviano tarda milisegundos y sirve para los momentos
+        de inactividad; el completo (ANALYZE de todo, incluido el archivo de
+        reparaciones) es para el script de limpieza. Ocupa el escritor mientras dura.
+        
+        Args:
+            completo (bool): True para el mantenimiento completo
+            compactar (bool): Pasar antes la base a auto_vacuum incremental con
+                un VACUUM completo (bloquea la base mientras dura)
             
-            conn.commit()
-            logger.info("Base de datos inicializada correctamente")
+        Returns:
+            Dict: Ver database.mantenimiento.mantener
+        """
+        with self.pool.escritor(transaccion=False) as conn:
+            esquemas = []
+            if completo and self.ruta_archivo and os.path.exists(self.ruta_archivo):
+                self._adjuntar_archivo(conn, solo_lectura=False)
+                esquemas.append(ESQUEMA_ARCHIVO)
+            resultado = mantener(conn, completo, esquemas=esquemas, compactar=compactar)
+        
+        logger.info("Mantenimiento de la base: " + ", ".join(
+            f"{paso['paso']} {paso['duracion'] * 1000:.0f} ms" for paso in resultado['pasos']
+        ))
+        return resultado
+    
+    def mantener_si_corresponde(self, horas: float = 24) -> Optional[Dict]:
+        """
+        Ejecutar el mantenimiento liviano si el último fue hace más de tantas horas
+        
+        Returns:
+            Optional[Dict]: Resultado del mantenimiento, o None si no hacía falta
+        """
+        with self.pool.lector() as conn:
+            if not mantenimiento_pendiente(conn, horas):
+                return None
+        return self.mantener_base()
+    
+    def obtener_informe_espacio(self) -> Dict:
+        """
+        Informar el espacio que ocupa cada tabla e índice
+        
+        Returns:
+            Dict: Por base ('main' y 'archivo' si existe); ver
+                database.mantenimiento.informe_esquemas
+        """
+        with self.pool.lector() as conn:
+            esquemas = ['main']
+            if self._adjuntar_archivo(conn, solo_lectura=True):
+                esquemas.append(ESQUEMA_ARCHIVO)
+            return informe_esquemas(conn, esquemas)
+    
+    def close(self):
+        """Cerrar las conexiones del pool al terminar la aplicación"""
+        if self.respaldos is not None:
+            self.respaldos.detener()
+        
+        modo = PERFILES[self.perfil]['checkpoint_al_cerrar']
+        if modo and not self.pool.cerrado:
+            try:
+                self.checkpoint(modo)
+            except sqlite3.Error as e:
+                logger.warning(f"No se pudo hacer el checkpoint final: {e}")
+        
+        estadisticas = self.cache.estadisticas()
+        logger.info(f"Caché de reparaciones: {estadisticas['aciertos']} aciertos, "
+                    f"{estadisticas['fallos']} fallos")
+        
+        self.pool.close()
     
     def generar_numero_presupuesto(self) -> str:
         """Generar un nuevo número de presupuesto único"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Obtener el último número
-            cursor.execute(
-                "SELECT valor FROM configuracion WHERE clave = 'ultimo_numero_presupuesto'"
-            )
-            resultado = cursor.fetchone()
-            
-            if resultado:
-                ultimo_numero = int(resultado[0])
-            else:
-                ultimo_numero = 0
-            
-            # Generar nuevo número
-            nuevo_numero = ultimo_numero + 1
-            numero_presupuesto = f"INF-{nuevo_numero:06d}"
+        return self.reservar_numeros_presupuesto(1)[0]
+    
+    def reservar_numeros_presupuesto(self, cantidad: int) -> List[str]:
+        """
+        Reservar un bloque de números de presupuesto consecutivos
+        
+        Args:
+            cantidad (int): Cantidad de números a reservar
             
-            # Actualizar en la base de datos
+        Returns:
+            List[str]: Números reservados, en orden
+        """
+        with self.pool.escritor() as conn:
+            return self._reservar_numeros_presupuesto(conn, cantidad)
+    
+    def _reservar_numeros_presupuesto(self, conn: sqlite3.Connection, cantidad: int) -> List[str]:
+        """
+        Reservar números dentro de la transacción recibida
+        
+        El escritor abre las transacciones con BEGIN IMMEDIATE, así que ningún otro
+        proceso puede leer el mismo contador hasta el commit: el incremento, la
+        lectura y el alta que use los números son atómicos.
+        """
+        if cantidad < 1:
+            raise ValueError("La cantidad de números a reservar debe ser positiva")
+        
+        cursor = conn.cursor()
+        
+        # Incrementar el contador en una sola sentencia
+        cursor.execute(
+            "UPDATE configuracion SET valor = CAST(valor AS INTEGER) + ?, "
+            "fecha_actualizacion = CURRENT_TIMESTAMP WHERE clave = 'ultimo_numero_presupuesto'",
+            (cantidad,)
+        )
+        
+        if cursor.rowcount == 0:
+            # Base sin contador: empezar desde cero
             cursor.execute(
-                "UPDATE configuracion SET valor = ?, fecha_actualizacion = CURRENT_TIMESTAMP WHERE clave = 'ultimo_numero_presupuesto'",
-                (str(nuevo_numero),)
+                "INSERT INTO configuracion (clave, valor, descripcion) "
+                "VALUES ('ultimo_numero_presupuesto', ?, 'Último número de presupuesto generado')",
+                (str(cantidad),)
             )
-            
-            conn.commit()
-            return numero_presupuesto
-    
+        
+        cursor.execute(
+            "SELECT valor FROM configuracion WHERE clave = 'ultimo_numero_presupuesto'"
+        )
+        ultimo_numero = int(cursor.fetchone()[0])
+        
+        primero = ultimo_numero - cantidad + 1
+        return [f"INF-{numero:06d}" for numero in range(primero, ultimo_numero + 1)]
+
     def crear_reparacion(self, datos: Dict) -> str:
         """
         Crear una nueva reparación
@@ -131,21 +474,29 @@ class DatabaseManager:
         Returns:
             str: Número de presupuesto generado
         """
-        numero_presupuesto = self.generar_numero_presupuesto()
-        
-        with self.get_connection() as conn:
+        with self.pool.escritor() as conn:
+            # El número se genera en la misma transacción que el alta
+            numero_presupuesto = self._reservar_numeros_presupuesto(conn, 1)[0]
+            
             cursor = conn.cursor()
             
-            cursor.execute('''
+            celular_normalizado = normalizar_celular(datos['cliente_celular'])
+            registrar_clientes(conn, [(celular_normalizado, datos['cliente_nombre'],
+                                       datos['cliente_apellido'], datos['cliente_celular'])])
+            
+            cursor.execute(f'''
                 INSERT INTO reparaciones (
                     numero_presupuesto, cliente_nombre, cliente_apellido, 
-                    cliente_celular, producto, descripcion, costo_reparacion, estado
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    cliente_celular, celular_normalizado, cliente_id, producto, descripcion,
+                    costo_reparacion, estado
+                ) VALUES (?, ?, ?, ?, ?, {SQL_ID_CLIENTE}, ?, ?, ?, ?)
             ''', (
                 numero_presupuesto,
                 datos['cliente_nombre'],
                 datos['cliente_apellido'],
                 datos['cliente_celular'],
+                celular_normalizado,
+                celular_normalizado,
                 datos['producto'],
                 datos.get('descripcion', ''),
                 datos.get('costo_reparacion'),
@@ -160,14 +511,226 @@ class DatabaseManager:
                 VALUES (?, ?, ?)
             ''', (reparacion_id, datos.get('estado', 'pendiente'), 'Reparación creada'))
             
-            conn.commit()
-            logger.info(f"Reparación creada: {numero_presupuesto}")
-            
+        logger.info(f"Reparación creada: {numero_presupuesto}")
         return numero_presupuesto
     
+    def crear_reparaciones_lote(self, reparaciones: Iterable[Dict],
+                                detener_en_error: bool = False) -> Dict:
+        """
+        Crear muchas reparaciones en una sola transacción
+        
+        Reserva un bloque contiguo de números de presupuesto e inserta las
+        reparaciones y su historial inicial con executemany.
+        
+        Args:
+            reparaciones (Iterable[Dict]): Datos de cada reparación; además de los
+                campos de crear_reparacion admite 'notas', 'fecha_ingreso' y 'fecha_retiro'
+            detener_en_error (bool): True para cancelar todo el lote ante la primera
+                fila inválida (lanza ValueError); False para omitirla y seguir
+            
+        Returns:
+            Dict: 'numeros' (presupuestos creados, en el orden recibido) y
+                'errores' (lista de {'indice', 'error'} de las filas omitidas)
+        """
+        validas = []
+        errores = []
+        
+        for indice, datos in enumerate(reparaciones):
+            try:
+                validas.append(normalizar_reparacion(datos))
+            except (ValueError, KeyError, TypeError) as e:
+                if detener_en_error:
+                    raise ValueError(f"Fila {indice + 1}: {e}") from e
+                errores.append({'indice': indice, 'error': str(e)})
+        
+        if not validas:
+            return {'numeros': [], 'errores': errores}
+        
+        with self.pool.escritor() as conn:
+            numeros = self._reservar_numeros_presupuesto(conn, len(validas))
+            self._insertar_reparaciones(conn, list(zip(numeros, validas)), 'Reparación creada')
+        
+        logger.info(f"Lote de reparaciones creado: {len(numeros)} altas, {len(errores)} errores")
+        return {'numeros': numeros, 'errores': errores}
+    
+    def _insertar_reparaciones(self, conn: sqlite3.Connection,
+                               filas: List[Tuple[str, Dict]], nota: str):
+        """
+        Insertar reparaciones ya validadas y su historial inicial con executemany
+        
+        Args:
+            conn (sqlite3.Connection): Escritor con la transacción abierta
+            filas (List[Tuple[str, Dict]]): Número de presupuesto y datos normalizados
+                (ver database.validacion.normalizar_reparacion)
+            nota (str): Nota del primer registro del historial
+        """
+        # Clientes primero, así cada reparación encuentra el suyo
+        registrar_clientes(conn, (
+            (datos['celular_normalizado'], datos['cliente_nombre'],
+             datos['cliente_apellido'], datos['cliente_celular'])
+            for _, datos in filas
+        ))
+        
+        conn.executemany(f'''
+            INSERT INTO reparaciones (
+                numero_presupuesto, cliente_nombre, cliente_apellido,
+                cliente_celular, celular_normalizado, cliente_id, producto, descripcion,
+                costo_reparacion, estado, notas, fecha_ingreso, fecha_actualizacion, fecha_retiro
+            ) VALUES (?, ?, ?, ?, ?, {SQL_ID_CLIENTE}, ?, ?, ?, ?, ?,
+                      COALESCE(?, CURRENT_TIMESTAMP), CURRENT_TIMESTAMP, ?)
+        ''', [
+            (
+                numero, datos['cliente_nombre'], datos['cliente_apellido'],
+                datos['cliente_celular'], datos['celular_normalizado'],
+                datos['celular_normalizado'], datos['producto'],
+                datos['descripcion'], datos['costo_reparacion'], datos['estado'], datos['notas'],
+                datos['fecha_ingreso'], datos['fecha_retiro']
+            )
+            for numero, datos in filas
+        ])
+        
+        # Historial inicial: el id se resuelve por el índice único del número
+        conn.executemany('''
+            INSERT INTO historial_estados (reparacion_id, estado_nuevo, fecha_cambio, notas)
+            SELECT id, estado, fecha_ingreso, ?
+            FROM reparaciones WHERE numero_presupuesto = ?
+        ''', [(nota, numero) for numero, _ in filas])
+    
+    def importar_reparaciones_csv(self, archivo: str, detectar_duplicados: bool = True,
+                                  progreso: Optional[Progreso] = None,
+                                  cancelar: Optional[threading.Event] = None,
+                                  tamano_lote: int = TAMANO_LOTE_IMPORTACION) -> Dict:
+        """
+        Importar reparaciones desde un CSV (o .csv.gz) con encabezado
+        
+        El archivo se lee fila a fila y se inserta por lotes dentro de una única
+        transacción: si falla o se cancela no queda nada a medias. Las filas se
+        validan con las mismas reglas que el diálogo de reparación. Se aceptan las
+        columnas del CSV exportado; si trae numero_presupuesto se conserva, y si
+        no se asigna uno nuevo.
+        
+        Args:
+            archivo (str): Ruta del archivo
+            detectar_duplicados (bool): Omitir filas con un número de presupuesto
+                existente o con el mismo celular, producto y día de ingreso, en la
+                base o en el archivo de reparaciones
+            progreso (Optional[Progreso]): Función que recibe (filas leídas, 0)
+            cancelar (Optional[threading.Event]): Evento para cancelar la importación
+            tamano_lote (int): Filas que se insertan juntas
+            
+        Returns:
+            Dict: 'leidas', 'importadas', 'duplicadas', 'invalidas', 'cancelado',
+                'duracion' y 'detalle' (hasta MAXIMO_ERRORES_DETALLE filas omitidas,
+                como {'linea', 'motivo'})
+        """
+        inicio = time.perf_counter()
+        resumen = {
+            'leidas': 0, 'importadas': 0, 'duplicadas': 0, 'invalidas': 0,
+            'cancelado': False, 'duracion': 0.0, 'detalle': []
+        }
+        
+        def omitir(linea: int, motivo: str, clave: str):
+            resumen[clave] += 1
+            if len(resumen['detalle']) < MAXIMO_ERRORES_DETALLE:
+                resumen['detalle'].append({'linea': linea, 'motivo': motivo})
+        
+        # Los duplicados se buscan también entre las archivadas (ATTACH va fuera
+        # de la transacción)
+        archivadas = None
+        if detectar_duplicados and self.ruta_archivo and os.path.exists(self.ruta_archivo):
+            with self.pool.escritor(transaccion=False) as conn:
+                self._adjuntar_archivo(conn, solo_lectura=False)
+                if archivo_con_reparaciones(conn):
+                    archivadas = f"{ESQUEMA_ARCHIVO}.reparaciones"
+        
+        try:
+            with abrir_csv(archivo) as origen, self.pool.escritor() as conn:
+                detector = None
+                if detectar_duplicados:
+                    fecha_hoy = conn.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+                    detector = DetectorDuplicados(conn, fecha_hoy, archivadas)
+                
+                lote = []
+                for linea, fila in leer_filas(origen):
+                    resumen['leidas'] += 1
+                    
+                    try:
+                        datos = normalizar_reparacion(fila)
+                    except ValueError as e:
+                        omitir(linea, str(e), 'invalidas')
+                        continue
+                    
+                    numero = (fila.get('numero_presupuesto') or '').strip() or None
+                    
+                    if detector is not None:
+                        motivo = detector.motivo(numero, datos)
+                        if motivo:
+                            omitir(linea, motivo, 'duplicadas')
+                            continue
+                    
+                    lote.append((numero, datos))
+                    
+                    if len(lote) >= tamano_lote:
+                        if cancelar is not None and cancelar.is_set():
+                            raise ImportacionCancelada()
+                        resumen['importadas'] += self._guardar_lote_importado(conn, lote)
+                        lote = []
+                        if detector is not None:
+                            detector.lote_guardado()
+                        if progreso:
+                            progreso(resumen['leidas'], 0)
+                
+                if cancelar is not None and cancelar.is_set():
+                    raise ImportacionCancelada()
+                if lote:
+                    resumen['importadas'] += self._guardar_lote_importado(conn, lote)
+                if detector is not None:
+                    detector.cerrar()
+        except ImportacionCancelada:
+            # La transacción ya se revirtió al salir del bloque
+            resumen['cancelado'] = True
+            resumen['importadas'] = 0
+            logger.info(f"Importación cancelada después de {resumen['leidas']} filas")
+        
+        resumen['duracion'] = time.perf_counter() - inicio
+        
+        if not resumen['cancelado']:
+            logger.info(
+                f"Importación de {archivo}: {resumen['importadas']} importadas, "
+                f"{resumen['duplicadas']} duplicadas, {resumen['invalidas']} inválidas "
+                f"({resumen['duracion']:.1f} s)"
+            )
+        return resumen
+    
+    def _guardar_lote_importado(self, conn: sqlite3.Connection,
+                                lote: List[Tuple[Optional[str], Dict]]) -> int:
+        """
+        Insertar un lote de la importación asignando número a las filas que no lo traen
+        
+        Returns:
+            int: Reparaciones insertadas
+        """
+        # El contador debe quedar por encima de los números INF- importados
+        maximo = max(
+            (numero_secuencia(numero) or 0 for numero, _ in lote if numero), default=0
+        )
+        if maximo:
+            conn.execute(
+                "UPDATE configuracion SET valor = MAX(CAST(valor AS INTEGER), ?), "
+                "fecha_actualizacion = CURRENT_TIMESTAMP WHERE clave = 'ultimo_numero_presupuesto'",
+                (maximo,)
+            )
+        
+        sin_numero = sum(1 for numero, _ in lote if not numero)
+        nuevos = iter(self._reservar_numeros_presupuesto(conn, sin_numero) if sin_numero else [])
+        
+        filas = [(numero or next(nuevos), datos) for numero, datos in lote]
+        self._insertar_reparaciones(conn, filas, 'Reparación importada')
+        return len(filas)
+    
     def obtener_todas_reparaciones(self) -> List[Dict]:
         """Obtener todas las reparaciones"""
-        with self.get_connection() as conn:
+        with self.pool.lector() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT * FROM reparaciones 
@@ -181,50 +744,311 @@ class DatabaseManager:
             
             return reparaciones
     
-    def buscar_reparaciones(self, termino: str) -> List[Dict]:
+    def exportar_reparaciones_csv(self, archivo: str, comprimir: Optional[bool] = None,
+                                  progreso: Optional[Progreso] = None,
+                                  cancelar: Optional[threading.Event] = None,
+                                  incluir_archivo: bool = True) -> Dict:
+        """
+        Exportar todas las reparaciones a CSV leyendo la tabla por lotes
+        
+        Pensado para ejecutarse en un hilo de trabajo: usa su propia conexión de
+        lectura, que se cierra al terminar.
+        
+        Args:
+            archivo (str): Ruta del archivo (.csv o .csv.gz)
+            comprimir (Optional[bool]): True para gzip; None decide por la extensión
+            progreso (Optional[Progreso]): Función que recibe (filas escritas, total)
+            cancelar (Optional[threading.Event]): Evento para cancelar la exportación
+            incluir_archivo (bool): Agregar al final las reparaciones archivadas
+        
+        Returns:
+            Dict: Resumen de la exportación (ver database.exportacion.exportar_csv)
+        """
+        with self.pool.lector_dedicado() as conn:
+            tablas = ['reparaciones']
+            if (incluir_archivo and self._adjuntar_archivo(conn, solo_lectura=True)
+                    and archivo_con_reparaciones(conn)):
+                tablas.append(f"{ESQUEMA_ARCHIVO}.reparaciones")
+            return exportar_csv(conn, archivo, comprimir=comprimir,
+                                progreso=progreso, cancelar=cancelar, tablas=tablas)
+    
+    def consultar_reparaciones(self, termino: Optional[str] = None, estado: Optional[str] = None,
+                               desde: Optional[Fecha] = None, hasta: Optional[Fecha] = None,
+                               orden: Optional[str] = None, cursor=None,
+                               tamano: Optional[int] = 200, incluir_total: bool = False,
+                               columnas: Optional[List[str]] = COLUMNAS_LISTADO,
+                               desplazamiento: int = 0) -> Dict:
+        """
+        Consultar reparaciones combinando búsqueda, estado, fechas, orden y paginación
+        
+        Todo se resuelve en una sola sentencia SQL indexada con parámetros enlazados.
+        Los órdenes por fecha paginan por clave (fecha_ingreso, id), así cada página
+        cuesta lo mismo sin importar cuántas reparaciones haya antes.
+        
+        Args:
+            termino (Optional[str]): Texto libre (ver buscar_reparaciones)
+            estado (Optional[str]): Estado a filtrar; None o 'todos' para no filtrar
+            desde (Optional[Fecha]): Fecha de ingreso mínima
+            hasta (Optional[Fecha]): Fecha de ingreso máxima (día incluido)
+            orden (Optional[str]): 'recientes', 'antiguas' o 'relevancia'; por defecto
+                'relevancia' si hay término de búsqueda y 'recientes' si no
+            cursor: Valor 'siguiente' de la página anterior, o None para la primera
+            tamano (Optional[int]): Filas por página; None para traer todas
+            incluir_total (bool): True para contar también el total de coincidencias
+            columnas (Optional[List[str]]): Columnas a devolver; None para todas
+            desplazamiento (int): Filas a saltear desde el cursor (o desde el principio);
+                permite ir a una posición arbitraria, a costo proporcional al salto
+            
+        Returns:
+            Dict: 'reparaciones', 'siguiente' (cursor de la próxima página o None)
+                y 'total' (o None)
+        """
+        if orden is None:
+            orden = 'relevancia' if termino and termino.strip() else 'recientes'
+        
+        consulta = (ConsultaReparaciones(columnas)
+                    .buscar(termino, usar_fts=self.busqueda_fts)
+                    .estado(estado)
+                    .rango_fechas(desde, hasta)
+                    .ordenar(orden))
+        
+        # Se pide una fila de más para saber si existe una página siguiente
+        limite = tamano + 1 if tamano is not None else None
+        sql, parametros = consulta.sql_pagina(cursor, limite, desplazamiento)
+        
+        with self.pool.lector() as conn:
+            filas = conn.execute(sql, parametros).fetchall()
+            
+            total = None
+            if incluir_total and not (termino and termino.strip()) and not desde and not hasta:
+                # Sin búsqueda ni fechas el total sale de los contadores por estado
+                contadores = leer_contadores(conn)
+                if estado and estado != 'todos':
+                    total = contadores.get(estado, 0)
+                else:
+                    total = sum(contadores.values())
+            elif incluir_total:
+                sql_total, parametros_total = consulta.sql_total()
+                total = conn.execute(sql_total, parametros_total).fetchone()[0]
+        
+        hay_mas = tamano is not None and len(filas) > tamano
+        reparaciones = [dict(row) for row in (filas[:tamano] if hay_mas else filas)]
+        
+        siguiente = None
+        if hay_mas:
+            siguiente = consulta.siguiente_cursor(reparaciones[-1], cursor, len(reparaciones),
+                                                  desplazamiento)
+        
+        return {
+            'reparaciones': reparaciones,
+            'siguiente': siguiente,
+            'total': total
+        }
+    
+    def obtener_pagina_reparaciones(self, cursor: Optional[Tuple[str, int]] = None,
+                                    tamano: int = 200, incluir_total: bool = False) -> Dict:
+        """
+        Obtener una página del listado completo, de la más reciente a la más antigua
+        
+        Args:
+            cursor (Optional[Tuple[str, int]]): Valor 'siguiente' de la página anterior,
+                o None para la primera página
+            tamano (int): Cantidad máxima de reparaciones por página
+            incluir_total (bool): True para contar también el total de reparaciones
+            
+        Returns:
+            Dict: Ver consultar_reparaciones
+        """
+        return self.consultar_reparaciones(cursor=cursor, tamano=tamano,
+                                           incluir_total=incluir_total)
+    
+    def buscar_reparaciones(self, termino: str, incluir_archivo: bool = False) -> List[Dict]:
         """
         Buscar reparaciones por término
         
+        Con FTS5 cada palabra se busca como prefijo en número, cliente, celular,
+        producto y descripción; deben coincidir todas y el resultado se ordena
+        por relevancia (bm25). Sin FTS5 se usa la búsqueda por subcadena. Si no
+        hay coincidencias se buscan clientes, celulares y productos parecidos
+        (ver buscar_aproximado).
+        
         Args:
             termino (str): Término de búsqueda
+            incluir_archivo (bool): True para agregar al final las reparaciones
+                archivadas que coinciden (ver buscar_archivo)
             
         Returns:
             List[Dict]: Lista de reparaciones que coinciden
         """
-        termino = f"%{termino}%"
+        reparaciones = self.consultar_reparaciones(termino=termino, tamano=None,
+                                                   columnas=None)['reparaciones']
         
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT * FROM reparaciones 
-                WHERE numero_presupuesto LIKE ? 
-                   OR cliente_nombre LIKE ? 
-                   OR cliente_apellido LIKE ? 
-                   OR cliente_celular LIKE ?
-                   OR producto LIKE ?
-                ORDER BY fecha_ingreso DESC
-            ''', (termino, termino, termino, termino, termino))
+        if incluir_archivo and termino and termino.strip():
+            activas = {reparacion['numero_presupuesto'] for reparacion in reparaciones}
+            reparaciones.extend(
+                reparacion for reparacion in self.buscar_archivo(termino, columnas=None)
+                if reparacion['numero_presupuesto'] not in activas
+            )
+        
+        if reparaciones or not termino or len(termino.strip()) < 3:
+            return reparaciones
+        
+        # Sin coincidencias exactas: probar con los nombres o celulares parecidos
+        ids = []
+        for sugerencia in self.buscar_aproximado(termino, limite=LIMITE_SUGERENCIAS):
+            if sugerencia['puntaje'] >= PUNTAJE_MINIMO_APROXIMADO:
+                ids.extend(sugerencia['ids'])
+        if not ids:
+            return []
+        
+        consulta = ConsultaReparaciones().ids(ids[:MAXIMO_IDS_APROXIMADOS]).ordenar('recientes')
+        sql, parametros = consulta.sql_pagina()
+        with self.pool.lector() as conn:
+            return [dict(row) for row in conn.execute(sql, parametros)]
+    
+    def buscar_por_celular(self, celular: str,
+                           columnas: Optional[List[str]] = COLUMNAS_LISTADO) -> List[Dict]:
+        """
+        Buscar las reparaciones de un celular por el índice del celular normalizado
+        
+        El celular se compara normalizado (ver database.validacion.normalizar_celular):
+        coincide aunque se haya escrito con otros separadores o prefijos.
+        
+        Args:
+            celular (str): Celular en cualquier formato
+            columnas (Optional[List[str]]): Columnas a devolver; None para todas
             
-            reparaciones = []
-            for row in cursor.fetchall():
-                reparacion = dict(row)
-                reparaciones.append(reparacion)
+        Returns:
+            List[Dict]: Reparaciones de ese celular, de la más reciente a la más antigua
+                (vacía si el celular no es válido)
+        """
+        normalizado = normalizar_celular(celular)
+        if normalizado is None:
+            return []
+        
+        sql, parametros = ConsultaReparaciones(columnas).celular(normalizado).sql_pagina()
+        with self.pool.lector() as conn:
+            return [dict(row) for row in conn.execute(sql, parametros)]
+    
+    def obtener_cliente(self, celular: str) -> Optional[Dict]:
+        """
+        Obtener la ficha del cliente de un celular (para completar el alta)
+        
+        Args:
+            celular (str): Celular en cualquier formato
             
-            return reparaciones
+        Returns:
+            Optional[Dict]: 'id', 'nombre', 'apellido', 'celular', fechas y cantidad
+                de 'reparaciones', o None si el celular no es válido o no es de un cliente
+        """
+        normalizado = normalizar_celular(celular)
+        if normalizado is None:
+            return None
+        
+        with self.pool.lector() as conn:
+            return leer_cliente(conn, normalizado)
     
-    def obtener_reparacion(self, numero_presupuesto: str) -> Optional[Dict]:
-        """Obtener una reparación específica"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT * FROM reparaciones WHERE numero_presupuesto = ?",
-                (numero_presupuesto,)
+    def obtener_historial_cliente(self, celular: str, limite: Optional[int] = None,
+                                  columnas: Optional[List[str]] = COLUMNAS_LISTADO) -> Dict:
+        """
+        Obtener un cliente y sus reparaciones por el índice de cliente_id
+        
+        Args:
+            celular (str): Celular del cliente en cualquier formato
+            limite (Optional[int]): Reparaciones máximas (las más recientes); None para todas
+            columnas (Optional[List[str]]): Columnas de las reparaciones; None para todas
+            
+        Returns:
+            Dict: 'cliente' (ver obtener_cliente, o None) y 'reparaciones', de la
+                más reciente a la más antigua
+        """
+        normalizado = normalizar_celular(celular)
+        if normalizado is None:
+            return {'cliente': None, 'reparaciones': []}
+        
+        with self.pool.lector() as conn:
+            cliente = leer_cliente(conn, normalizado)
+            if cliente is None:
+                return {'cliente': None, 'reparaciones': []}
+            
+            sql, parametros = ConsultaReparaciones(columnas).cliente(cliente['id']).sql_pagina(
+                tamano=limite
             )
+            reparaciones = [dict(row) for row in conn.execute(sql, parametros)]
+        
+        return {'cliente': cliente, 'reparaciones': reparaciones}
+    
+    def buscar_aproximado(self, texto: str, limite: int = 10,
+                          campos: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Sugerir clientes, celulares o productos parecidos a un texto (con errores de tipeo)
+        
+        Usa el índice de trigramas en memoria: se construye en la primera llamada
+        y luego sólo se le aplican los cambios registrados desde la anterior,
+        incluidos los de otros procesos.
+        
+        Args:
+            texto (str): Texto parcial o mal escrito ("gonzales", "4567")
+            limite (int): Cantidad máxima de sugerencias
+            campos (Optional[List[str]]): 'cliente', 'celular' y/o 'producto'
             
-            row = cursor.fetchone()
-            if row:
-                return dict(row)
-            return None
+        Returns:
+            List[Dict]: Ver database.trigramas.IndiceTrigramas.buscar
+        """
+        self.preparar_busqueda_aproximada()
+        return self.trigramas.buscar(texto, limite, campos)
+    
+    def preparar_busqueda_aproximada(self):
+        """
+        Construir el índice de trigramas (o ponerlo al día)
+        
+        La primera construcción recorre toda la tabla: conviene llamarlo en
+        segundo plano al iniciar para que la primera búsqueda no la espere.
+        """
+        with self.pool.lector() as conn:
+            self.trigramas.sincronizar(conn)
+    
+    def obtener_reparacion(self, numero_presupuesto: str) -> Optional[Dict]:
+        """
+        Obtener una reparación específica
+        
+        Las últimas reparaciones consultadas se sirven desde una caché LRU que
+        invalidan todas las escrituras del gestor. Si otro proceso modificó la
+        base (PRAGMA data_version cambió) la caché se vacía antes de usarla.
+        """
+        # Si el escritor está ocupado (p. ej. una importación) no se puede
+        # verificar la versión: se lee directamente de la base
+        version = self.pool.version_datos(esperar=False)
+        if version is not None:
+            self.cache.validar_version(version)
+            reparacion = self.cache.obtener(numero_presupuesto)
+            if reparacion is not None:
+                return reparacion
+        
+        generacion = self.cache.generacion
+        with self.pool.lector() as conn:
+            reparacion = self._obtener_reparacion(conn, numero_presupuesto)
+        
+        if reparacion is not None:
+            self.cache.guardar(numero_presupuesto, reparacion, generacion)
+        return reparacion
+    
+    def estadisticas_cache(self) -> Dict:
+        """Informar aciertos, fallos e invalidaciones de la caché de reparaciones"""
+        return self.cache.estadisticas()
+    
+    def _obtener_reparacion(self, conn: sqlite3.Connection, numero_presupuesto: str) -> Optional[Dict]:
+        """Obtener una reparación usando la conexión recibida"""
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT * FROM reparaciones WHERE numero_presupuesto = ?",
+            (numero_presupuesto,)
+        )
+        
+        row = cursor.fetchone()
+        if row:
+            return dict(row)
+        return None
     
     def actualizar_reparacion(self, numero_presupuesto: str, datos: Dict) -> bool:
         """
@@ -237,12 +1061,15 @@ class DatabaseManager:
         Returns:
             bool: True si se actualizó correctamente
         """
-        # Obtener estado actual para el historial
-        reparacion_actual = self.obtener_reparacion(numero_presupuesto)
-        if not reparacion_actual:
-            return False
-        
-        with self.get_connection() as conn:
+        with self.pool.escritor() as conn:
+            # Obtener estado actual para el historial (misma transacción; la caché
+            # sirve si ningún otro proceso escribió desde que se llenó)
+            self.cache.validar_version(conn.execute("PRAGMA data_version").fetchone()[0])
+            reparacion_actual = (self.cache.obtener(numero_presupuesto)
+                                 or self._obtener_reparacion(conn, numero_presupuesto))
+            if not reparacion_actual:
+                return False
+            
             cursor = conn.cursor()
             
             # Construir la consulta de actualización dinámicamente
@@ -255,6 +1082,18 @@ class DatabaseManager:
                     campos.append(f"{campo} = ?")
                     valores.append(valor)
             
+            # Los datos del cliente se guardan también en su ficha
+            if any(campo in datos for campo in ('cliente_nombre', 'cliente_apellido',
+                                                'cliente_celular')):
+                cliente = {campo: datos.get(campo, reparacion_actual[campo])
+                           for campo in ('cliente_nombre', 'cliente_apellido', 'cliente_celular')}
+                celular_normalizado = normalizar_celular(cliente['cliente_celular'])
+                registrar_clientes(conn, [(celular_normalizado, cliente['cliente_nombre'],
+                                           cliente['cliente_apellido'], cliente['cliente_celular'])])
+                campos.append("celular_normalizado = ?")
+                campos.append(f"cliente_id = {SQL_ID_CLIENTE}")
+                valores.extend([celular_normalizado, celular_normalizado])
+            
             if not campos:
                 return False
             
@@ -263,6 +1102,7 @@ class DatabaseManager:
             
             consulta = f"UPDATE reparaciones SET {', '.join(campos)} WHERE numero_presupuesto = ?"
             cursor.execute(consulta, valores)
+            actualizadas = cursor.rowcount
             
             # Si cambió el estado, registrar en historial
             if 'estado' in datos and datos['estado'] != reparacion_actual['estado']:
@@ -283,38 +1123,414 @@ class DatabaseManager:
                     (numero_presupuesto,)
                 )
             
-            conn.commit()
-            logger.info(f"Reparación actualizada: {numero_presupuesto}")
-            return cursor.rowcount > 0
+        # Después del commit: una lectura anterior no puede volver a guardar la versión vieja
+        self.cache.invalidar([numero_presupuesto])
+        
+        logger.info(f"Reparación actualizada: {numero_presupuesto}")
+        return actualizadas > 0
+    
+    def obtener_historial_estados(self, numero_presupuesto: str) -> List[Dict]:
+        """
+        Obtener la línea de tiempo de cambios de estado de una reparación
+        
+        Args:
+            numero_presupuesto (str): Número de presupuesto
+            
+        Returns:
+            List[Dict]: Cambios del más antiguo al más nuevo (ver
+                database.historial.leer_historiales); vacía si no existe
+        """
+        return self.obtener_historiales_estados([numero_presupuesto]).get(numero_presupuesto, [])
+    
+    def obtener_historiales_estados(self, numeros: Iterable[str]) -> Dict[str, List[Dict]]:
+        """
+        Obtener el historial de estados de muchas reparaciones en una sola consulta
+        
+        Args:
+            numeros (Iterable[str]): Números de presupuesto
+            
+        Returns:
+            Dict[str, List[Dict]]: Historial de cada número que existe
+        """
+        with self.pool.lector() as conn:
+            return leer_historiales(conn, list(numeros))
+    
+    def _adjuntar_archivo(self, conn: sqlite3.Connection, solo_lectura: bool) -> bool:
+        """Adjuntar el archivo a una conexión del pool (False si no hay archivo)"""
+        if self.ruta_archivo is None:
+            return False
+        return adjuntar_archivo(conn, self.ruta_archivo, solo_lectura)
+    
+    def archivar_reparaciones(self, dias: Optional[int] = None,
+                              progreso: Optional[Progreso] = None,
+                              cancelar: Optional[threading.Event] = None,
+                              tamano_lote: int = TAMANO_LOTE_ARCHIVADO) -> Dict:
+        """
+        Mover al archivo las reparaciones retiradas hace más de cierta cantidad de días
+        
+        Cada lote se copia al archivo y se borra de la base principal en dos
+        transacciones cortas, así el escritor no queda tomado durante todo el
+        proceso. El listado, los contadores y la búsqueda quedan sólo con las
+        reparaciones activas; las archivadas se buscan con buscar_archivo y
+        vuelven con restaurar_reparaciones.
+        
+        Args:
+            dias (Optional[int]): Días desde el retiro; None toma DB_ARCHIVO_DIAS
+                del entorno o ANTIGUEDAD_POR_DEFECTO_DIAS
+            progreso (Optional[Progreso]): Función que recibe (archivadas, total)
+            cancelar (Optional[threading.Event]): Evento que detiene el proceso
+                entre un lote y otro
+            tamano_lote (int): Reparaciones por transacción
+            
+        Returns:
+            Dict: 'archivadas', 'historial' (filas movidas), 'total', 'dias', 'corte',
+                'cancelado' y 'duracion'
+        """
+        if self.ruta_archivo is None:
+            raise ValueError("Una base en memoria no puede tener archivo")
+        
+        if dias is None:
+            dias = antiguedad_desde_entorno()
+        if dias is None:
+            dias = ANTIGUEDAD_POR_DEFECTO_DIAS
+        
+        inicio = time.perf_counter()
+        
+        # ATTACH no se puede ejecutar dentro de una transacción
+        with self.pool.escritor(transaccion=False) as conn:
+            self._adjuntar_archivo(conn, solo_lectura=False)
+        
+        with self.pool.escritor() as conn:
+            preparar_archivo(conn)
+            corte = fecha_corte(conn, dias)
+            total = contar_archivables(conn, corte)
+        
+        if progreso:
+            progreso(0, total)
+        
+        archivadas = historial = ultimo = 0
+        cancelado = False
+        while True:
+            if cancelar is not None and cancelar.is_set():
+                cancelado = True
+                break
+            
+            with self.pool.escritor() as conn:
+                lote = seleccionar_lote(conn, corte, ultimo, tamano_lote)
+                ids = [id_reparacion for id_reparacion, _ in lote]
+                if ids:
+                    copiar_al_archivo(conn, ids)
+            if not ids:
+                break
+            
+            with self.pool.escritor() as conn:
+                numeros, movidas = quitar_de_principal(conn, ids)
+            
+            self.cache.invalidar(numeros)
+            ultimo = ids[-1]
+            archivadas += len(numeros)
+            historial += movidas
+            if progreso:
+                progreso(archivadas, total)
+        
+        duracion = time.perf_counter() - inicio
+        logger.info(f"Archivadas {archivadas} reparaciones retiradas antes de {corte} "
+                    f"({historial} cambios de estado) en {duracion:.1f} s"
+                    + (" (cancelado)" if cancelado else ""))
+        
+        return {
+            'archivadas': archivadas,
+            'historial': historial,
+            'total': total,
+            'dias': dias,
+            'corte': corte,
+            'cancelado': cancelado,
+            'duracion': duracion
+        }
+    
+    def restaurar_reparaciones(self, numeros: Iterable[str]) -> int:
+        """
+        Devolver reparaciones archivadas (con su historial) a la base principal
+        
+        Vuelven con el mismo id y las mismas fechas, como altas en el registro
+        de cambios: el listado y la búsqueda aproximada las muestran otra vez.
+        
+        Args:
+            numeros (Iterable[str]): Números de presupuesto archivados
+            
+        Returns:
+            int: Reparaciones restauradas
+        """
+        numeros = list(dict.fromkeys(numeros))
+        if self.ruta_archivo is None or not numeros:
+            return 0
+        
+        with self.pool.escritor(transaccion=False) as conn:
+            if not os.path.exists(self.ruta_archivo):
+                return 0
+            self._adjuntar_archivo(conn, solo_lectura=False)
+        
+        restauradas = 0
+        for inicio in range(0, len(numeros), TAMANO_LOTE_ARCHIVADO):
+            lote = numeros[inicio:inicio + TAMANO_LOTE_ARCHIVADO]
+            with self.pool.escritor() as conn:
+                preparar_archivo(conn)
+                ids = ids_archivados(conn, lote)
+                if not ids:
+                    continue
+                restauradas += copiar_a_principal(conn, ids)
+            
+            with self.pool.escritor() as conn:
+                quitar_del_archivo(conn, ids)
+        
+        self.cache.invalidar(numeros)
+        logger.info(f"Restauradas {restauradas} reparaciones del archivo")
+        return restauradas
+    
+    def buscar_archivo(self, termino: Optional[str] = None, limite: Optional[int] = None,
+                       columnas: Optional[List[str]] = COLUMNAS_LISTADO) -> List[Dict]:
+        """
+        Buscar reparaciones archivadas
+        
+        Args:
+            termino (Optional[str]): Texto libre o celular; vacío para todas
+            limite (Optional[int]): Cantidad máxima; None para todas
+            columnas (Optional[List[str]]): Columnas a devolver; None para todas
+            
+        Returns:
+            List[Dict]: Reparaciones archivadas (con 'archivada' en True), de la
+                más reciente a la más antigua; vacía si todavía no hay archivo
+        """
+        with self.pool.lector() as conn:
+            if not self._adjuntar_archivo(conn, solo_lectura=True):
+                return []
+            try:
+                return buscar_en_archivo(conn, termino, columnas, limite)
+            except sqlite3.OperationalError as e:
+                # Archivo creado pero todavía sin tablas
+                if 'no such table' not in str(e):
+                    raise
+                return []
+    
+    def obtener_estadisticas_archivo(self) -> Optional[Dict]:
+        """
+        Informar cuántas reparaciones y cambios de estado guarda el archivo
+        
+        Returns:
+            Optional[Dict]: Ver database.archivado.estadisticas_archivo, o None
+                si todavía no hay archivo
+        """
+        with self.pool.lector() as conn:
+            if not self._adjuntar_archivo(conn, solo_lectura=True):
+                return None
+            try:
+                return estadisticas_archivo(conn, self.ruta_archivo)
+            except sqlite3.OperationalError as e:
+                if 'no such table' not in str(e):
+                    raise
+                return None
     
     def eliminar_reparacion(self, numero_presupuesto: str) -> bool:
         """Eliminar una reparación (soft delete - cambiar estado)"""
         return self.actualizar_reparacion(numero_presupuesto, {'estado': 'eliminado'})
     
     def obtener_estadisticas(self) -> Dict:
-        """Obtener estadísticas básicas"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        """
+        Obtener la cantidad de reparaciones por estado y el total
+        
+        Lee los contadores que mantienen los triggers: no recorre la tabla.
+        """
+        with self.pool.lector() as conn:
+            estadisticas = leer_contadores(conn)
+        
+        estadisticas['total'] = sum(estadisticas.values())
+        return estadisticas
+    
+    def contar_reparaciones(self, estado: Optional[str] = None) -> int:
+        """
+        Contar reparaciones, todas o las de un estado, sin recorrer la tabla
+        
+        Args:
+            estado (Optional[str]): Estado a contar; None o 'todos' para el total
+        """
+        estadisticas = self.obtener_estadisticas()
+        if estado and estado != 'todos':
+            return estadisticas.get(estado, 0)
+        return estadisticas['total']
+    
+    def verificar_contadores(self, corregir: bool = False) -> Dict:
+        """
+        Comparar los contadores por estado con un conteo completo de la tabla
+        
+        Args:
+            corregir (bool): True para reemplazar los contadores por el conteo real
             
-            # Contar por estado
-            cursor.execute('''
-                SELECT estado, COUNT(*) as cantidad 
-                FROM reparaciones 
-                WHERE estado != 'eliminado'
-                GROUP BY estado
-            ''')
+        Returns:
+            Dict: 'consistente', 'contadores', 'real' y 'diferencias'
+                ({estado: contador - real} de los estados que no coinciden)
+        """
+        # Con el escritor el conteo y la corrección ven el mismo estado de la tabla
+        with self.pool.escritor() as conn:
+            contadores = leer_contadores(conn)
+            real = contar_desde_tabla(conn)
             
-            estadisticas = {
-                'pendiente': 0,
-                'en_proceso': 0,
-                'finalizado': 0,
-                'retirado': 0,
-                'total': 0
+            diferencias = {
+                estado: contadores[estado] - real[estado]
+                for estado in real
+                if contadores[estado] != real[estado]
             }
             
-            for row in cursor.fetchall():
-                estado, cantidad = row
-                estadisticas[estado] = cantidad
-                estadisticas['total'] += cantidad
+            if diferencias and corregir:
+                recalcular_contadores(conn)
+        
+        if diferencias:
+            logger.warning(f"Contadores por estado desfasados: {diferencias}"
+                           + (" (corregidos)" if corregir else ""))
+        
+        return {
+            'consistente': not diferencias,
+            'contadores': contadores,
+            'real': real,
+            'diferencias': diferencias
+        }
+    
+    def actualizar_resumenes(self, completo: bool = False) -> int:
+        """
+        Incorporar a los resúmenes diarios las reparaciones modificadas desde la
+        última actualización
+        
+        Args:
+            completo (bool): True para recalcular los resúmenes desde cero
+            
+        Returns:
+            int: Reparaciones procesadas
+        """
+        with self.pool.escritor() as conn:
+            return actualizar_resumenes(conn, completo)
+    
+    def obtener_resumen_periodos(self, desde: Optional[Fecha] = None,
+                                 hasta: Optional[Fecha] = None,
+                                 agrupar: str = 'dia') -> List[Dict]:
+        """
+        Obtener ingresos, retiros, facturación y tiempo promedio de reparación
+        por día, semana o mes
+        
+        La facturación de un período es el costo de las reparaciones retiradas en
+        él. Los datos salen de los resúmenes diarios, no de la tabla de reparaciones.
+        
+        Args:
+            desde (Optional[Fecha]): Primer día incluido
+            hasta (Optional[Fecha]): Último día incluido
+            agrupar (str): 'dia', 'semana' o 'mes'
+            
+        Returns:
+            List[Dict]: Ver database.resumenes.resumen_por_periodo
+        """
+        self.actualizar_resumenes()
+        with self.pool.lector() as conn:
+            return resumen_por_periodo(conn, desde, hasta, agrupar)
+    
+    def obtener_resumen_productos(self, desde: Optional[Fecha] = None,
+                                  hasta: Optional[Fecha] = None,
+                                  limite: Optional[int] = None) -> List[Dict]:
+        """
+        Obtener ingresos, retiros, facturación y tiempo promedio por producto
+        
+        Args:
+            desde (Optional[Fecha]): Primer día incluido
+            hasta (Optional[Fecha]): Último día incluido
+            limite (Optional[int]): Cantidad máxima de productos
+            
+        Returns:
+            List[Dict]: Ver database.resumenes.resumen_por_producto
+        """
+        self.actualizar_resumenes()
+        with self.pool.lector() as conn:
+            return resumen_por_producto(conn, desde, hasta, limite)
+    
+    def version_datos(self) -> Optional[int]:
+        """
+        Obtener PRAGMA data_version sin esperar al escritor
+        
+        Cambia cuando otro proceso modifica la base: sirve para decidir, con una
+        consulta trivial, si hace falta pedir cambios_desde().
+        
+        Returns:
+            Optional[int]: Versión, o None si el escritor estaba ocupado
+        """
+        return self.pool.version_datos(esperar=False)
+    
+    def interrumpir_consulta(self, hilo: int) -> bool:
+        """
+        Cancelar la lectura que esté ejecutando otro hilo (p. ej. una búsqueda vieja)
+        
+        Puede llamarse desde cualquier hilo. La consulta interrumpida lanza
+        sqlite3.OperationalError en el hilo que la ejecutaba.
+        
+        Args:
+            hilo (int): Identificador del hilo que ejecuta la consulta
+            
+        Returns:
+            bool: True si el hilo tenía una conexión de lectura abierta
+        """
+        return self.pool.interrumpir_lector(hilo)
+    
+    def version_cambios(self) -> int:
+        """Obtener la última versión del registro de cambios"""
+        with self.pool.lector() as conn:
+            return version_actual(conn)
+    
+    def cambios_desde(self, version: int, termino: Optional[str] = None,
+                      estado: Optional[str] = None, desde: Optional[Fecha] = None,
+                      hasta: Optional[Fecha] = None, limite: int = 1000,
+                      columnas: Optional[List[str]] = COLUMNAS_LISTADO) -> Dict:
+        """
+        Obtener las reparaciones que cambiaron después de una versión
+        
+        El costo depende de la cantidad de cambios, no del tamaño de la tabla.
+        Los filtros son los de consultar_reparaciones: las reparaciones que
+        cambiaron y ya no los cumplen se informan en 'quitar'.
+        
+        Args:
+            version (int): Última versión aplicada (de version_cambios o de la
+                respuesta anterior)
+            termino, estado, desde, hasta: Filtros del listado
+            limite (int): Cambios máximos; si hay más conviene recargar todo
+            columnas (Optional[List[str]]): Columnas a devolver
             
-            return estadisticas
\ No newline at end of file
+        Returns:
+            Dict: 'version' (a usar en la próxima llamada), 'completo' (True si hay
+                que recargar todo el listado), 'reparaciones' (filas que cambiaron y
+                cumplen los filtros), 'quitar' (números a sacar del listado) y
+                'altas' (cantidad de reparaciones nuevas)
+        """
+        with self.pool.lector() as conn:
+            cambios = leer_cambios(conn, version, limite)
+            
+            if cambios is None:
+                return {'version': version_actual(conn), 'completo': True,
+                        'reparaciones': [], 'quitar': [], 'altas': 0}
+            
+            numeros = cambios['altas'] + cambios['modificaciones']
+            reparaciones = []
+            
+            # Por tandas para no superar el límite de parámetros de SQLite
+            for inicio in range(0, len(numeros), 500):
+                consulta = (ConsultaReparaciones(columnas)
+                            .numeros(numeros[inicio:inicio + 500])
+                            .buscar(termino, usar_fts=self.busqueda_fts)
+                            .estado(estado)
+                            .rango_fechas(desde, hasta))
+                sql, parametros = consulta.sql_pagina()
+                reparaciones.extend(dict(row) for row in conn.execute(sql, parametros))
+        
+        encontrados = {reparacion['numero_presupuesto'] for reparacion in reparaciones}
+        quitar = cambios['bajas'] + [numero for numero in numeros if numero not in encontrados]
+        
+        return {
+            'version': cambios['version'],
+            'completo': False,
+            'reparaciones': reparaciones,
+            'quitar': quitar,
+            'altas': len(cambios['altas'])
+        }
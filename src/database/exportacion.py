@@ -0,0 +1,141 @@
+"""
+Exportación de reparaciones a CSV para InstaFix
+Recorre la tabla por lotes con un cursor, así el uso de memoria no depende
+de la cantidad de reparaciones, y admite compresión gzip y cancelación
+"""
+
+import os
+import csv
+import gzip
+import time
+import sqlite3
+import logging
+import threading
+from typing import Callable, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Columnas del CSV (las mismas que exportaba la versión anterior)
+COLUMNAS_EXPORTACION = [
+    'numero_presupuesto', 'cliente_nombre', 'cliente_apellido',
+    'cliente_celular', 'producto', 'descripcion', 'costo_reparacion',
+    'estado', 'fecha_ingreso', 'fecha_actualizacion', 'fecha_retiro'
+]
+
+# Filas leídas de la base por cada fetchmany
+TAMANO_LOTE_EXPORTACION = 2000
+
+# Recibe (filas escritas, total de filas)
+Progreso = Callable[[int, int], None]
+
+
+def es_archivo_comprimido(archivo: str) -> bool:
+    """Indicar si el nombre de archivo pide compresión gzip"""
+    return archivo.lower().endswith('.gz')
+
+
+def _abrir_destino(archivo: str, comprimir: bool):
+    """Abrir el archivo de salida en modo texto, comprimido o no"""
+    if comprimir:
+        return gzip.open(archivo, 'wt', newline='', encoding='utf-8', compresslevel=6)
+    return open(archivo, 'w', newline='', encoding='utf-8')
+
+
+def exportar_csv(conn: sqlite3.Connection, archivo: str, comprimir: Optional[bool] = None,
+                 progreso: Optional[Progreso] = None,
+                 cancelar: Optional[threading.Event] = None,
+                 tamano_lote: int = TAMANO_LOTE_EXPORTACION,
+                 tablas: Sequence[str] = ('reparaciones',)) -> Dict:
+    """
+    Exportar todas las reparaciones a un archivo CSV
+
+    Se escribe primero en un archivo temporal junto al destino y se renombra al
+    terminar: una exportación cancelada o fallida no deja un CSV a medias. Las
+    tablas se recorren una después de otra, cada una de la más reciente a la
+    más antigua (así se sigue leyendo por el índice, sin ordenar todo junto).
+
+    Args:
+        conn (sqlite3.Connection): Conexión de lectura (no se comparte con otros hilos)
+        archivo (str): Ruta del archivo de destino
+        comprimir (Optional[bool]): True para gzip; None decide por la extensión .gz
+        progreso (Optional[Progreso]): Función llamada después de cada lote
+        cancelar (Optional[threading.Event]): Evento que detiene la exportación
+        tamano_lote (int): Filas leídas por lote
+        tablas (Sequence[str]): Tablas a exportar, en orden (p. ej. la principal
+            y 'archivo.reparaciones' con el archivo adjunto)
+
+    Returns:
+        Dict: 'archivo', 'tablas', 'filas', 'total', 'cancelado', 'comprimido',
+            'bytes' y 'duracion'
+    """
+    if comprimir is None:
+        comprimir = es_archivo_comprimido(archivo)
+
+    inicio = time.perf_counter()
+    temporal = f"{archivo}.parcial"
+    filas = 0
+    cancelado = False
+
+    total = sum(conn.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0] for tabla in tablas)
+    if progreso:
+        progreso(0, total)
+
+    try:
+        with _abrir_destino(temporal, comprimir) as destino:
+            writer = csv.writer(destino)
+            writer.writerow(COLUMNAS_EXPORTACION)
+
+            for tabla in tablas:
+                cursor = conn.execute(
+                    f"SELECT {', '.join(COLUMNAS_EXPORTACION)} FROM {tabla} "
+                    f"ORDER BY fecha_ingreso DESC, id DESC"
+                )
+                try:
+                    while True:
+                        if cancelar is not None and cancelar.is_set():
+                            cancelado = True
+                            break
+
+                        lote = cursor.fetchmany(tamano_lote)
+                        if not lote:
+                            break
+
+                        writer.writerows(tuple(fila) for fila in lote)
+                        filas += len(lote)
+
+                        if progreso:
+                            progreso(filas, total)
+                finally:
+                    cursor.close()
+
+                if cancelado:
+                    break
+    except BaseException:
+        _eliminar(temporal)
+        raise
+
+    if cancelado:
+        _eliminar(temporal)
+        logger.info(f"Exportación cancelada después de {filas} filas")
+    else:
+        os.replace(temporal, archivo)
+        logger.info(f"Exportadas {filas} reparaciones a {archivo}")
+
+    return {
+        'archivo': archivo,
+        'tablas': list(tablas),
+        'filas': filas,
+        'total': total,
+        'cancelado': cancelado,
+        'comprimido': comprimir,
+        'bytes': 0 if cancelado else os.path.getsize(archivo),
+        'duracion': time.perf_counter() - inicio
+    }
+
+
+def _eliminar(archivo: str):
+    """Borrar un archivo temporal sin fallar si no existe"""
+    try:
+        os.remove(archivo)
+    except OSError:
+        pass
@@ -0,0 +1,52 @@
+"""
+Historial de estados de InstaFix
+Línea de tiempo de los cambios de estado de una o varias reparaciones,
+leída por el índice idx_historial_reparacion (reparacion_id, fecha_cambio)
+"""
+
+import sqlite3
+import logging
+from typing import Dict, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Números por consulta IN (...), por el límite de parámetros de SQLite
+TAMANO_LOTE_HISTORIAL = 500
+
+
+def leer_historiales(conn: sqlite3.Connection, numeros: Sequence[str]) -> Dict[str, List[Dict]]:
+    """
+    Obtener el historial de varias reparaciones con una consulta por lote
+
+    Cada reparación se resuelve por el índice único de numero_presupuesto y sus
+    cambios por el índice del historial, ya en orden cronológico: el costo
+    depende de los cambios leídos y no del tamaño de historial_estados.
+
+    Args:
+        conn (sqlite3.Connection): Conexión de lectura
+        numeros (Sequence[str]): Números de presupuesto
+
+    Returns:
+        Dict[str, List[Dict]]: Cambios de cada número ('id', 'estado_anterior',
+            'estado_nuevo', 'fecha_cambio', 'notas'), del más antiguo al más nuevo;
+            un número inexistente no aparece
+    """
+    historiales: Dict[str, List[Dict]] = {}
+    numeros = list(dict.fromkeys(numeros))
+
+    for inicio in range(0, len(numeros), TAMANO_LOTE_HISTORIAL):
+        lote = numeros[inicio:inicio + TAMANO_LOTE_HISTORIAL]
+        filas = conn.execute(f'''
+            SELECT r.numero_presupuesto, h.id, h.estado_anterior, h.estado_nuevo,
+                   h.fecha_cambio, h.notas
+            FROM reparaciones r
+            JOIN historial_estados h ON h.reparacion_id = r.id
+            WHERE r.numero_presupuesto IN ({', '.join('?' * len(lote))})
+            ORDER BY h.reparacion_id, h.fecha_cambio, h.id
+        ''', lote)
+
+        for fila in filas:
+            cambio = dict(fila)
+            historiales.setdefault(cambio.pop('numero_presupuesto'), []).append(cambio)
+
+    return historiales
@@ -0,0 +1,204 @@
+"""
+Importación de reparaciones desde CSV para InstaFix
+Lectura del archivo fila a fila y detección de duplicados contra la base,
+para cargar planillas grandes sin tenerlas completas en memoria
+"""
+
+import re
+import csv
+import gzip
+import hashlib
+import sqlite3
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Sequence, TextIO, Tuple
+
+from .validacion import CAMPOS_OBLIGATORIOS
+
+logger = logging.getLogger(__name__)
+
+# Filas que se validan e insertan juntas
+TAMANO_LOTE_IMPORTACION = 5000
+
+# Errores que se guardan con detalle en el resumen (el resto sólo se cuenta)
+MAXIMO_ERRORES_DETALLE = 100
+
+# Números con el formato de InstaFix; los demás se guardan tal cual
+PATRON_NUMERO_PRESUPUESTO = re.compile(r'^INF-(\d+)$')
+
+TABLA_CLAVES = 'temp.importacion_claves'
+
+
+class ImportacionCancelada(Exception):
+    """Se pidió cancelar la importación; la transacción se revierte"""
+
+
+@contextmanager
+def abrir_csv(archivo: str) -> Iterator[TextIO]:
+    """
+    Abrir un CSV (o .csv.gz) para lectura
+
+    utf-8-sig descarta la marca BOM que agrega Excel al guardar en UTF-8.
+    """
+    if archivo.lower().endswith('.gz'):
+        origen = gzip.open(archivo, 'rt', newline='', encoding='utf-8-sig')
+    else:
+        origen = open(archivo, 'r', newline='', encoding='utf-8-sig')
+
+    with origen:
+        yield origen
+
+
+def _detectar_dialecto(origen: TextIO):
+    """Detectar el separador (las planillas en español suelen usar ';')"""
+    muestra = origen.read(64 * 1024)
+    origen.seek(0)
+
+    try:
+        return csv.Sniffer().sniff(muestra, delimiters=',;\t')
+    except csv.Error:
+        return csv.excel
+
+
+def leer_filas(origen: TextIO) -> Iterator[Tuple[int, Dict]]:
+    """
+    Recorrer las filas de un CSV con encabezado
+
+    Args:
+        origen (TextIO): Archivo abierto con abrir_csv()
+
+    Yields:
+        Tuple[int, Dict]: Número de línea en el archivo y datos de la fila, con
+            los nombres de columna en minúsculas
+
+    Raises:
+        ValueError: Si el archivo no tiene las columnas obligatorias
+    """
+    lector = csv.reader(origen, _detectar_dialecto(origen))
+
+    encabezado = next(lector, None)
+    if not encabezado:
+        raise ValueError("El archivo está vacío")
+
+    columnas = [columna.strip().lower() for columna in encabezado]
+    faltantes = [campo for campo, _ in CAMPOS_OBLIGATORIOS if campo not in columnas]
+    if faltantes:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(faltantes)}")
+
+    for valores in lector:
+        if not any(valor.strip() for valor in valores):
+            continue
+        yield lector.line_num, dict(zip(columnas, valores))
+
+
+def numero_secuencia(numero: str) -> Optional[int]:
+    """Obtener el número correlativo de un presupuesto 'INF-000123' (o None)"""
+    coincidencia = PATRON_NUMERO_PRESUPUESTO.match(numero)
+    return int(coincidencia.group(1)) if coincidencia else None
+
+
+def clave_duplicado(celular: str, producto: str, fecha: str) -> int:
+    """
+    Calcular la clave celular + producto + día de ingreso
+
+    Se guarda un hash de 64 bits en lugar del texto para que la tabla de claves
+    ocupe poco aun con millones de reparaciones.
+    """
+    digitos = re.sub(r'\D', '', celular or '')
+    texto = f"{digitos}|{(producto or '').strip().casefold()}|{(fecha or '')[:10]}"
+    resumen = hashlib.blake2b(texto.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(resumen, 'big', signed=True)
+
+
+class DetectorDuplicados:
+    """
+    Detecta reparaciones repetidas por número de presupuesto o por
+    celular + producto + fecha de ingreso, contra la base y contra el mismo archivo
+
+    Trabaja dentro de la transacción de la importación: las filas ya insertadas
+    cuentan como existentes y la tabla temporal desaparece con un rollback.
+    Con el archivo de reparaciones adjunto se revisa también contra las
+    archivadas, así una exportación vieja no las vuelve a cargar como nuevas.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, fecha_por_defecto: str,
+                 archivadas: Optional[str] = None):
+        """
+        Preparar la tabla temporal con las claves de las reparaciones existentes
+
+        Args:
+            conn (sqlite3.Connection): Escritor con la transacción de importación abierta
+            fecha_por_defecto (str): Fecha que recibirán las filas sin fecha de ingreso
+            archivadas (Optional[str]): Tabla de las reparaciones archivadas
+                (p. ej. 'archivo.reparaciones'); None si no hay archivo
+        """
+        self.conn = conn
+        self.fecha_por_defecto = fecha_por_defecto
+        self.archivadas = archivadas
+
+        # Números del lote actual, que todavía no están en la tabla
+        self._numeros_lote = set()
+
+        conn.execute(f"DROP TABLE IF EXISTS {TABLA_CLAVES}")
+        conn.execute(f"CREATE TABLE {TABLA_CLAVES} (clave INTEGER PRIMARY KEY)")
+
+        for tabla in ['reparaciones'] + ([archivadas] if archivadas else []):
+            cursor = conn.execute(
+                f"SELECT cliente_celular, producto, fecha_ingreso FROM {tabla}"
+            )
+            while True:
+                filas = cursor.fetchmany(TAMANO_LOTE_IMPORTACION)
+                if not filas:
+                    break
+                conn.executemany(
+                    f"INSERT OR IGNORE INTO {TABLA_CLAVES} (clave) VALUES (?)",
+                    [(clave_duplicado(*fila),) for fila in filas]
+                )
+
+    def motivo(self, numero: Optional[str], datos: Dict) -> Optional[str]:
+        """
+        Verificar una fila y registrarla si no es duplicada
+
+        Args:
+            numero (Optional[str]): Número de presupuesto informado en el archivo
+            datos (Dict): Datos normalizados de la fila
+
+        Returns:
+            Optional[str]: Motivo si la fila está duplicada, None si es nueva
+        """
+        if numero is not None:
+            if numero in self._numeros_lote:
+                return f"Número de presupuesto repetido: {numero}"
+
+            existe = self.conn.execute(
+                "SELECT 1 FROM reparaciones WHERE numero_presupuesto = ?", (numero,)
+            ).fetchone()
+            if existe:
+                return f"Número de presupuesto repetido: {numero}"
+
+            if self.archivadas:
+                archivada = self.conn.execute(
+                    f"SELECT 1 FROM {self.archivadas} WHERE numero_presupuesto = ?", (numero,)
+                ).fetchone()
+                if archivada:
+                    return f"Número de presupuesto archivado: {numero} (restaurarlo desde el archivo)"
+
+        clave = clave_duplicado(datos['cliente_celular'], datos['producto'],
+                                datos['fecha_ingreso'] or self.fecha_por_defecto)
+        cursor = self.conn.execute(
+            f"INSERT OR IGNORE INTO {TABLA_CLAVES} (clave) VALUES (?)", (clave,)
+        )
+        if cursor.rowcount == 0:
+            return "Misma reparación (celular, producto y fecha) ya cargada"
+
+        if numero is not None:
+            self._numeros_lote.add(numero)
+        return None
+
+    def lote_guardado(self):
+        """Avisar que el lote actual ya se insertó en la tabla reparaciones"""
+        self._numeros_lote.clear()
+
+    def cerrar(self):
+        """Eliminar la tabla temporal"""
+        self.conn.execute(f"DROP TABLE IF EXISTS {TABLA_CLAVES}")
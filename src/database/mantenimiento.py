@@ -0,0 +1,257 @@
+"""
+Mantenimiento de la base de datos de InstaFix
+Estadísticas del planificador (ANALYZE / PRAGMA optimize), vacuum incremental,
+checkpoints del WAL e informe del espacio por tabla e índice (dbstat)
+"""
+
+import time
+import sqlite3
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .archivado import ESQUEMA_ARCHIVO, ruta_archivo, adjuntar_archivo
+
+logger = logging.getLogger(__name__)
+
+# Clave de la tabla configuracion con la fecha del último mantenimiento
+CLAVE_ULTIMO_MANTENIMIENTO = 'ultimo_mantenimiento'
+
+# Filas que lee PRAGMA optimize por índice en el mantenimiento liviano
+LIMITE_ANALISIS = 400
+
+# Páginas libres que devuelve al sistema cada vacuum incremental liviano
+PAGINAS_VACUUM_INCREMENTAL = 2000
+
+# Hasta este tamaño (en páginas) pasar a auto_vacuum incremental con VACUUM es instantáneo
+PAGINAS_CONVERSION_AUTOMATICA = 1024
+
+# auto_vacuum: valor de PRAGMA -> nombre
+MODOS_AUTO_VACUUM = {0: 'none', 1: 'full', 2: 'incremental'}
+
+
+def _medir(pasos: List[Dict], nombre: str, funcion: Callable[[], Optional[Dict]]):
+    """Ejecutar un paso del mantenimiento y registrar su duración y su detalle"""
+    inicio = time.perf_counter()
+    detalle = funcion() or {}
+    duracion = time.perf_counter() - inicio
+    pasos.append({'paso': nombre, 'duracion': duracion, **detalle})
+    logger.debug(f"Mantenimiento: {nombre} en {duracion * 1000:.0f} ms {detalle}")
+
+
+def estado_espacio(conn: sqlite3.Connection, esquema: str = 'main') -> Dict:
+    """
+    Páginas de una base y cuántas están libres
+
+    Returns:
+        Dict: 'auto_vacuum', 'tamano_pagina', 'paginas', 'libres' y 'bytes'
+    """
+    tamano = conn.execute(f"PRAGMA {esquema}.page_size").fetchone()[0]
+    paginas = conn.execute(f"PRAGMA {esquema}.page_count").fetchone()[0]
+    return {
+        'auto_vacuum': MODOS_AUTO_VACUUM.get(
+            conn.execute(f"PRAGMA {esquema}.auto_vacuum").fetchone()[0], 'none'),
+        'tamano_pagina': tamano,
+        'paginas': paginas,
+        'libres': conn.execute(f"PRAGMA {esquema}.freelist_count").fetchone()[0],
+        'bytes': tamano * paginas
+    }
+
+
+def activar_vacuum_incremental(conn: sqlite3.Connection, forzar: bool = False) -> bool:
+    """
+    Pasar la base a auto_vacuum incremental (fuera de una transacción)
+
+    El cambio necesita un VACUUM completo, que reescribe toda la base y
+    bloquea a los demás mientras dura. Sin forzar sólo se hace en bases chicas
+    (recién creadas); las grandes se convierten con el mantenimiento completo
+    del script de limpieza.
+
+    Returns:
+        bool: True si la base quedó con auto_vacuum incremental
+    """
+    espacio = estado_espacio(conn)
+    if espacio['auto_vacuum'] == 'incremental':
+        return True
+    if not forzar and espacio['paginas'] > PAGINAS_CONVERSION_AUTOMATICA:
+        return False
+
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    logger.info(f"Base convertida a auto_vacuum incremental ({espacio['paginas']} páginas)")
+    return True
+
+
+def vacuum_incremental(conn: sqlite3.Connection, paginas: Optional[int] = None) -> Dict:
+    """
+    Devolver al sistema páginas libres (sólo con auto_vacuum incremental)
+
+    Args:
+        paginas (Optional[int]): Páginas a liberar como máximo; None para todas
+
+    Returns:
+        Dict: 'liberadas' y 'libres' (las que quedan)
+    """
+    antes = estado_espacio(conn)
+    if antes['auto_vacuum'] != 'incremental' or not antes['libres']:
+        return {'liberadas': 0, 'libres': antes['libres']}
+
+    # El PRAGMA libera una página por cada paso y execute() da un solo paso
+    # (no devuelve columnas); executescript lo ejecuta hasta el final
+    conn.executescript(f"PRAGMA incremental_vacuum({int(paginas or 0)});")
+    libres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return {'liberadas': antes['libres'] - libres, 'libres': libres}
+
+
+def informe_espacio(conn: sqlite3.Connection, esquema: str = 'main') -> Optional[List[Dict]]:
+    """
+    Espacio que ocupa cada tabla e índice, de mayor a menor (tabla virtual dbstat)
+
+    Returns:
+        Optional[List[Dict]]: 'nombre', 'tipo' ('table' o 'index'), 'tabla',
+            'paginas', 'bytes', 'sin_usar' (bytes libres dentro de sus páginas)
+            y 'filas' (celdas de las hojas); None si SQLite no incluye dbstat
+    """
+    try:
+        filas = conn.execute(f'''
+            SELECT s.name AS nombre,
+                   COALESCE(m.type, 'table') AS tipo,
+                   COALESCE(m.tbl_name, s.name) AS tabla,
+                   COUNT(*) AS paginas,
+                   SUM(s.pgsize) AS bytes,
+                   SUM(s.unused) AS sin_usar,
+                   SUM(CASE WHEN s.pagetype = 'leaf' THEN s.ncell ELSE 0 END) AS filas
+            FROM dbstat(?) s
+            LEFT JOIN {esquema}.sqlite_master m ON m.name = s.name
+            GROUP BY s.name
+            ORDER BY bytes DESC, s.name
+        ''', (esquema,)).fetchall()
+    except sqlite3.OperationalError as e:
+        if 'dbstat' not in str(e):
+            raise
+        logger.warning("Esta versión de SQLite no incluye dbstat: no hay informe de espacio")
+        return None
+    return [dict(fila) for fila in filas]
+
+
+def informe_esquemas(conn: sqlite3.Connection, esquemas: List[str]) -> Dict:
+    """
+    Estado e informe de espacio de varias bases de una conexión
+
+    Returns:
+        Dict: Por esquema, 'estado' (ver estado_espacio) y 'objetos' (ver informe_espacio)
+    """
+    return {
+        esquema: {'estado': estado_espacio(conn, esquema),
+                  'objetos': informe_espacio(conn, esquema)}
+        for esquema in esquemas
+    }
+
+
+def informe_solo_lectura(ruta: str) -> Dict:
+    """
+    Informe de espacio de una base (y de su archivo) sin modificarla
+
+    Abre la base en modo de solo lectura, sin migraciones ni PRAGMA de
+    configuración: sirve aunque la aplicación la esté usando.
+
+    Returns:
+        Dict: Ver informe_esquemas ('main' y 'archivo' si existe)
+    """
+    conn = sqlite3.connect(Path(ruta).resolve().as_uri() + "?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        esquemas = ['main']
+        archivo = ruta_archivo(ruta)
+        if archivo and adjuntar_archivo(conn, archivo, solo_lectura=True):
+            esquemas.append(ESQUEMA_ARCHIVO)
+        return informe_esquemas(conn, esquemas)
+    finally:
+        conn.close()
+
+
+def mantener(conn: sqlite3.Connection, completo: bool = False,
+             paginas_vacuum: Optional[int] = PAGINAS_VACUUM_INCREMENTAL,
+             esquemas: Optional[List[str]] = None, compactar: bool = False) -> Dict:
+    """
+    Ejecutar el mantenimiento y medir cada paso
+
+    El liviano (para los momentos de inactividad de la aplicación) usa
+    PRAGMA optimize con analysis_limit, que sólo vuelve a analizar los
+    índices cuyas estadísticas quedaron viejas, libera una cantidad acotada
+    de páginas y hace un checkpoint PASSIVE. El completo ejecuta ANALYZE
+    sobre todo, libera todas las páginas y trunca el WAL.
+
+    Args:
+        conn (sqlite3.Connection): Escritor en modo autocommit, sin transacción abierta
+        completo (bool): True para el mantenimiento completo
+        paginas_vacuum (Optional[int]): Páginas a liberar en el liviano (None: todas)
+        esquemas (Optional[List[str]]): Bases adjuntas a analizar además de main
+        compactar (bool): Pasar antes la base a auto_vacuum incremental aunque
+            sea grande (VACUUM completo; ver activar_vacuum_incremental)
+
+    Returns:
+        Dict: 'pasos' (cada uno con 'paso', 'duracion' en segundos y su detalle),
+            'duracion' total, 'antes' y 'despues' (ver estado_espacio)
+    """
+    inicio = time.perf_counter()
+    pasos: List[Dict] = []
+    antes = estado_espacio(conn)
+
+    def convertir():
+        return {'incremental': activar_vacuum_incremental(conn, forzar=True)}
+
+    def analizar():
+        if completo:
+            # Sin límite: un mantenimiento liviano anterior pudo dejarlo fijado
+            conn.execute("PRAGMA analysis_limit = 0")
+            for esquema in ['main'] + list(esquemas or []):
+                conn.execute(f"ANALYZE {esquema}")
+        else:
+            conn.execute(f"PRAGMA analysis_limit = {LIMITE_ANALISIS}")
+            conn.execute("PRAGMA optimize")
+        return None
+
+    def optimizar():
+        conn.execute("PRAGMA optimize").fetchall()
+        return None
+
+    def liberar():
+        return vacuum_incremental(conn, None if completo else paginas_vacuum)
+
+    def checkpoint():
+        modo = 'TRUNCATE' if completo else 'PASSIVE'
+        bloqueado, wal, copiadas = conn.execute(f"PRAGMA wal_checkpoint({modo})").fetchone()
+        return {'modo': modo, 'bloqueado': bool(bloqueado), 'paginas_wal': wal,
+                'copiadas': copiadas}
+
+    if compactar:
+        _medir(pasos, 'VACUUM', convertir)
+    _medir(pasos, 'ANALYZE' if completo else 'PRAGMA optimize', analizar)
+    if completo:
+        _medir(pasos, 'PRAGMA optimize', optimizar)
+    _medir(pasos, 'vacuum incremental', liberar)
+    _medir(pasos, 'checkpoint', checkpoint)
+
+    conn.execute('''
+        INSERT INTO configuracion (clave, valor, descripcion) VALUES (?, CURRENT_TIMESTAMP, ?)
+        ON CONFLICT (clave) DO UPDATE SET valor = excluded.valor,
+            fecha_actualizacion = CURRENT_TIMESTAMP
+    ''', (CLAVE_ULTIMO_MANTENIMIENTO, 'Fecha del último mantenimiento de la base'))
+
+    return {
+        'completo': completo,
+        'pasos': pasos,
+        'duracion': time.perf_counter() - inicio,
+        'antes': antes,
+        'despues': estado_espacio(conn)
+    }
+
+
+def mantenimiento_pendiente(conn: sqlite3.Connection, horas: float) -> bool:
+    """Indicar si pasaron más de tantas horas desde el último mantenimiento"""
+    fila = conn.execute(
+        "SELECT valor < datetime('now', ?) FROM configuracion WHERE clave = ?",
+        (f"-{float(horas)} hours", CLAVE_ULTIMO_MANTENIMIENTO)
+    ).fetchone()
+    return fila is None or bool(fila[0])
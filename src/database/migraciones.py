@@ -0,0 +1,261 @@
+"""
+Migraciones de esquema de InstaFix
+Cada migración se aplica una sola vez, en orden y en su propia transacción,
+y la versión del esquema se guarda en PRAGMA user_version
+"""
+
+import sqlite3
+import logging
+from typing import Callable, List, Tuple
+
+from .perfiles import CLAVE_CONFIGURACION_PERFIL, PERFIL_POR_DEFECTO
+from .busqueda import fts5_disponible, crear_indice_busqueda, reconstruir_indice
+from .contadores import crear_contadores, recalcular_contadores
+from .resumenes import crear_resumenes, actualizar_resumenes
+from .cambios import crear_registro_cambios
+from .validacion import normalizar_celular
+from .clientes import crear_tabla_clientes, cargar_clientes, unificar_clientes
+
+logger = logging.getLogger(__name__)
+
+
+def _migracion_001_esquema_inicial(conn: sqlite3.Connection):
+    """Tablas originales (compatibles con bases creadas antes de las migraciones)"""
+    cursor = conn.cursor()
+
+    # Tabla principal de reparaciones
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS reparaciones (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            numero_presupuesto TEXT UNIQUE NOT NULL,
+            cliente_nombre TEXT NOT NULL,
+            cliente_apellido TEXT NOT NULL,
+            cliente_celular TEXT NOT NULL,
+            producto TEXT NOT NULL,
+            descripcion TEXT DEFAULT '',
+            costo_reparacion REAL DEFAULT NULL,
+            estado TEXT DEFAULT 'pendiente' CHECK (estado IN ('pendiente', 'en_proceso', 'finalizado', 'retirado')),
+            fecha_ingreso TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            fecha_retiro TIMESTAMP DEFAULT NULL,
+            notas TEXT DEFAULT ''
+        )
+    ''')
+
+    # Tabla de historial de estados (para auditoría)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS historial_estados (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            reparacion_id INTEGER NOT NULL,
+            estado_anterior TEXT,
+            estado_nuevo TEXT NOT NULL,
+            fecha_cambio TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            notas TEXT DEFAULT '',
+            FOREIGN KEY (reparacion_id) REFERENCES reparaciones (id)
+        )
+    ''')
+
+    # Tabla de configuración
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS configuracion (
+            clave TEXT PRIMARY KEY,
+            valor TEXT NOT NULL,
+            descripcion TEXT DEFAULT '',
+            fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Insertar configuración por defecto
+    cursor.execute('''
+        INSERT OR IGNORE INTO configuracion (clave, valor, descripcion)
+        VALUES ('ultimo_numero_presupuesto', '0', 'Último número de presupuesto generado')
+    ''')
+
+    cursor.execute('''
+        INSERT OR IGNORE INTO configuracion (clave, valor, descripcion)
+        VALUES (?, ?, 'Perfil de rendimiento de SQLite (compatible, equilibrado, rendimiento)')
+    ''', (CLAVE_CONFIGURACION_PERFIL, PERFIL_POR_DEFECTO))
+
+
+def _migracion_002_indices(conn: sqlite3.Connection):
+    """Índices secundarios para listados, filtros por estado e historial"""
+    cursor = conn.cursor()
+
+    # Filtro por estado ordenado por fecha y GROUP BY estado de las estadísticas
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reparaciones_estado_fecha
+        ON reparaciones (estado, fecha_ingreso)
+    ''')
+
+    # Listado principal (ORDER BY fecha_ingreso DESC)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reparaciones_fecha_ingreso
+        ON reparaciones (fecha_ingreso)
+    ''')
+
+    # Cambios recientes (sincronización y resúmenes incrementales)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reparaciones_fecha_actualizacion
+        ON reparaciones (fecha_actualizacion)
+    ''')
+
+    # Historial de una reparación en orden cronológico
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_historial_reparacion
+        ON historial_estados (reparacion_id, fecha_cambio)
+    ''')
+
+
+def _migracion_003_busqueda_fts(conn: sqlite3.Connection):
+    """Índice de texto completo para buscar_reparaciones"""
+    if not fts5_disponible(conn):
+        # DatabaseManager usará la búsqueda con LIKE; el índice se puede crear
+        # más adelante con reconstruir_indice_busqueda()
+        logger.warning("SQLite no incluye FTS5: se omite el índice de búsqueda")
+        return
+
+    crear_indice_busqueda(conn)
+    reconstruir_indice(conn)
+
+
+def _migracion_004_contadores_estado(conn: sqlite3.Connection):
+    """Contadores por estado mantenidos con triggers para las estadísticas"""
+    crear_contadores(conn)
+    recalcular_contadores(conn)
+
+
+def _migracion_005_resumenes_diarios(conn: sqlite3.Connection):
+    """Resúmenes diarios de ingresos, retiros y facturación por producto"""
+    crear_resumenes(conn)
+    actualizar_resumenes(conn, completo=True)
+
+
+def _migracion_006_registro_cambios(conn: sqlite3.Connection):
+    """Registro de cambios para refrescar la interfaz en forma incremental"""
+    crear_registro_cambios(conn)
+
+
+def _migracion_007_celular_normalizado(conn: sqlite3.Connection):
+    """Celular normalizado e indexado para buscar clientes por teléfono"""
+    conn.execute("ALTER TABLE reparaciones ADD COLUMN celular_normalizado TEXT")
+
+    # Completar las filas existentes sin anotarlas en el registro de cambios:
+    # los datos visibles no cambian y no hace falta que la interfaz recargue
+    conn.execute("DROP TRIGGER IF EXISTS cambios_reparaciones_au")
+    filas = conn.execute("SELECT id, cliente_celular FROM reparaciones").fetchall()
+    conn.executemany(
+        "UPDATE reparaciones SET celular_normalizado = ? WHERE id = ?",
+        [(normalizado, id_reparacion) for id_reparacion, normalizado in
+         ((fila[0], normalizar_celular(fila[1])) for fila in filas) if normalizado]
+    )
+    crear_registro_cambios(conn)
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reparaciones_celular_normalizado
+        ON reparaciones (celular_normalizado)
+    ''')
+
+
+def _migracion_008_clientes(conn: sqlite3.Connection):
+    """Tabla de clientes por celular normalizado, enlazada desde reparaciones"""
+    crear_tabla_clientes(conn)
+
+    # Enlazar las reparaciones no cambia datos visibles: sin registro de cambios
+    conn.execute("DROP TRIGGER IF EXISTS cambios_reparaciones_au")
+    creados = cargar_clientes(conn)
+    crear_registro_cambios(conn)
+
+    logger.info(f"Clientes creados a partir de las reparaciones: {creados}")
+
+
+def _migracion_009_celular_canonico(conn: sqlite3.Connection):
+    """Celular normalizado siempre con 549 y clientes repetidos por el prefijo unificados"""
+    # Los datos visibles no cambian: sin registro de cambios
+    conn.execute("DROP TRIGGER IF EXISTS cambios_reparaciones_au")
+    filas = conn.execute(
+        "SELECT id, cliente_celular, celular_normalizado FROM reparaciones"
+    ).fetchall()
+    conn.executemany(
+        "UPDATE reparaciones SET celular_normalizado = ? WHERE id = ?",
+        [(nuevo, fila[0]) for fila, nuevo in
+         ((fila, normalizar_celular(fila[1])) for fila in filas) if nuevo != fila[2]]
+    )
+    unificados = unificar_clientes(conn)
+    crear_registro_cambios(conn)
+
+    logger.info(f"Clientes unificados por celular normalizado: {unificados}")
+
+
+# Lista ordenada de migraciones: (versión, descripción, función)
+# Para cambiar el esquema, agregar una función nueva al final con la versión siguiente.
+# Nunca modificar una migración ya publicada.
+MIGRACIONES: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "Esquema inicial", _migracion_001_esquema_inicial),
+    (2, "Índices secundarios de reparaciones e historial", _migracion_002_indices),
+    (3, "Índice de búsqueda FTS5", _migracion_003_busqueda_fts),
+    (4, "Contadores de reparaciones por estado", _migracion_004_contadores_estado),
+    (5, "Resúmenes diarios para estadísticas", _migracion_005_resumenes_diarios),
+    (6, "Registro de cambios de reparaciones", _migracion_006_registro_cambios),
+    (7, "Celular normalizado indexado", _migracion_007_celular_normalizado),
+    (8, "Tabla de clientes", _migracion_008_clientes),
+    (9, "Celular normalizado canónico", _migracion_009_celular_canonico),
+]
+
+VERSION_ESQUEMA = MIGRACIONES[-1][0]
+
+
+def obtener_version(conn: sqlite3.Connection) -> int:
+    """Obtener la versión de esquema guardada en la base de datos"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def aplicar_migraciones(conn: sqlite3.Connection) -> int:
+    """
+    Aplicar las migraciones pendientes
+
+    Args:
+        conn (sqlite3.Connection): Conexión de escritura en modo autocommit
+            (isolation_level=None) y sin transacción abierta
+
+    Returns:
+        int: Versión del esquema después de migrar
+    """
+    version_actual = obtener_version(conn)
+
+    if version_actual == VERSION_ESQUEMA:
+        return version_actual
+
+    if version_actual > VERSION_ESQUEMA:
+        logger.warning(
+            f"La base de datos tiene el esquema v{version_actual}, más nuevo que el de "
+            f"esta versión de InstaFix (v{VERSION_ESQUEMA}). No se aplican migraciones."
+        )
+        return version_actual
+
+    for version, descripcion, migracion in MIGRACIONES:
+        if version <= version_actual:
+            continue
+
+        logger.info(f"Aplicando migración v{version}: {descripcion}")
+
+        # BEGIN IMMEDIATE evita que dos instancias migren la misma base a la vez
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Otra instancia pudo haber migrado mientras esperábamos el bloqueo
+            if obtener_version(conn) >= version:
+                conn.rollback()
+                continue
+
+            migracion(conn)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+        except BaseException:
+            conn.rollback()
+            logger.error(f"Error en la migración v{version}; se revirtieron sus cambios")
+            raise
+        else:
+            conn.commit()
+
+        version_actual = version
+
+    logger.info(f"Esquema de base de datos actualizado a v{version_actual}")
+    return version_actual
@@ -0,0 +1,110 @@
+"""
+Perfiles de rendimiento de SQLite para InstaFix
+Agrupan los PRAGMA que se aplican a cada conexión del pool
+"""
+
+import os
+import sqlite3
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Variable de entorno (.env) que selecciona el perfil; tiene prioridad sobre la tabla configuracion
+VARIABLE_ENTORNO_PERFIL = 'DB_PERFIL'
+
+# Clave de la tabla configuracion que guarda el perfil elegido
+CLAVE_CONFIGURACION_PERFIL = 'perfil_rendimiento'
+
+PERFIL_POR_DEFECTO = 'equilibrado'
+
+PERFILES: Dict[str, Dict] = {
+    # Comportamiento original: journal de rollback. Usar si la base está en una carpeta de red,
+    # donde WAL no es seguro.
+    'compatible': {
+        'descripcion': 'Journal de rollback y fsync completo (carpetas de red)',
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'cache_size': -2000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,
+        'wal_autocheckpoint': 1000,
+        'checkpoint_al_cerrar': None,
+    },
+    # WAL con fsync sólo en los checkpoints: lectores y escritor no se bloquean entre sí
+    'equilibrado': {
+        'descripcion': 'WAL, synchronous NORMAL y caché de 16 MB',
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,
+        'mmap_size': 64 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+        'wal_autocheckpoint': 1000,
+        'checkpoint_al_cerrar': 'TRUNCATE',
+    },
+    # Para equipos con mucha memoria y bases grandes
+    'rendimiento': {
+        'descripcion': 'WAL, synchronous NORMAL, caché de 64 MB y mmap de 256 MB',
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 10000,
+        'wal_autocheckpoint': 4000,
+        'checkpoint_al_cerrar': 'TRUNCATE',
+    },
+}
+
+
+def resolver_perfil(nombre: Optional[str]) -> str:
+    """
+    Validar el nombre de un perfil
+
+    Args:
+        nombre (Optional[str]): Nombre pedido (puede ser None o vacío)
+
+    Returns:
+        str: Nombre de un perfil existente (el por defecto si el pedido no existe)
+    """
+    if not nombre:
+        return PERFIL_POR_DEFECTO
+
+    nombre = nombre.strip().lower()
+    if nombre not in PERFILES:
+        logger.warning(f"Perfil de base de datos desconocido: {nombre}. Se usa '{PERFIL_POR_DEFECTO}'")
+        return PERFIL_POR_DEFECTO
+
+    return nombre
+
+
+def perfil_desde_entorno() -> Optional[str]:
+    """Obtener el perfil configurado en el archivo .env, si existe"""
+    return os.getenv(VARIABLE_ENTORNO_PERFIL) or None
+
+
+def aplicar_perfil(conn: sqlite3.Connection, nombre: str, solo_lectura: bool = False):
+    """
+    Aplicar los PRAGMA de un perfil a una conexión
+
+    Args:
+        conn (sqlite3.Connection): Conexión a configurar
+        nombre (str): Nombre del perfil
+        solo_lectura (bool): True para conexiones de solo lectura, que no pueden
+            cambiar el modo de journal
+    """
+    perfil = PERFILES[nombre]
+
+    # busy_timeout primero para que el cambio de journal espere a otros procesos
+    conn.execute(f"PRAGMA busy_timeout = {int(perfil['busy_timeout'])}")
+
+    if not solo_lectura:
+        conn.execute(f"PRAGMA journal_mode = {perfil['journal_mode']}")
+        conn.execute(f"PRAGMA wal_autocheckpoint = {int(perfil['wal_autocheckpoint'])}")
+
+    conn.execute(f"PRAGMA synchronous = {perfil['synchronous']}")
+    conn.execute(f"PRAGMA cache_size = {int(perfil['cache_size'])}")
+    conn.execute(f"PRAGMA mmap_size = {int(perfil['mmap_size'])}")
+    conn.execute(f"PRAGMA temp_store = {perfil['temp_store']}")
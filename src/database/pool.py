@@ -0,0 +1,249 @@
+"""
+Pool de conexiones SQLite para InstaFix
+Mantiene un único escritor compartido y un lector de solo lectura por hilo
+"""
+
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Consultas de lectura frecuentes que se preparan al abrir cada lector
+CONSULTAS_PRECALENTADAS = [
+    "SELECT * FROM reparaciones WHERE numero_presupuesto = ?",
+    "SELECT * FROM reparaciones ORDER BY fecha_ingreso DESC",
+]
+
+
+class ConnectionPool:
+    """Pool de conexiones reutilizables: un escritor y lectores por hilo"""
+
+    def __init__(self, db_path: str, cached_statements: int = 256,
+                 configurar: Optional[Callable[[sqlite3.Connection, bool], None]] = None):
+        """
+        Inicializar el pool de conexiones
+
+        Args:
+            db_path (str): Ruta al archivo de base de datos
+            cached_statements (int): Tamaño de la caché de sentencias por conexión
+            configurar (Callable): Función opcional que recibe cada conexión nueva
+                y un booleano que indica si es de solo lectura
+        """
+        self.db_path = db_path
+        self.cached_statements = cached_statements
+        self.configurar = configurar
+
+        # Las bases en memoria no se pueden abrir desde otra conexión
+        self.solo_escritor = db_path == ':memory:' or 'mode=memory' in db_path
+
+        self._lock_escritor = threading.RLock()
+        self._escritor: Optional[sqlite3.Connection] = None
+        self._local = threading.local()
+        self._lectores: List[sqlite3.Connection] = []
+        self._lectores_por_hilo: Dict[int, sqlite3.Connection] = {}
+        self._lock_lectores = threading.Lock()
+        self._generacion = 0
+        self._cerrado = False
+
+    def _abrir(self, solo_lectura: bool) -> sqlite3.Connection:
+        """Abrir y configurar una conexión nueva"""
+        if solo_lectura:
+            uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                                   cached_statements=self.cached_statements)
+        else:
+            # Sin transacciones implícitas: el escritor las abre explícitamente
+            conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                   isolation_level=None,
+                                   cached_statements=self.cached_statements)
+
+        conn.row_factory = sqlite3.Row
+
+        if self.configurar:
+            self.configurar(conn, solo_lectura)
+
+        return conn
+
+    def _precalentar(self, conn: sqlite3.Connection):
+        """Compilar las consultas frecuentes para dejarlas en la caché de sentencias"""
+        for consulta in CONSULTAS_PRECALENTADAS:
+            try:
+                params = ('',) if '?' in consulta else ()
+                conn.execute(consulta + " LIMIT 0", params).fetchall()
+            except sqlite3.Error:
+                # El esquema todavía no existe; se compilarán en el primer uso
+                return
+
+    def _obtener_escritor(self) -> sqlite3.Connection:
+        """Obtener (o abrir) la conexión de escritura compartida"""
+        if self._cerrado:
+            raise sqlite3.ProgrammingError("El pool de conexiones está cerrado")
+
+        if self._escritor is None:
+            self._escritor = self._abrir(solo_lectura=False)
+            logger.debug(f"Conexión de escritura abierta: {self.db_path}")
+        return self._escritor
+
+    @property
+    def cerrado(self) -> bool:
+        """True si el pool ya fue cerrado"""
+        return self._cerrado
+
+    @contextmanager
+    def escritor(self, transaccion: bool = True) -> Iterator[sqlite3.Connection]:
+        """
+        Obtener el escritor dentro de una transacción de escritura (BEGIN IMMEDIATE)
+
+        Hace commit al salir del bloque o rollback si se produce una excepción.
+        Los bloques anidados en el mismo hilo reutilizan la transacción externa.
+
+        Args:
+            transaccion (bool): False para usar el escritor sin abrir una transacción
+                (PRAGMA que no pueden ejecutarse dentro de una, como wal_checkpoint)
+        """
+        with self._lock_escritor:
+            conn = self._obtener_escritor()
+
+            if conn.in_transaction or not transaccion:
+                yield conn
+                return
+
+            # IMMEDIATE toma el bloqueo de escritura al empezar: dos procesos no pueden
+            # leer el mismo estado y luego pisarse (y busy_timeout los pone en espera)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+
+    @contextmanager
+    def lector(self) -> Iterator[sqlite3.Connection]:
+        """Obtener la conexión de solo lectura del hilo actual"""
+        if self.solo_escritor:
+            with self._lock_escritor:
+                yield self._obtener_escritor()
+            return
+
+        if self._cerrado:
+            raise sqlite3.ProgrammingError("El pool de conexiones está cerrado")
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # El escritor crea el archivo si todavía no existe
+            with self._lock_escritor:
+                self._obtener_escritor()
+
+            conn = self._abrir(solo_lectura=True)
+            self._precalentar(conn)
+            self._local.conn = conn
+            self._local.generacion = self._generacion
+            with self._lock_lectores:
+                self._lectores.append(conn)
+                self._lectores_por_hilo[threading.get_ident()] = conn
+        elif self._local.generacion != self._generacion:
+            # La configuración cambió: cada hilo reconfigura su propio lector
+            if self.configurar:
+                self.configurar(conn, True)
+            self._local.generacion = self._generacion
+
+        yield conn
+
+    @contextmanager
+    def lector_dedicado(self) -> Iterator[sqlite3.Connection]:
+        """
+        Abrir una conexión de solo lectura propia que se cierra al salir del bloque
+
+        Para lecturas largas en hilos de corta vida (exportaciones, respaldos):
+        no ocupa el lector del hilo ni queda abierta cuando el hilo termina.
+        """
+        if self.solo_escritor:
+            with self.lector() as conn:
+                yield conn
+            return
+
+        if self._cerrado:
+            raise sqlite3.ProgrammingError("El pool de conexiones está cerrado")
+
+        with self._lock_escritor:
+            self._obtener_escritor()
+
+        conn = self._abrir(solo_lectura=True)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def version_datos(self, esperar: bool = True) -> Optional[int]:
+        """
+        Leer PRAGMA data_version del escritor
+
+        El valor cambia cuando otra conexión u otro proceso hace commit en la
+        base; los cambios hechos por el propio escritor no lo modifican.
+
+        Args:
+            esperar (bool): False para no esperar si otro hilo está usando el escritor
+
+        Returns:
+            Optional[int]: Versión de los datos, o None si el escritor estaba ocupado
+        """
+        if not self._lock_escritor.acquire(blocking=esperar):
+            return None
+        try:
+            return self._obtener_escritor().execute("PRAGMA data_version").fetchone()[0]
+        finally:
+            self._lock_escritor.release()
+
+    def interrumpir_lector(self, hilo: int) -> bool:
+        """
+        Interrumpir la consulta que esté ejecutando el lector de otro hilo
+
+        La consulta en curso falla con sqlite3.OperationalError ('interrupted').
+        Si el lector no está ejecutando nada la llamada no tiene efecto. El
+        escritor nunca se interrumpe (en bases en memoria no hay lectores aparte).
+
+        Args:
+            hilo (int): Identificador del hilo (threading.get_ident())
+
+        Returns:
+            bool: True si el hilo tenía un lector abierto
+        """
+        with self._lock_lectores:
+            conn = self._lectores_por_hilo.get(hilo)
+            if conn is None:
+                return False
+            conn.interrupt()
+            return True
+
+    def reconfigurar(self):
+        """Volver a aplicar la función de configuración a las conexiones abiertas"""
+        with self._lock_escritor:
+            if self._escritor is not None and self.configurar:
+                self.configurar(self._escritor, False)
+            self._generacion += 1
+
+    def close(self):
+        """Cerrar todas las conexiones del pool"""
+        with self._lock_escritor:
+            self._cerrado = True
+
+            with self._lock_lectores:
+                for conn in self._lectores:
+                    try:
+                        conn.close()
+                    except sqlite3.Error as e:
+                        logger.warning(f"Error al cerrar conexión de lectura: {e}")
+                self._lectores.clear()
+                self._lectores_por_hilo.clear()
+
+            if self._escritor is not None:
+                self._escritor.close()
+                self._escritor = None
+
+        logger.info("Pool de conexiones cerrado")
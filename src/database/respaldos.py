@@ -0,0 +1,416 @@
+"""
+Respaldos de la base de datos de InstaFix
+Copia en caliente con la API de backup de SQLite, por pasos de pocas páginas
+y en un hilo propio, verificada con integrity_check, comprimida con gzip y
+con retención diaria y semanal
+"""
+
+import os
+import gzip
+import time
+import shutil
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Carpeta de los respaldos (junto a la base) si no se indica otra
+CARPETA_RESPALDOS = 'respaldos'
+
+# Variable de entorno (.env) con otra carpeta para los respaldos
+VARIABLE_ENTORNO_CARPETA = 'DB_RESPALDOS'
+
+EXTENSION_RESPALDO = '.db.gz'
+FORMATO_FECHA = '%Y%m%d-%H%M%S'
+
+# Páginas copiadas por paso y pausa entre pasos: el escritor nunca espera más que un paso
+PAGINAS_POR_PASO = 256
+PAUSA_ENTRE_PASOS = 0.005
+
+# Sin WAL no se puede copiar de una instantánea: si otra conexión escribe, la
+# copia vuelve a empezar; después de estos reinicios se copia el resto de una vez
+MAXIMO_REINICIOS = 3
+
+# Retención: el último respaldo de cada uno de los últimos días y semanas con respaldos
+RETENCION_DIARIA = 7
+RETENCION_SEMANAL = 4
+
+# Horas entre respaldos automáticos y espera antes de reintentar uno fallido
+INTERVALO_RESPALDO_HORAS = 24
+ESPERA_REINTENTO_SEGUNDOS = 15 * 60
+
+# Recibe (páginas copiadas, total de páginas)
+Progreso = Callable[[int, int], None]
+
+
+class _CopiaInterrumpida(Exception):
+    """Detiene sqlite3.Connection.backup desde la función de progreso"""
+
+    def __init__(self, motivo: str):
+        super().__init__(motivo)
+        self.motivo = motivo
+
+
+def carpeta_desde_entorno() -> Optional[str]:
+    """Leer la carpeta de respaldos desde el entorno (.env)"""
+    return os.getenv(VARIABLE_ENTORNO_CARPETA) or None
+
+
+def nombre_respaldo(ruta: str, fecha: datetime) -> str:
+    """Nombre del respaldo de una base (instafix.db -> instafix-20250101-093000.db.gz)"""
+    prefijo = os.path.splitext(os.path.basename(ruta))[0]
+    return f"{prefijo}-{fecha.strftime(FORMATO_FECHA)}{EXTENSION_RESPALDO}"
+
+
+def listar_respaldos(carpeta: str, ruta: str) -> List[Tuple[datetime, str]]:
+    """
+    Respaldos de una base que hay en la carpeta, del más nuevo al más viejo
+
+    Returns:
+        List[Tuple[datetime, str]]: Fecha y ruta de cada respaldo
+    """
+    prefijo = os.path.splitext(os.path.basename(ruta))[0] + '-'
+    respaldos = []
+    if not os.path.isdir(carpeta):
+        return respaldos
+
+    for nombre in os.listdir(carpeta):
+        if not (nombre.startswith(prefijo) and nombre.endswith(EXTENSION_RESPALDO)):
+            continue
+        try:
+            fecha = datetime.strptime(nombre[len(prefijo):-len(EXTENSION_RESPALDO)], FORMATO_FECHA)
+        except ValueError:
+            # Otra base con un nombre que empieza igual (instafix_archivo de instafix)
+            continue
+        respaldos.append((fecha, os.path.join(carpeta, nombre)))
+
+    respaldos.sort(reverse=True)
+    return respaldos
+
+
+def _copiar(origen: sqlite3.Connection, destino: sqlite3.Connection, paginas: int,
+            pausa: float, progreso: Optional[Progreso],
+            cancelar: Optional[threading.Event], tolerar_reinicios: bool) -> Dict:
+    """Copiar la base por pasos con la API de backup"""
+    estado = {'pasos': 0, 'reinicios': 0, 'paginas': 0, 'restantes': None}
+
+    def avanzar(_status, restantes: int, total: int):
+        estado['pasos'] += 1
+        estado['paginas'] = total
+        # Las páginas restantes sólo aumentan si otra conexión escribió y la copia volvió a empezar
+        if estado['restantes'] is not None and restantes > estado['restantes']:
+            estado['reinicios'] += 1
+            if not tolerar_reinicios and estado['reinicios'] > MAXIMO_REINICIOS:
+                raise _CopiaInterrumpida('reinicios')
+        estado['restantes'] = restantes
+
+        if progreso:
+            progreso(total - restantes, total)
+        if cancelar is not None and cancelar.is_set():
+            raise _CopiaInterrumpida('cancelado')
+
+    try:
+        origen.backup(destino, pages=paginas, progress=avanzar, sleep=pausa)
+    except _CopiaInterrumpida as e:
+        if e.motivo == 'cancelado':
+            raise
+        # Demasiadas escrituras en el medio: el resto en un solo paso (un bloqueo breve)
+        logger.info("La base cambió durante el respaldo: se copia en un solo paso")
+        origen.backup(destino)
+
+    return estado
+
+
+def respaldar_base(ruta: str, carpeta: str, paginas: int = PAGINAS_POR_PASO,
+                   pausa: float = PAUSA_ENTRE_PASOS, progreso: Optional[Progreso] = None,
+                   cancelar: Optional[threading.Event] = None,
+                   fecha: Optional[datetime] = None) -> Dict:
+    """
+    Crear un respaldo comprimido y verificado de una base mientras se sigue usando
+
+    La copia se lee con una conexión propia de solo lectura. En modo WAL esa
+    conexión mantiene abierta una transacción de lectura: copia una
+    instantánea coherente sin bloquear al escritor, y las escrituras de otras
+    conexiones no la hacen empezar de nuevo. La copia se verifica con
+    integrity_check antes de comprimirla; un respaldo cancelado o fallido no
+    deja archivos.
+
+    Args:
+        ruta (str): Base a respaldar
+        carpeta (str): Carpeta de los respaldos (se crea si no existe)
+        paginas (int): Páginas por paso
+        pausa (float): Segundos entre pasos
+        progreso (Optional[Progreso]): Función que recibe (páginas copiadas, total)
+        cancelar (Optional[threading.Event]): Evento que detiene la copia
+        fecha (Optional[datetime]): Fecha del nombre del respaldo (ahora por defecto)
+
+    Returns:
+        Dict: 'archivo', 'cancelado', 'bytes' (comprimido), 'bytes_base', 'paginas',
+            'pasos', 'reinicios', 'verificado' y las duraciones en segundos
+            ('duracion', 'duracion_copia', 'duracion_verificacion', 'duracion_compresion')
+    """
+    inicio = time.perf_counter()
+    os.makedirs(carpeta, exist_ok=True)
+    archivo = os.path.join(carpeta, nombre_respaldo(ruta, fecha or datetime.now()))
+    copia = f"{archivo[:-len('.gz')]}.parcial"
+    comprimido = f"{archivo}.parcial"
+
+    resultado = {
+        'archivo': archivo, 'cancelado': False, 'bytes': 0, 'bytes_base': 0,
+        'paginas': 0, 'pasos': 0, 'reinicios': 0, 'verificado': False,
+        'duracion': 0.0, 'duracion_copia': 0.0, 'duracion_verificacion': 0.0,
+        'duracion_compresion': 0.0
+    }
+
+    origen = sqlite3.connect(Path(ruta).resolve().as_uri() + "?mode=ro", uri=True,
+                             check_same_thread=False)
+    try:
+        wal = origen.execute("PRAGMA journal_mode").fetchone()[0].lower() == 'wal'
+        if wal:
+            origen.execute("BEGIN")
+            origen.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+        destino = sqlite3.connect(copia)
+        try:
+            destino.execute("PRAGMA synchronous = OFF")
+            try:
+                estado = _copiar(origen, destino, paginas, pausa, progreso, cancelar,
+                                 tolerar_reinicios=wal)
+            except _CopiaInterrumpida:
+                resultado['cancelado'] = True
+                return resultado
+            resultado.update(paginas=estado['paginas'], pasos=estado['pasos'],
+                             reinicios=estado['reinicios'])
+            momento = time.perf_counter()
+            resultado['duracion_copia'] = momento - inicio
+
+            # Verificar la copia, no el original: es lo que se va a restaurar
+            filas = destino.execute("PRAGMA integrity_check").fetchall()
+            if [tuple(fila) for fila in filas] != [('ok',)]:
+                raise sqlite3.DatabaseError(
+                    f"El respaldo de {ruta} no pasó integrity_check: {filas[0][0]}"
+                )
+            resultado['verificado'] = True
+            resultado['duracion_verificacion'] = time.perf_counter() - momento
+        finally:
+            destino.close()
+    except BaseException:
+        _eliminar(copia)
+        raise
+    finally:
+        origen.close()
+        if resultado['cancelado']:
+            _eliminar(copia)
+
+    momento = time.perf_counter()
+    try:
+        with open(copia, 'rb') as entrada, gzip.open(comprimido, 'wb', compresslevel=6) as salida:
+            shutil.copyfileobj(entrada, salida, 1024 * 1024)
+        os.replace(comprimido, archivo)
+    except BaseException:
+        _eliminar(comprimido)
+        raise
+    finally:
+        resultado['bytes_base'] = os.path.getsize(copia)
+        _eliminar(copia)
+
+    resultado['duracion_compresion'] = time.perf_counter() - momento
+    resultado['bytes'] = os.path.getsize(archivo)
+    resultado['duracion'] = time.perf_counter() - inicio
+    logger.info(f"Respaldo creado: {archivo} ({resultado['bytes_base']} -> "
+                f"{resultado['bytes']} bytes en {resultado['duracion']:.1f} s)")
+    return resultado
+
+
+def aplicar_retencion(carpeta: str, ruta: str, diarios: int = RETENCION_DIARIA,
+                      semanales: int = RETENCION_SEMANAL) -> List[str]:
+    """
+    Borrar los respaldos de una base que ya no hace falta conservar
+
+    Se conserva el más nuevo de cada uno de los últimos `diarios` días con
+    respaldos y el más nuevo de cada una de las últimas `semanales` semanas.
+
+    Returns:
+        List[str]: Respaldos borrados
+    """
+    dias, semanas = set(), set()
+    borrados = []
+
+    for fecha, archivo in listar_respaldos(carpeta, ruta):
+        conservar = False
+        if fecha.date() not in dias and len(dias) < diarios:
+            dias.add(fecha.date())
+            conservar = True
+        semana = fecha.isocalendar()[:2]
+        if semana not in semanas and len(semanas) < semanales:
+            semanas.add(semana)
+            conservar = True
+
+        if not conservar:
+            _eliminar(archivo)
+            borrados.append(archivo)
+
+    if borrados:
+        logger.info(f"Retención de respaldos: {len(borrados)} borrados en {carpeta}")
+    return borrados
+
+
+def _eliminar(archivo: str):
+    """Borrar un archivo temporal sin fallar si no existe"""
+    try:
+        os.remove(archivo)
+    except OSError:
+        pass
+
+
+class ServicioRespaldos:
+    """
+    Respaldos periódicos en un hilo propio, con métricas de los últimos
+
+    Respalda la base principal y el archivo de reparaciones (si existe) cada
+    cierto intervalo. Al iniciar, el primer respaldo se programa a partir del
+    último que haya en la carpeta.
+    """
+
+    def __init__(self, rutas: Sequence[str], carpeta: str,
+                 intervalo_horas: float = INTERVALO_RESPALDO_HORAS,
+                 diarios: int = RETENCION_DIARIA, semanales: int = RETENCION_SEMANAL):
+        """
+        Args:
+            rutas (Sequence[str]): Bases a respaldar (las que no existen se omiten)
+            carpeta (str): Carpeta de los respaldos
+            intervalo_horas (float): Horas entre respaldos automáticos
+            diarios (int): Respaldos diarios que se conservan
+            semanales (int): Respaldos semanales que se conservan
+        """
+        self.rutas = list(rutas)
+        self.carpeta = carpeta
+        self.intervalo = intervalo_horas * 3600
+        self.diarios = diarios
+        self.semanales = semanales
+
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+        self._ultimo: Optional[Dict] = None
+        self._realizados = 0
+        self._duracion_total = 0.0
+        self._errores = 0
+        self._ultimo_error: Optional[str] = None
+        self._proximo: Optional[float] = None
+
+    def respaldar(self, progreso: Optional[Progreso] = None,
+                  cancelar: Optional[threading.Event] = None) -> Dict:
+        """
+        Respaldar ahora todas las bases y aplicar la retención
+
+        Returns:
+            Dict: 'respaldos' (ver respaldar_base), 'borrados', 'cancelado', 'bytes'
+                y 'duracion'
+        """
+        with self._lock:
+            inicio = time.perf_counter()
+            fecha = datetime.now()
+            respaldos, borrados = [], []
+            cancelado = False
+
+            try:
+                for ruta in self.rutas:
+                    if not os.path.exists(ruta):
+                        continue
+                    respaldo = respaldar_base(ruta, self.carpeta, progreso=progreso,
+                                              cancelar=cancelar, fecha=fecha)
+                    if respaldo['cancelado']:
+                        cancelado = True
+                        break
+                    respaldos.append(respaldo)
+
+                if not cancelado:
+                    for ruta in self.rutas:
+                        borrados.extend(aplicar_retencion(self.carpeta, ruta,
+                                                          self.diarios, self.semanales))
+            except Exception as e:
+                self._errores += 1
+                self._ultimo_error = f"{fecha:%Y-%m-%d %H:%M}: {e}"
+                raise
+
+            resultado = {
+                'fecha': fecha,
+                'respaldos': respaldos,
+                'borrados': borrados,
+                'cancelado': cancelado,
+                'bytes': sum(respaldo['bytes'] for respaldo in respaldos),
+                'duracion': time.perf_counter() - inicio
+            }
+
+            if not cancelado:
+                self._ultimo = resultado
+                self._realizados += 1
+                self._duracion_total += resultado['duracion']
+            return resultado
+
+    def metricas(self) -> Dict:
+        """
+        Duración y tamaño de los respaldos
+
+        Returns:
+            Dict: 'ultimo' (resultado del último respaldo o None), 'realizados',
+                'duracion_promedio', 'errores', 'ultimo_error', 'proximo' (fecha
+                del próximo automático o None), 'en_carpeta' y 'bytes_carpeta'
+        """
+        en_carpeta = [archivo for ruta in self.rutas
+                      for _, archivo in listar_respaldos(self.carpeta, ruta)]
+        return {
+            'ultimo': self._ultimo,
+            'realizados': self._realizados,
+            'duracion_promedio': (self._duracion_total / self._realizados
+                                  if self._realizados else None),
+            'errores': self._errores,
+            'ultimo_error': self._ultimo_error,
+            'proximo': (datetime.fromtimestamp(self._proximo)
+                        if self._proximo is not None else None),
+            'en_carpeta': len(en_carpeta),
+            'bytes_carpeta': sum(os.path.getsize(archivo) for archivo in en_carpeta
+                                 if os.path.exists(archivo))
+        }
+
+    def iniciar(self):
+        """Empezar los respaldos automáticos en segundo plano"""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ejecutar, name='respaldos', daemon=True)
+        self._hilo.start()
+
+    def detener(self, espera: float = 5.0):
+        """
+        Detener los respaldos automáticos (el que está en curso se cancela)
+
+        Args:
+            espera (float): Segundos máximos de espera por el hilo
+        """
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(espera)
+            self._hilo = None
+        self._proximo = None
+
+    def _ejecutar(self):
+        """Bucle del hilo de respaldos"""
+        ultimos = [respaldos[0][0] for respaldos in
+                   (listar_respaldos(self.carpeta, ruta) for ruta in self.rutas[:1])
+                   if respaldos]
+        self._proximo = (ultimos[0].timestamp() + self.intervalo) if ultimos else time.time()
+
+        while not self._detener.wait(max(0.0, self._proximo - time.time())):
+            try:
+                self.respaldar(cancelar=self._detener)
+                self._proximo = time.time() + self.intervalo
+            except Exception as e:
+                logger.error(f"Error en el respaldo automático: {e}")
+                self._proximo = time.time() + ESPERA_REINTENTO_SEGUNDOS
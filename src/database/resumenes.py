@@ -0,0 +1,239 @@
+"""
+Resúmenes diarios de reparaciones para InstaFix
+Ingresos, retiros, facturación y tiempo de reparación por día y producto,
+actualizados en forma incremental a partir de fecha_actualizacion
+"""
+
+import sqlite3
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TABLA_RESUMEN = 'resumen_diario'
+TABLA_APORTES = 'resumen_aportes'
+
+# Marca de agua: mayor fecha_actualizacion ya incorporada a los resúmenes
+CLAVE_ULTIMA_ACTUALIZACION = 'resumen_ultima_actualizacion'
+
+# Agrupación -> expresión que convierte el día ('AAAA-MM-DD') en el período
+AGRUPACIONES = {
+    'dia': "dia",
+    'semana': "date(dia, '-6 days', 'weekday 1')",  # lunes de la semana
+    'mes': "substr(dia, 1, 7)",
+}
+
+# Aporte de una reparación a los resúmenes: el día de ingreso suma un ingreso y,
+# si está retirada, el día de retiro suma el retiro, su costo y los días que llevó
+_SELECT_APORTES = '''
+    SELECT
+        id AS reparacion_id,
+        date(fecha_ingreso) AS dia_ingreso,
+        CASE WHEN estado = 'retirado' AND fecha_retiro IS NOT NULL
+             THEN date(fecha_retiro) END AS dia_retiro,
+        trim(producto) AS producto,
+        COALESCE(costo_reparacion, 0) AS importe,
+        CASE WHEN estado = 'retirado' AND fecha_retiro IS NOT NULL
+             THEN julianday(fecha_retiro) - julianday(fecha_ingreso) ELSE 0 END AS duracion,
+        fecha_actualizacion
+    FROM reparaciones
+'''
+
+
+def crear_resumenes(conn: sqlite3.Connection):
+    """Crear las tablas de resúmenes (dentro de una transacción)"""
+    # Producto sin distinguir mayúsculas: "Celular" y "celular" son el mismo
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {TABLA_RESUMEN} (
+            dia TEXT NOT NULL,
+            producto TEXT NOT NULL COLLATE NOCASE,
+            ingresos INTEGER NOT NULL DEFAULT 0,
+            retiros INTEGER NOT NULL DEFAULT 0,
+            facturado REAL NOT NULL DEFAULT 0,
+            dias_reparacion REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, producto)
+        ) WITHOUT ROWID
+    ''')
+
+    # Lo que cada reparación sumó la última vez, para restarlo si cambia.
+    # Las reparaciones borradas (o archivadas) siguen contando en los resúmenes.
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {TABLA_APORTES} (
+            reparacion_id INTEGER PRIMARY KEY,
+            dia_ingreso TEXT,
+            dia_retiro TEXT,
+            producto TEXT COLLATE NOCASE,
+            importe REAL NOT NULL DEFAULT 0,
+            duracion REAL NOT NULL DEFAULT 0
+        )
+    ''')
+
+    conn.execute('''
+        INSERT OR IGNORE INTO configuracion (clave, valor, descripcion)
+        VALUES (?, '', 'Última fecha_actualizacion incorporada a los resúmenes diarios')
+    ''', (CLAVE_ULTIMA_ACTUALIZACION,))
+
+
+def actualizar_resumenes(conn: sqlite3.Connection, completo: bool = False) -> int:
+    """
+    Incorporar a los resúmenes las reparaciones creadas o modificadas desde la
+    última actualización
+
+    Se debe llamar dentro de una transacción de escritura. Reprocesar una
+    reparación no altera el resultado (se resta su aporte anterior y se suma
+    el nuevo), por eso la marca de agua se compara con >= y no se pierden las
+    modificaciones hechas en el mismo segundo que la última actualización.
+
+    Args:
+        conn (sqlite3.Connection): Escritor con la transacción abierta
+        completo (bool): True para descartar los resúmenes y recalcular todo
+
+    Returns:
+        int: Reparaciones procesadas
+    """
+    if completo:
+        conn.execute(f"DELETE FROM {TABLA_RESUMEN}")
+        conn.execute(f"DELETE FROM {TABLA_APORTES}")
+        desde = ''
+    else:
+        fila = conn.execute(
+            "SELECT valor FROM configuracion WHERE clave = ?", (CLAVE_ULTIMA_ACTUALIZACION,)
+        ).fetchone()
+        desde = fila[0] if fila else ''
+
+    # Usa idx_reparaciones_fecha_actualizacion: sólo lee lo que cambió
+    conn.execute("DROP TABLE IF EXISTS temp.resumen_cambios")
+    conn.execute(f'''
+        CREATE TEMP TABLE resumen_cambios AS
+        {_SELECT_APORTES}
+        WHERE fecha_actualizacion >= ?
+    ''', (desde,))
+
+    procesadas, ultima = conn.execute(
+        "SELECT COUNT(*), MAX(fecha_actualizacion) FROM temp.resumen_cambios"
+    ).fetchone()
+
+    if procesadas:
+        # Diferencia por (día, producto): aporte nuevo menos aporte anterior
+        conn.execute(f'''
+            INSERT INTO {TABLA_RESUMEN} (dia, producto, ingresos, retiros, facturado, dias_reparacion)
+            SELECT dia, producto, SUM(ingresos), SUM(retiros), SUM(facturado), SUM(dias_reparacion)
+            FROM (
+                SELECT a.dia_ingreso AS dia, a.producto, -1 AS ingresos, 0 AS retiros,
+                       0 AS facturado, 0 AS dias_reparacion
+                FROM {TABLA_APORTES} a JOIN temp.resumen_cambios c USING (reparacion_id)
+                UNION ALL
+                SELECT a.dia_retiro, a.producto, 0, -1, -a.importe, -a.duracion
+                FROM {TABLA_APORTES} a JOIN temp.resumen_cambios c USING (reparacion_id)
+                WHERE a.dia_retiro IS NOT NULL
+                UNION ALL
+                SELECT dia_ingreso, producto, 1, 0, 0, 0
+                FROM temp.resumen_cambios
+                UNION ALL
+                SELECT dia_retiro, producto, 0, 1, importe, duracion
+                FROM temp.resumen_cambios WHERE dia_retiro IS NOT NULL
+            )
+            WHERE dia IS NOT NULL
+            GROUP BY dia, producto COLLATE NOCASE
+            ON CONFLICT (dia, producto) DO UPDATE SET
+                ingresos = ingresos + excluded.ingresos,
+                retiros = retiros + excluded.retiros,
+                facturado = facturado + excluded.facturado,
+                dias_reparacion = dias_reparacion + excluded.dias_reparacion
+        ''')
+
+        conn.execute(f'''
+            INSERT OR REPLACE INTO {TABLA_APORTES}
+                (reparacion_id, dia_ingreso, dia_retiro, producto, importe, duracion)
+            SELECT reparacion_id, dia_ingreso, dia_retiro, producto, importe, duracion
+            FROM temp.resumen_cambios
+        ''')
+
+        # Las filas que quedaron en cero (p. ej. un retiro deshecho) no aportan nada
+        conn.execute(f"DELETE FROM {TABLA_RESUMEN} WHERE ingresos = 0 AND retiros = 0")
+
+        conn.execute(
+            "UPDATE configuracion SET valor = ?, fecha_actualizacion = CURRENT_TIMESTAMP "
+            "WHERE clave = ?",
+            (ultima, CLAVE_ULTIMA_ACTUALIZACION)
+        )
+
+    conn.execute("DROP TABLE temp.resumen_cambios")
+
+    if procesadas:
+        logger.debug(f"Resúmenes diarios actualizados: {procesadas} reparaciones")
+    return procesadas
+
+
+def _filtro_rango(desde: Optional[str], hasta: Optional[str]):
+    """Armar la condición WHERE de un rango de días (ambos incluidos)"""
+    condiciones = []
+    parametros = []
+    if desde:
+        condiciones.append("dia >= ?")
+        parametros.append(str(desde)[:10])
+    if hasta:
+        condiciones.append("dia <= ?")
+        parametros.append(str(hasta)[:10])
+
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ''
+    return where, parametros
+
+
+def resumen_por_periodo(conn: sqlite3.Connection, desde: Optional[str] = None,
+                        hasta: Optional[str] = None, agrupar: str = 'dia') -> List[Dict]:
+    """
+    Totales por día, semana o mes
+
+    Args:
+        conn (sqlite3.Connection): Conexión de lectura
+        desde (Optional[str]): Primer día incluido ('AAAA-MM-DD')
+        hasta (Optional[str]): Último día incluido ('AAAA-MM-DD')
+        agrupar (str): 'dia', 'semana' (desde el lunes) o 'mes'
+
+    Returns:
+        List[Dict]: 'periodo', 'ingresos', 'retiros', 'facturado' y 'promedio_dias'
+            (días promedio entre ingreso y retiro), del período más antiguo al más nuevo
+    """
+    if agrupar not in AGRUPACIONES:
+        raise ValueError(f"Agrupación desconocida: {agrupar}")
+
+    where, parametros = _filtro_rango(desde, hasta)
+    filas = conn.execute(f'''
+        SELECT {AGRUPACIONES[agrupar]} AS periodo,
+               SUM(ingresos) AS ingresos, SUM(retiros) AS retiros,
+               SUM(facturado) AS facturado,
+               SUM(dias_reparacion) / NULLIF(SUM(retiros), 0) AS promedio_dias
+        FROM {TABLA_RESUMEN} {where}
+        GROUP BY periodo
+        ORDER BY periodo
+    ''', parametros).fetchall()
+
+    return [dict(fila) for fila in filas]
+
+
+def resumen_por_producto(conn: sqlite3.Connection, desde: Optional[str] = None,
+                         hasta: Optional[str] = None,
+                         limite: Optional[int] = None) -> List[Dict]:
+    """
+    Totales por producto en un rango de días
+
+    Returns:
+        List[Dict]: 'producto', 'ingresos', 'retiros', 'facturado' y 'promedio_dias',
+            de mayor a menor cantidad de ingresos
+    """
+    where, parametros = _filtro_rango(desde, hasta)
+    sql = f'''
+        SELECT producto,
+               SUM(ingresos) AS ingresos, SUM(retiros) AS retiros,
+               SUM(facturado) AS facturado,
+               SUM(dias_reparacion) / NULLIF(SUM(retiros), 0) AS promedio_dias
+        FROM {TABLA_RESUMEN} {where}
+        GROUP BY producto
+        ORDER BY ingresos DESC, producto
+    '''
+    if limite:
+        sql += " LIMIT ?"
+        parametros.append(limite)
+
+    return [dict(fila) for fila in conn.execute(sql, parametros).fetchall()]
@@ -0,0 +1,342 @@
+"""
+Índice de trigramas en memoria para InstaFix
+Búsqueda aproximada de clientes, celulares y productos mientras se escribe
+("gonzales" encuentra "González", "4567" encuentra "11 4567-8901")
+"""
+
+import re
+import math
+import heapq
+import sqlite3
+import logging
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set
+
+from .cambios import version_actual, leer_cambios
+
+logger = logging.getLogger(__name__)
+
+# Campos indexados (el código es la posición en la lista)
+CAMPOS = ['cliente', 'celular', 'producto']
+CAMPO_CLIENTE, CAMPO_CELULAR, CAMPO_PRODUCTO = range(len(CAMPOS))
+
+# Fracción mínima de los trigramas de la consulta que debe tener un término
+CONTENCION_MINIMA = 0.5
+
+# Términos que se verifican por consulta. Las listas de los trigramas muy
+# frecuentes aportan sólo sus términos más nuevos (los del final)
+MAXIMO_CANDIDATOS = 300
+
+# Cambios que se aplican de a uno; con más se reconstruye el índice
+MAXIMO_CAMBIOS_INCREMENTALES = 5000
+
+# Números por consulta IN (...) al leer las reparaciones modificadas
+TAMANO_LOTE_LECTURA = 500
+
+_NO_ALFANUMERICO = re.compile(r'[^0-9a-z]+')
+_NO_DIGITO = re.compile(r'\D+')
+_LETRA = re.compile(r'[a-z]')
+
+
+def normalizar_texto(texto: Optional[str]) -> str:
+    """Minúsculas, sin acentos y con un solo espacio entre palabras"""
+    if not texto:
+        return ''
+    texto = texto.lower()
+    if not texto.isascii():
+        texto = unicodedata.normalize('NFKD', texto)
+        texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return _NO_ALFANUMERICO.sub(' ', texto).strip()
+
+
+def solo_digitos(texto: Optional[str]) -> str:
+    """Dígitos de un texto (para celulares)"""
+    return _NO_DIGITO.sub('', texto or '')
+
+
+def trigramas_texto(normalizado: str, prefijo: bool = False) -> Set[str]:
+    """
+    Trigramas de un texto normalizado, palabra por palabra
+
+    Cada palabra se rellena con dos espacios al principio y uno al final, así
+    el comienzo de la palabra pesa más. Con prefijo=True la última palabra no
+    se cierra, porque el usuario puede estar escribiéndola todavía.
+    """
+    palabras = normalizado.split()
+    trigramas = set()
+    for i, palabra in enumerate(palabras):
+        final = '' if prefijo and i == len(palabras) - 1 else ' '
+        relleno = f"  {palabra}{final}"
+        trigramas.update([relleno[j:j + 3] for j in range(len(relleno) - 2)])
+    return trigramas
+
+
+def trigramas_digitos(digitos: str) -> Set[str]:
+    """Trigramas sin relleno: cualquier tramo de 3 dígitos puede coincidir"""
+    return {digitos[j:j + 3] for j in range(len(digitos) - 2)}
+
+
+class IndiceTrigramas:
+    """
+    Índice invertido trigrama -> términos para búsqueda aproximada
+
+    Un término es un valor distinto de un campo (el nombre completo de un
+    cliente, un celular, un producto), así un cliente con cien reparaciones
+    se indexa una sola vez. Los trigramas se numeran y tanto las listas de
+    términos por trigrama como los trigramas de cada término (todos seguidos
+    en un único arreglo) son array('I') para ocupar poca memoria. Las
+    reparaciones de cada término se guardan ordenadas por id, así quitar una
+    es una búsqueda binaria aunque el término (un producto) tenga decenas de
+    miles. Se mantiene al día leyendo el registro de cambios: una baja (o una reparación archivada) se quita de sus
+    términos; los términos que quedan sin reparaciones se descartan al
+    consultar y se limpian al reconstruir.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.version: Optional[int] = None
+        self._limpiar()
+
+    def _limpiar(self):
+        """Dejar el índice vacío"""
+        # Un diccionario clave normalizada -> término por campo
+        self._claves: List[Dict[str, int]] = [{} for _ in CAMPOS]
+        self._valores: List[str] = []
+        self._campos = bytearray()
+        self._reparaciones: List[array] = []
+        self._numeros_trigramas: Dict[str, int] = {}
+        self._postings: List[array] = []
+        # Trigramas del término t: _trigramas_terminos[_inicios[t]:_inicios[t + 1]]
+        self._trigramas_terminos = array('I')
+        self._inicios = array('I', [0])
+        # Término de cada campo por id de reparación (-1 si no tiene)
+        self._terminos_reparacion = array('i')
+        # Id de cada número de presupuesto (el registro de cambios da números)
+        self._ids: Dict[str, int] = {}
+        self._bajas = 0
+
+    @property
+    def construido(self) -> bool:
+        """True si el índice ya se cargó desde la base"""
+        return self.version is not None
+
+    def estadisticas(self) -> Dict:
+        """Tamaño del índice"""
+        with self._lock:
+            return {
+                'terminos': len(self._valores),
+                'trigramas': len(self._postings),
+                'entradas': len(self._trigramas_terminos),
+                'version': self.version
+            }
+
+    # --- Construcción y mantenimiento ---
+
+    def construir(self, conn: sqlite3.Connection):
+        """Cargar el índice completo desde la tabla reparaciones"""
+        with self._lock:
+            self._limpiar()
+            # La versión se toma antes de leer: un cambio en el medio se vuelve a aplicar
+            self.version = version_actual(conn)
+            filas = conn.execute(
+                "SELECT numero_presupuesto, id, cliente_nombre, cliente_apellido, "
+                "cliente_celular, producto FROM reparaciones"
+            )
+            for numero, *fila in filas:
+                self._ids[numero] = fila[0]
+                self._poner_reparacion(*fila)
+
+        logger.info(f"Índice de trigramas construido: {len(self._valores)} términos, "
+                    f"{len(self._postings)} trigramas")
+
+    def sincronizar(self, conn: sqlite3.Connection):
+        """Aplicar los cambios registrados desde la última sincronización"""
+        with self._lock:
+            if self.version is None:
+                self.construir(conn)
+                return
+
+            cambios = leer_cambios(conn, self.version, MAXIMO_CAMBIOS_INCREMENTALES)
+            if cambios is None:
+                self.construir(conn)
+                return
+
+            # Primero las bajas: si un número se dio de baja y otro tomó el mismo
+            # id, la alta posterior lo vuelve a indexar
+            for numero in cambios['bajas']:
+                id_reparacion = self._ids.pop(numero, None)
+                if id_reparacion is not None:
+                    self._poner_reparacion(id_reparacion, None, None, None, None)
+
+            numeros = cambios['altas'] + cambios['modificaciones']
+            for inicio in range(0, len(numeros), TAMANO_LOTE_LECTURA):
+                lote = numeros[inicio:inicio + TAMANO_LOTE_LECTURA]
+                filas = conn.execute(
+                    "SELECT numero_presupuesto, id, cliente_nombre, cliente_apellido, "
+                    "cliente_celular, producto FROM reparaciones "
+                    f"WHERE numero_presupuesto IN ({', '.join('?' * len(lote))})",
+                    lote
+                )
+                for numero, *fila in filas:
+                    self._ids[numero] = fila[0]
+                    self._poner_reparacion(*fila)
+
+            self.version = cambios['version']
+
+            # Los términos vacíos que dejan las bajas se limpian reconstruyendo
+            self._bajas += len(cambios['bajas'])
+            if self._bajas > max(1000, len(self._valores) // 10):
+                self.construir(conn)
+
+    def _termino(self, campo: int, clave: str, valor: str) -> int:
+        """Obtener (o crear) el término de un valor"""
+        claves = self._claves[campo]
+        termino = claves.get(clave)
+        if termino is not None:
+            return termino
+
+        if campo == CAMPO_CELULAR:
+            trigramas = trigramas_digitos(clave)
+        else:
+            trigramas = trigramas_texto(clave)
+
+        termino = len(self._valores)
+        claves[clave] = termino
+        self._valores.append(valor)
+        self._campos.append(campo)
+        self._reparaciones.append(array('I'))
+        for trigrama in trigramas:
+            numero = self._numeros_trigramas.get(trigrama)
+            if numero is None:
+                numero = self._numeros_trigramas[trigrama] = len(self._postings)
+                self._postings.append(array('I'))
+            self._postings[numero].append(termino)
+            self._trigramas_terminos.append(numero)
+        self._inicios.append(len(self._trigramas_terminos))
+        return termino
+
+    def _poner_reparacion(self, id_reparacion: int, nombre: Optional[str],
+                          apellido: Optional[str], celular: Optional[str],
+                          producto: Optional[str]):
+        """Indexar (o reindexar) los campos de una reparación"""
+        valores = [None] * len(CAMPOS)
+
+        cliente = ' '.join(parte.strip() for parte in (nombre, apellido) if parte and parte.strip())
+        clave = normalizar_texto(cliente)
+        if clave:
+            valores[CAMPO_CLIENTE] = (clave, cliente)
+
+        digitos = solo_digitos(celular)
+        if len(digitos) >= 3:
+            valores[CAMPO_CELULAR] = (digitos, celular.strip())
+
+        clave = normalizar_texto(producto)
+        if clave:
+            valores[CAMPO_PRODUCTO] = (clave, producto.strip())
+
+        base = id_reparacion * len(CAMPOS)
+        if len(self._terminos_reparacion) < base + len(CAMPOS):
+            faltan = base + len(CAMPOS) - len(self._terminos_reparacion)
+            self._terminos_reparacion.extend([-1] * faltan)
+
+        for campo, valor in enumerate(valores):
+            nuevo = self._termino(campo, *valor) if valor else -1
+            anterior = self._terminos_reparacion[base + campo]
+            if nuevo == anterior:
+                continue
+
+            if anterior >= 0:
+                reparaciones = self._reparaciones[anterior]
+                i = bisect_left(reparaciones, id_reparacion)
+                if i < len(reparaciones) and reparaciones[i] == id_reparacion:
+                    del reparaciones[i]
+            if nuevo >= 0:
+                reparaciones = self._reparaciones[nuevo]
+                # construir() lee en orden de id: casi siempre va al final
+                if not reparaciones or reparaciones[-1] < id_reparacion:
+                    reparaciones.append(id_reparacion)
+                else:
+                    i = bisect_left(reparaciones, id_reparacion)
+                    if i == len(reparaciones) or reparaciones[i] != id_reparacion:
+                        reparaciones.insert(i, id_reparacion)
+            self._terminos_reparacion[base + campo] = nuevo
+
+    # --- Consultas ---
+
+    def buscar(self, texto: str, limite: int = 10,
+               campos: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Buscar los términos más parecidos a un texto
+
+        Una consulta de sólo dígitos busca tramos de celulares; cualquier otra
+        busca en clientes y productos. Los candidatos salen de las listas de
+        los trigramas menos frecuentes: un término con al menos m trigramas en
+        común tiene que aparecer en alguna de las n - m + 1 más cortas. Para
+        que el costo no dependa del tamaño de la base se verifican a lo sumo
+        MAXIMO_CANDIDATOS términos.
+
+        Args:
+            texto (str): Lo que escribió el usuario
+            limite (int): Cantidad máxima de resultados
+            campos (Optional[Iterable[str]]): Limitar a estos campos (ver CAMPOS)
+
+        Returns:
+            List[Dict]: 'campo', 'valor', 'puntaje' (0 a 1) e 'ids' de las
+                reparaciones, del más parecido al menos parecido
+        """
+        normalizado = normalizar_texto(texto)
+        digitos = solo_digitos(normalizado)
+        if digitos and not _LETRA.search(normalizado):
+            trigramas = trigramas_digitos(digitos)
+            permitidos = {CAMPO_CELULAR}
+        else:
+            trigramas = trigramas_texto(normalizado, prefijo=True)
+            permitidos = {CAMPO_CLIENTE, CAMPO_PRODUCTO}
+
+        if campos is not None:
+            permitidos &= {CAMPOS.index(campo) for campo in campos}
+        if not trigramas or not permitidos:
+            return []
+
+        with self._lock:
+            # Un trigrama que no está en el índice no coincide con ningún término
+            numeros = {self._numeros_trigramas[trigrama] for trigrama in trigramas
+                       if trigrama in self._numeros_trigramas}
+            listas = sorted((self._postings[numero] for numero in numeros), key=len)
+            listas += [()] * (len(trigramas) - len(numeros))
+            total = len(trigramas)
+            minimo = max(1, math.ceil(total * CONTENCION_MINIMA))
+
+            candidatos = set()
+            for lista in listas[:total - minimo + 1]:
+                candidatos.update(lista[-(MAXIMO_CANDIDATOS - len(candidatos)):])
+                if len(candidatos) >= MAXIMO_CANDIDATOS:
+                    break
+
+            resultados = []
+            inicios = self._inicios
+            for termino in candidatos:
+                campo = self._campos[termino]
+                if campo not in permitidos or not self._reparaciones[termino]:
+                    continue
+
+                propios = self._trigramas_terminos[inicios[termino]:inicios[termino + 1]]
+                comunes = len(numeros.intersection(propios))
+                if comunes < minimo:
+                    continue
+
+                # Contención (la consulta está dentro del término) con desempate por Jaccard
+                contencion = comunes / total
+                jaccard = comunes / (total + len(propios) - comunes)
+                resultados.append(((2 * contencion + jaccard) / 3, termino))
+
+            mejores = heapq.nlargest(limite, resultados)
+            return [{
+                'campo': CAMPOS[self._campos[termino]],
+                'valor': self._valores[termino],
+                'puntaje': round(puntaje, 3),
+                'ids': list(self._reparaciones[termino])
+            } for puntaje, termino in mejores]
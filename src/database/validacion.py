@@ -0,0 +1,178 @@
+"""
+Validación de datos de reparaciones para InstaFix
+Mismas reglas que ReparacionDialog, para altas masivas e importaciones
+"""
+
+import re
+from datetime import datetime
+from typing import Dict, Optional
+
+ESTADOS = ['pendiente', 'en_proceso', 'finalizado', 'retirado']
+
+# Dígitos, espacios, guiones, paréntesis y el signo +
+PATRON_CELULAR = re.compile(r'^[\d\s\-\(\)\+]*$')
+
+# Fechas aceptadas: las de SQLite (AAAA-MM-DD [HH:MM[:SS]]) y las habituales
+# de una planilla (DD/MM/AAAA [HH:MM[:SS]]); se ignoran fracciones y zona horaria
+_HORA = r'(?:[ T](\d{1,2}):(\d{2})(?::(\d{2}))?(?:[.,]\d+)?Z?)?'
+PATRON_FECHA_ISO = re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})' + _HORA + '$')
+PATRON_FECHA_DMA = re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{4})' + _HORA + '$')
+
+CAMPOS_OBLIGATORIOS = [
+    ('cliente_nombre', "El nombre del cliente es obligatorio"),
+    ('cliente_apellido', "El apellido del cliente es obligatorio"),
+    ('cliente_celular', "El celular del cliente es obligatorio"),
+    ('producto', "El producto es obligatorio"),
+]
+
+
+def _texto(valor) -> str:
+    """Convertir un valor opcional a texto sin espacios sobrantes"""
+    if valor is None:
+        return ''
+    return str(valor).strip()
+
+
+def normalizar_fecha(valor) -> Optional[str]:
+    """
+    Convertir una fecha al formato en que SQLite guarda CURRENT_TIMESTAMP
+
+    Args:
+        valor: Texto de la fecha (vacío o None si no se informó)
+
+    Returns:
+        Optional[str]: 'AAAA-MM-DD HH:MM:SS', o None si no hay fecha
+
+    Raises:
+        ValueError: Si la fecha no tiene un formato reconocido
+    """
+    texto = _texto(valor)
+    if not texto:
+        return None
+
+    # Expresiones regulares en lugar de strptime: es el paso más costoso de una importación
+    coincidencia = PATRON_FECHA_ISO.match(texto)
+    if coincidencia:
+        anio, mes, dia, hora, minuto, segundo = coincidencia.groups()
+    else:
+        coincidencia = PATRON_FECHA_DMA.match(texto)
+        if not coincidencia:
+            raise ValueError(f"Formato de fecha inválido: {texto}")
+        dia, mes, anio, hora, minuto, segundo = coincidencia.groups()
+
+    try:
+        fecha = datetime(int(anio), int(mes), int(dia),
+                         int(hora or 0), int(minuto or 0), int(segundo or 0))
+    except ValueError:
+        raise ValueError(f"Fecha inválida: {texto}")
+
+    return fecha.isoformat(' ')
+
+
+def formatear_celular_whatsapp(celular: Optional[str]) -> Optional[str]:
+    """
+    Llevar un celular al formato internacional con el que se abre WhatsApp (54...)
+
+    Args:
+        celular (Optional[str]): Celular tal como se ingresó
+
+    Returns:
+        Optional[str]: Sólo dígitos con código de país, o None si no es válido
+    """
+    if not celular:
+        return None
+
+    # Remover espacios, guiones y paréntesis
+    digitos = ''.join(filter(str.isdigit, celular))
+
+    # Si no tiene código de país, agregar 54 (Argentina)
+    if len(digitos) == 10 and digitos.startswith('11'):
+        digitos = '54' + digitos
+    elif len(digitos) == 10:
+        digitos = '549' + digitos
+    elif len(digitos) == 11 and not digitos.startswith('54'):
+        digitos = '54' + digitos[1:]  # Remover el 0 inicial
+
+    # Validar longitud
+    if len(digitos) < 10 or len(digitos) > 15:
+        return None
+
+    return digitos
+
+
+def normalizar_celular(celular: Optional[str]) -> Optional[str]:
+    """
+    Clave con la que se guarda y se busca el celular normalizado
+
+    Los celulares argentinos quedan siempre como 549 + característica + número,
+    así un mismo cliente coincide aunque se haya escrito con espacios, guiones,
+    paréntesis, con 0 de larga distancia o con/sin el prefijo 54/9. Los demás
+    quedan como en formatear_celular_whatsapp.
+
+    Args:
+        celular (Optional[str]): Celular tal como se ingresó
+
+    Returns:
+        Optional[str]: Sólo dígitos con código de país, o None si no es válido
+    """
+    digitos = formatear_celular_whatsapp(celular)
+
+    # 54 + 10 dígitos es un celular argentino escrito sin el 9
+    if digitos is not None and len(digitos) == 12 and digitos.startswith('54'):
+        digitos = '549' + digitos[2:]
+
+    return digitos
+
+
+def normalizar_reparacion(datos: Dict) -> Dict:
+    """
+    Validar y normalizar los datos de una reparación
+
+    Args:
+        datos (Dict): Datos de la reparación (como los devuelve ReparacionDialog)
+
+    Returns:
+        Dict: Datos limpios listos para insertar
+
+    Raises:
+        ValueError: Si algún dato no es válido (con el mismo mensaje que el diálogo)
+    """
+    # Validar campos obligatorios
+    for campo, mensaje in CAMPOS_OBLIGATORIOS:
+        if not _texto(datos.get(campo)):
+            raise ValueError(mensaje)
+
+    # Validar formato de celular
+    celular = _texto(datos['cliente_celular'])
+    if not PATRON_CELULAR.match(celular):
+        raise ValueError("Formato de celular inválido")
+
+    # Validar costo si se ingresó
+    costo = datos.get('costo_reparacion')
+    if costo is not None and _texto(costo) != '':
+        try:
+            costo = float(costo)
+        except (TypeError, ValueError):
+            raise ValueError("Formato de costo inválido")
+        if costo < 0:
+            raise ValueError("El costo no puede ser negativo")
+    else:
+        costo = None
+
+    estado = _texto(datos.get('estado')) or 'pendiente'
+    if estado not in ESTADOS:
+        raise ValueError(f"Estado inválido: {estado}")
+
+    return {
+        'cliente_nombre': _texto(datos['cliente_nombre']),
+        'cliente_apellido': _texto(datos['cliente_apellido']),
+        'cliente_celular': celular,
+        'celular_normalizado': normalizar_celular(celular),
+        'producto': _texto(datos['producto']),
+        'descripcion': _texto(datos.get('descripcion')),
+        'costo_reparacion': costo,
+        'estado': estado,
+        'notas': _texto(datos.get('notas')),
+        'fecha_ingreso': normalizar_fecha(datos.get('fecha_ingreso')),
+        'fecha_retiro': normalizar_fecha(datos.get('fecha_retiro')),
+    }
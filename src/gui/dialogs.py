@@ -4,9 +4,16 @@ Diálogos personalizados para InstaFix
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from typing import Optional, Dict
+from typing import Callable, Optional, Dict, List
 import os
 import re
+import time
+from datetime import date, datetime, timedelta
+
+from database.validacion import PATRON_CELULAR, normalizar_celular
+
+# Espera tras escribir el celular antes de buscar al cliente
+DEMORA_BUSQUEDA_CLIENTE_MS = 300
 
 def maximize_window(window):
     """
@@ -52,7 +59,8 @@ def try_maximize(window):
 class ReparacionDialog:
     """Diálogo para crear/editar reparaciones"""
     
-    def __init__(self, parent, title: str, reparacion: Optional[Dict] = None):
+    def __init__(self, parent, title: str, reparacion: Optional[Dict] = None,
+                 buscar_cliente: Optional[Callable[[str, Callable], None]] = None):
         """
         Inicializar diálogo de reparación
         
@@ -60,10 +68,17 @@ class ReparacionDialog:
             parent: Ventana padre
             title (str): Título del diálogo
             reparacion (Optional[Dict]): Datos de reparación existente para editar
+            buscar_cliente (Optional[Callable]): buscar_cliente(celular, entregar) busca
+                la ficha del cliente de ese celular y luego llama, en el hilo de Tk, a
+                entregar(cliente) con el Dict de DatabaseManager.obtener_cliente (o None)
         """
         self.parent = parent
         self.result = None
         self.reparacion = reparacion
+        self.buscar_cliente = buscar_cliente
+        self._busqueda_cliente = None
+        self._celular_consultado: Optional[str] = None
+        self._autocompletado: Dict[str, str] = {}
         
         # Crear ventana
         self.dialog = tk.Toplevel(parent)
@@ -134,6 +149,13 @@ class ReparacionDialog:
                                              font=('Arial', 11))
         self.cliente_celular_entry.grid(row=0, column=5, pady=10, sticky=tk.EW)
         
+        # Row 2: Cliente reconocido por el celular
+        self.cliente_info_var = tk.StringVar()
+        ttk.Label(cliente_frame, textvariable=self.cliente_info_var, foreground='#666666').grid(
+            row=1, column=0, columnspan=6, sticky=tk.W)
+        if self.buscar_cliente is not None:
+            self.cliente_celular_var.trace_add('write', self._on_celular_cambiado)
+        
         # Frame de datos de la reparación
         reparacion_frame = ttk.LabelFrame(main_frame, text="🔧 Datos de la Reparación", padding="15")
         reparacion_frame.pack(fill=tk.X, pady=(0, 15))
@@ -309,6 +331,54 @@ class ReparacionDialog:
             self.notas_text.insert(tk.END, self.reparacion['notas'])
             self.notas_text.config(fg='black')
     
+    def _on_celular_cambiado(self, *args):
+        """Buscar al cliente cuando se deja de escribir el celular"""
+        if self._busqueda_cliente is not None:
+            self.dialog.after_cancel(self._busqueda_cliente)
+        self._busqueda_cliente = self.dialog.after(DEMORA_BUSQUEDA_CLIENTE_MS,
+                                                   self._buscar_cliente_celular)
+    
+    def _buscar_cliente_celular(self):
+        """Pedir la ficha del cliente si el celular está completo y cambió"""
+        self._busqueda_cliente = None
+        if not self.dialog.winfo_exists():
+            return
+        celular = normalizar_celular(self.cliente_celular_var.get())
+        if celular is None:
+            self._celular_consultado = None
+            self.cliente_info_var.set("")
+            return
+        if celular == self._celular_consultado:
+            return
+        
+        self._celular_consultado = celular
+        self.buscar_cliente(celular, self._completar_cliente)
+    
+    def _completar_cliente(self, cliente: Optional[Dict]):
+        """Completar nombre y apellido de un cliente conocido sin pisar lo que se escribió"""
+        # La ventana pudo cerrarse, o el celular cambiar, mientras se buscaba
+        if not self.dialog.winfo_exists():
+            return
+        if normalizar_celular(self.cliente_celular_var.get()) != self._celular_consultado:
+            return
+        
+        if cliente is None:
+            self.cliente_info_var.set("")
+            return
+        
+        for campo, variable, valor in (('nombre', self.cliente_nombre_var, cliente['nombre']),
+                                       ('apellido', self.cliente_apellido_var, cliente['apellido'])):
+            actual = variable.get().strip()
+            if not actual or actual == self._autocompletado.get(campo):
+                variable.set(valor)
+                self._autocompletado[campo] = valor
+        
+        cantidad = cliente['reparaciones']
+        anteriores = "1 reparación anterior" if cantidad == 1 else f"{cantidad} reparaciones anteriores"
+        self.cliente_info_var.set(
+            f"👤 Cliente conocido: {cliente['nombre']} {cliente['apellido']} ({anteriores})"
+        )
+    
     def _validate_cost(self, event=None):
         """Validar entrada de costo"""
         valor = self.costo_var.get()
@@ -342,7 +412,7 @@ class ReparacionDialog:
         
         # Validar formato de celular
         celular = self.cliente_celular_var.get().strip()
-        if not re.match(r'^[\d\s\-\(\)\+]*$', celular):
+        if not PATRON_CELULAR.match(celular):
             messagebox.showerror("Error", "Formato de celular inválido")
             self.cliente_celular_entry.focus_set()
             return
@@ -734,4 +804,497 @@ class ConfigDialog:
     def _cancel(self):
         """Cancelar diálogo"""
         self.result = None
-        self.dialog.destroy()
\ No newline at end of file
+        self.dialog.destroy()
+
+class EstadisticasDialog:
+    """Ventana de estadísticas del negocio (calculadas desde los resúmenes diarios)"""
+    
+    # Texto del selector -> días hacia atrás (None = todo el historial)
+    PERIODOS = {
+        "Últimos 30 días": 30,
+        "Últimos 3 meses": 91,
+        "Último año": 365,
+        "Todo": None
+    }
+    
+    AGRUPACIONES = {
+        "Por día": 'dia',
+        "Por semana": 'semana',
+        "Por mes": 'mes'
+    }
+    
+    COLUMNAS = ('ingresos', 'retiros', 'facturado', 'promedio_dias')
+    
+    def __init__(self, parent, db_manager, trabajador=None):
+        """
+        Inicializar ventana de estadísticas
+        
+        Args:
+            parent: Ventana padre
+            db_manager: Gestor de base de datos
+            trabajador: TrabajadorBD opcional para consultar sin bloquear la interfaz
+        """
+        self.parent = parent
+        self.db_manager = db_manager
+        self.trabajador = trabajador
+        
+        # Crear ventana
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("📊 Estadísticas")
+        self.dialog.resizable(True, True)
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        # Maximizar ventana
+        self._center_window()
+        
+        # Crear interfaz
+        self._create_widgets()
+        
+        # Cargar datos
+        self._load_data()
+        
+        # Esperar cierre
+        self.dialog.wait_window()
+    
+    def _center_window(self):
+        """Maximizar ventana del diálogo"""
+        maximize_window(self.dialog)
+    
+    def _create_widgets(self):
+        """Crear widgets de la ventana"""
+        main_frame = ttk.Frame(self.dialog, padding="20")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Título
+        title_label = ttk.Label(main_frame, text="📊 Estadísticas del negocio",
+                                font=('Arial', 14, 'bold'))
+        title_label.pack(pady=(0, 15))
+        
+        # Reparaciones por estado (contadores)
+        estados_frame = ttk.LabelFrame(main_frame, text="📋 Reparaciones por estado", padding="10")
+        estados_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        self.estados_var = tk.StringVar()
+        ttk.Label(estados_frame, textvariable=self.estados_var).pack(anchor=tk.W)
+        
+        # Filtros
+        filtros_frame = ttk.Frame(main_frame)
+        filtros_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        ttk.Label(filtros_frame, text="Período:").pack(side=tk.LEFT)
+        self.periodo_var = tk.StringVar(value="Últimos 3 meses")
+        periodo_combo = ttk.Combobox(filtros_frame, textvariable=self.periodo_var,
+                                     values=list(self.PERIODOS), state="readonly", width=18)
+        periodo_combo.pack(side=tk.LEFT, padx=(5, 20))
+        periodo_combo.bind('<<ComboboxSelected>>', lambda e: self._load_data())
+        
+        ttk.Label(filtros_frame, text="Agrupar:").pack(side=tk.LEFT)
+        self.agrupar_var = tk.StringVar(value="Por semana")
+        agrupar_combo = ttk.Combobox(filtros_frame, textvariable=self.agrupar_var,
+                                     values=list(self.AGRUPACIONES), state="readonly", width=14)
+        agrupar_combo.pack(side=tk.LEFT, padx=(5, 0))
+        agrupar_combo.bind('<<ComboboxSelected>>', lambda e: self._load_data())
+        
+        # Totales por período
+        periodos_frame = ttk.LabelFrame(main_frame, text="💰 Facturación e ingresos", padding="10")
+        periodos_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+        self.periodos_tree = self._crear_tabla(periodos_frame, "Período")
+        
+        # Totales por producto
+        productos_frame = ttk.LabelFrame(main_frame, text="🔧 Reparaciones por producto", padding="10")
+        productos_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+        self.productos_tree = self._crear_tabla(productos_frame, "Producto")
+        
+        # Pie: tiempo de cálculo y cierre
+        footer_frame = ttk.Frame(main_frame)
+        footer_frame.pack(fill=tk.X)
+        
+        self.info_var = tk.StringVar()
+        ttk.Label(footer_frame, textvariable=self.info_var).pack(side=tk.LEFT)
+        ttk.Button(footer_frame, text="Cerrar", command=self.dialog.destroy).pack(side=tk.RIGHT)
+    
+    def _crear_tabla(self, parent, titulo: str) -> ttk.Treeview:
+        """Crear una tabla de totales con su scrollbar"""
+        columnas = ('clave',) + self.COLUMNAS
+        tree = ttk.Treeview(parent, columns=columnas, show='headings', height=8)
+        
+        encabezados = {
+            'clave': titulo,
+            'ingresos': "Ingresos",
+            'retiros': "Retiros",
+            'facturado': "Facturado",
+            'promedio_dias': "Días promedio"
+        }
+        for columna in columnas:
+            tree.heading(columna, text=encabezados[columna])
+            tree.column(columna, width=140, anchor=tk.W if columna == 'clave' else tk.E)
+        
+        scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        return tree
+    
+    def _llenar_tabla(self, tree: ttk.Treeview, filas: list, clave: str):
+        """Reemplazar el contenido de una tabla de totales"""
+        tree.delete(*tree.get_children())
+        
+        for fila in filas:
+            promedio = fila['promedio_dias']
+            tree.insert('', tk.END, values=(
+                fila[clave],
+                fila['ingresos'],
+                fila['retiros'],
+                f"${fila['facturado']:,.2f}",
+                f"{promedio:.1f}" if promedio is not None else "-"
+            ))
+    
+    def _load_data(self):
+        """Cargar estadísticas para el período y la agrupación elegidos"""
+        inicio = time.perf_counter()
+        
+        dias = self.PERIODOS[self.periodo_var.get()]
+        desde = date.today() - timedelta(days=dias) if dias else None
+        agrupar = self.AGRUPACIONES[self.agrupar_var.get()]
+        
+        def consultar():
+            return (self.db_manager.obtener_estadisticas(),
+                    self.db_manager.obtener_resumen_periodos(desde=desde, agrupar=agrupar),
+                    self.db_manager.obtener_resumen_productos(desde=desde))
+        
+        def mostrar(resultado):
+            # La ventana pudo cerrarse mientras se consultaba
+            if self.dialog.winfo_exists():
+                self._mostrar_datos(*resultado, inicio)
+        
+        def fallar(e: Exception):
+            messagebox.showerror("Error", f"Error al obtener estadísticas:\n{e}")
+        
+        if self.trabajador is not None:
+            self.info_var.set("Calculando...")
+            self.trabajador.enviar(consultar, al_terminar=mostrar, al_fallar=fallar)
+            return
+        
+        try:
+            mostrar(consultar())
+        except Exception as e:
+            fallar(e)
+    
+    def _mostrar_datos(self, stats: dict, periodos: list, productos: list, inicio: float):
+        """Mostrar las estadísticas consultadas"""
+        self.estados_var.set(
+            f"Total: {stats['total']}   ⏳ Pendientes: {stats['pendiente']}   "
+            f"🔧 En proceso: {stats['en_proceso']}   ✅ Finalizadas: {stats['finalizado']}   "
+            f"📦 Retiradas: {stats['retirado']}"
+        )
+        
+        # Los períodos más recientes primero
+        self._llenar_tabla(self.periodos_tree, list(reversed(periodos)), 'periodo')
+        self._llenar_tabla(self.productos_tree, productos, 'producto')
+        
+        facturado = sum(fila['facturado'] for fila in periodos)
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+        self.info_var.set(f"Facturado en el período: ${facturado:,.2f}   "
+                          f"(calculado en {duracion_ms:.0f} ms)")
+
+
+def _texto_estado(estado: Optional[str]) -> str:
+    """Estado para mostrar ('en_proceso' -> 'En Proceso')"""
+    return estado.replace('_', ' ').title() if estado else '—'
+
+
+def _texto_duracion(segundos: float) -> str:
+    """Duración legible: '3 d 4 h', '2 h 15 min' o '5 min'"""
+    minutos = int(segundos // 60)
+    dias, minutos = divmod(minutos, 24 * 60)
+    horas, minutos = divmod(minutos, 60)
+    if dias:
+        return f"{dias} d {horas} h"
+    if horas:
+        return f"{horas} h {minutos} min"
+    return f"{minutos} min"
+
+
+class HistorialDialog:
+    """Ventana con la línea de tiempo de estados de una o varias reparaciones"""
+    
+    COLUMNAS = ('fecha', 'cambio', 'duracion', 'notas')
+    
+    def __init__(self, parent, reparaciones: List[Dict], historiales: Dict[str, List[Dict]]):
+        """
+        Inicializar ventana de historial
+        
+        Args:
+            parent: Ventana padre
+            reparaciones (List[Dict]): 'numero_presupuesto' y 'descripcion' (cliente y
+                producto) de cada reparación, en el orden a mostrar
+            historiales (Dict[str, List[Dict]]): Cambios por número, como los devuelve
+                DatabaseManager.obtener_historiales_estados
+        """
+        self.parent = parent
+        self.reparaciones = reparaciones
+        self.historiales = historiales
+        
+        # Crear ventana
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("📋 Historial de estados")
+        self.dialog.geometry("900x500")
+        self.dialog.resizable(True, True)
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        # Crear interfaz
+        self._create_widgets()
+        self._llenar()
+        
+        self.dialog.bind('<Escape>', lambda e: self.dialog.destroy())
+        
+        # Esperar cierre
+        self.dialog.wait_window()
+    
+    def _create_widgets(self):
+        """Crear widgets de la ventana"""
+        main_frame = ttk.Frame(self.dialog, padding="20")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        if len(self.reparaciones) == 1:
+            titulo = (f"📋 {self.reparaciones[0]['numero_presupuesto']} — "
+                      f"{self.reparaciones[0]['descripcion']}")
+        else:
+            titulo = f"📋 Historial de {len(self.reparaciones)} reparaciones"
+        ttk.Label(main_frame, text=titulo, font=('Arial', 14, 'bold')).pack(pady=(0, 15))
+        
+        tabla_frame = ttk.Frame(main_frame)
+        tabla_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+        
+        # Con varias reparaciones cada una es un nodo con sus cambios adentro
+        varias = len(self.reparaciones) > 1
+        self.tree = ttk.Treeview(tabla_frame, columns=self.COLUMNAS,
+                                 show='tree headings' if varias else 'headings')
+        if varias:
+            self.tree.heading('#0', text="Reparación")
+            self.tree.column('#0', width=260)
+        
+        encabezados = {
+            'fecha': ("Fecha", 150),
+            'cambio': ("Cambio de estado", 220),
+            'duracion': ("Tiempo en el estado", 140),
+            'notas': ("Notas", 300)
+        }
+        for columna in self.COLUMNAS:
+            texto, ancho = encabezados[columna]
+            self.tree.heading(columna, text=texto)
+            self.tree.column(columna, width=ancho, anchor=tk.W)
+        
+        scrollbar = ttk.Scrollbar(tabla_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        ttk.Button(main_frame, text="Cerrar", command=self.dialog.destroy).pack(side=tk.RIGHT)
+    
+    def _llenar(self):
+        """Cargar los cambios de cada reparación en la tabla"""
+        varias = len(self.reparaciones) > 1
+        ahora = datetime.now()
+        
+        for reparacion in self.reparaciones:
+            numero = reparacion['numero_presupuesto']
+            cambios = self.historiales.get(numero, [])
+            
+            padre = ''
+            if varias:
+                padre = self.tree.insert('', tk.END, text=f"{numero} — {reparacion['descripcion']}",
+                                         values=('', f"{len(cambios)} cambios", '', ''), open=True)
+            
+            if not cambios:
+                self.tree.insert(padre, tk.END, values=('', "Sin cambios registrados", '', ''))
+                continue
+            
+            fechas = []
+            for cambio in cambios:
+                try:
+                    fechas.append(datetime.fromisoformat(cambio['fecha_cambio']))
+                except (TypeError, ValueError):
+                    fechas.append(None)
+            
+            for i, cambio in enumerate(cambios):
+                # Tiempo hasta el cambio siguiente; el último estado sigue vigente
+                fin = fechas[i + 1] if i + 1 < len(cambios) else ahora
+                duracion = ''
+                if fechas[i] is not None and fin is not None:
+                    duracion = _texto_duracion(max((fin - fechas[i]).total_seconds(), 0))
+                    if i + 1 == len(cambios):
+                        duracion += " (actual)"
+                
+                if cambio['estado_anterior']:
+                    texto_cambio = (f"{_texto_estado(cambio['estado_anterior'])} → "
+                                    f"{_texto_estado(cambio['estado_nuevo'])}")
+                else:
+                    texto_cambio = _texto_estado(cambio['estado_nuevo'])
+                
+                self.tree.insert(padre, tk.END, values=(
+                    cambio['fecha_cambio'], texto_cambio, duracion, cambio['notas'] or ''
+                ))
+
+
+class ArchivoDialog:
+    """Ventana para buscar reparaciones archivadas y devolverlas al listado"""
+    
+    COLUMNAS = ('numero', 'cliente', 'celular', 'producto', 'costo', 'ingreso')
+    
+    # Reparaciones archivadas que se muestran por búsqueda
+    LIMITE_RESULTADOS = 500
+    
+    def __init__(self, parent, db_manager, trabajador,
+                 al_restaurar: Optional[Callable[[int], None]] = None):
+        """
+        Inicializar ventana del archivo
+        
+        Args:
+            parent: Ventana padre
+            db_manager: Gestor de base de datos
+            trabajador: TrabajadorBD que ejecuta las consultas
+            al_restaurar (Optional[Callable[[int], None]]): Recibe la cantidad de
+                reparaciones restauradas (para actualizar el listado)
+        """
+        self.parent = parent
+        self.db_manager = db_manager
+        self.trabajador = trabajador
+        self.al_restaurar = al_restaurar
+        
+        # Crear ventana
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("🗄️ Archivo de reparaciones")
+        self.dialog.geometry("950x550")
+        self.dialog.resizable(True, True)
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        # Crear interfaz
+        self._create_widgets()
+        self._buscar()
+        
+        self.dialog.bind('<Escape>', lambda e: self.dialog.destroy())
+        
+        # Esperar cierre
+        self.dialog.wait_window()
+    
+    def _create_widgets(self):
+        """Crear widgets de la ventana"""
+        main_frame = ttk.Frame(self.dialog, padding="20")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(main_frame, text="🗄️ Reparaciones archivadas",
+                  font=('Arial', 14, 'bold')).pack(pady=(0, 15))
+        
+        # Búsqueda
+        busqueda_frame = ttk.Frame(main_frame)
+        busqueda_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        ttk.Label(busqueda_frame, text="🔍 Buscar:").pack(side=tk.LEFT, padx=(0, 5))
+        self.busqueda_var = tk.StringVar()
+        entrada = ttk.Entry(busqueda_frame, textvariable=self.busqueda_var, width=30)
+        entrada.pack(side=tk.LEFT, padx=(0, 10))
+        entrada.bind('<Return>', lambda e: self._buscar())
+        entrada.focus()
+        ttk.Button(busqueda_frame, text="Buscar", command=self._buscar).pack(side=tk.LEFT)
+        
+        # Resultados
+        tabla_frame = ttk.Frame(main_frame)
+        tabla_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+        
+        self.tree = ttk.Treeview(tabla_frame, columns=self.COLUMNAS, show='headings')
+        encabezados = {
+            'numero': ("N° Presupuesto", 120),
+            'cliente': ("Cliente", 200),
+            'celular': ("Celular", 130),
+            'producto': ("Producto", 180),
+            'costo': ("Costo", 100),
+            'ingreso': ("Ingreso", 100)
+        }
+        for columna in self.COLUMNAS:
+            texto, ancho = encabezados[columna]
+            self.tree.heading(columna, text=texto)
+            self.tree.column(columna, width=ancho, anchor=tk.W)
+        
+        scrollbar = ttk.Scrollbar(tabla_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # Estado y botones
+        botones_frame = ttk.Frame(main_frame)
+        botones_frame.pack(fill=tk.X)
+        
+        self.info_var = tk.StringVar()
+        ttk.Label(botones_frame, textvariable=self.info_var).pack(side=tk.LEFT)
+        
+        ttk.Button(botones_frame, text="Cerrar", command=self.dialog.destroy).pack(side=tk.RIGHT)
+        ttk.Button(botones_frame, text="♻️ Restaurar seleccionadas",
+                   command=self._restaurar).pack(side=tk.RIGHT, padx=(0, 10))
+    
+    def _buscar(self):
+        """Buscar en el archivo con el texto ingresado"""
+        termino = self.busqueda_var.get().strip()
+        
+        def mostrar(reparaciones: List[Dict]):
+            # La ventana pudo cerrarse mientras se consultaba
+            if self.dialog.winfo_exists():
+                self._mostrar(reparaciones)
+        
+        def fallar(e: Exception):
+            messagebox.showerror("Error", f"Error al buscar en el archivo:\n{e}", parent=self.dialog)
+        
+        self.info_var.set("Buscando...")
+        self.trabajador.enviar(self.db_manager.buscar_archivo, termino,
+                               limite=self.LIMITE_RESULTADOS,
+                               al_terminar=mostrar, al_fallar=fallar)
+    
+    def _mostrar(self, reparaciones: List[Dict]):
+        """Reemplazar los resultados de la tabla"""
+        self.tree.delete(*self.tree.get_children())
+        
+        for reparacion in reparaciones:
+            costo = reparacion['costo_reparacion']
+            self.tree.insert('', tk.END, iid=reparacion['numero_presupuesto'], values=(
+                reparacion['numero_presupuesto'],
+                f"{reparacion['cliente_nombre']} {reparacion['cliente_apellido']}",
+                reparacion['cliente_celular'],
+                reparacion['producto'],
+                f"${costo:,.2f}" if costo is not None else "-",
+                (reparacion['fecha_ingreso'] or '')[:10]
+            ))
+        
+        if len(reparaciones) >= self.LIMITE_RESULTADOS:
+            self.info_var.set(f"Primeras {len(reparaciones)} reparaciones archivadas")
+        else:
+            self.info_var.set(f"{len(reparaciones)} reparaciones archivadas")
+    
+    def _restaurar(self):
+        """Devolver las reparaciones seleccionadas al listado principal"""
+        numeros = list(self.tree.selection())
+        if not numeros:
+            messagebox.showwarning("Advertencia", "Selecciona una reparación", parent=self.dialog)
+            return
+        
+        if not messagebox.askyesno("Confirmar",
+                                   f"¿Restaurar {len(numeros)} reparaciones al listado?",
+                                   parent=self.dialog):
+            return
+        
+        def restauradas(cantidad: int):
+            if self.al_restaurar:
+                self.al_restaurar(cantidad)
+            if self.dialog.winfo_exists():
+                for numero in numeros:
+                    if self.tree.exists(numero):
+                        self.tree.delete(numero)
+                self.info_var.set(f"{cantidad} reparaciones restauradas")
+        
+        def fallar(e: Exception):
+            messagebox.showerror("Error", f"Error al restaurar:\n{e}", parent=self.dialog)
+        
+        self.trabajador.enviar(self.db_manager.restaurar_reparaciones, numeros,
+                               al_terminar=restauradas, al_fallar=fallar)
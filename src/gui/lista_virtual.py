@@ -0,0 +1,301 @@
+"""
+Lista virtual para la tabla principal
+El Treeview contiene sólo las filas visibles; el resto se pide a la base por bloques
+"""
+
+from tkinter import ttk
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from .tabla import ReconciliadorTabla, Fila
+
+logger = logging.getLogger(__name__)
+
+# Alto de fila que usa ttk cuando el tema no define uno
+ALTO_FILA_PREDETERMINADO = 20
+
+# Filas por paso de la rueda del mouse
+FILAS_POR_PASO_RUEDA = 3
+
+
+class ListaVirtual:
+    """
+    Vista desplazable sobre un resultado de 'total' filas con sólo la ventana visible en el Treeview
+
+    La barra de desplazamiento representa el total (obtenido con COUNT) y no las
+    filas cargadas. Las filas se piden por bloques alineados de tamaño fijo y se
+    guardan los últimos bloques usados como búfer; un bloque contiguo al anterior
+    se pide con el cursor de éste (paginación por clave) y un salto con OFFSET.
+    Los bloques llegan de forma asíncrona: mientras falta alguno la tabla sigue
+    mostrando las filas anteriores y se vuelve a dibujar cuando llega.
+    Mientras no está activa la tabla se comporta como un Treeview normal.
+    """
+
+    def __init__(self, tabla: ReconciliadorTabla, scrollbar: ttk.Scrollbar,
+                 obtener_bloque: Callable[[int, object, int, Callable], None],
+                 formatear: Callable[[Dict], Fila],
+                 tamano_bloque: int = 200, bloques_en_memoria: int = 8):
+        """
+        Args:
+            tabla (ReconciliadorTabla): Reconciliador del Treeview a virtualizar
+            scrollbar (ttk.Scrollbar): Barra vertical de la tabla
+            obtener_bloque (Callable): obtener_bloque(desplazamiento, cursor, cantidad, entregar)
+                pide el bloque y luego llama, en el hilo de Tk, a entregar(bloque) con un
+                Dict con 'reparaciones' y 'siguiente' como consultar_reparaciones (o None
+                si falló)
+            formatear (Callable): Convierte una fila de la base en (iid, valores, tags)
+            tamano_bloque (int): Filas por bloque pedido a la base
+            bloques_en_memoria (int): Bloques que se conservan como búfer
+        """
+        self.tabla = tabla
+        self.tree = tabla.tree
+        self.scrollbar = scrollbar
+        self.obtener_bloque = obtener_bloque
+        self.formatear = formatear
+        self.tamano_bloque = tamano_bloque
+        self.bloques_en_memoria = bloques_en_memoria
+
+        self.activa = False
+        self.total = 0
+        self.inicio = 0
+        self._bloques: 'OrderedDict[int, Dict]' = OrderedDict()
+        self._pedidos = set()
+        self._generacion = 0
+        self._seleccion = set()
+        self._seleccion_dibujada = set()
+        self._posicion_a_seleccionar: Optional[int] = None
+
+        self.tree.bind('<Configure>', self._on_configure, add='+')
+        self.tree.bind('<<TreeviewSelect>>', self._on_seleccion, add='+')
+        self.tree.bind('<MouseWheel>', self._on_rueda, add='+')
+        self.tree.bind('<Button-4>', self._on_rueda, add='+')
+        self.tree.bind('<Button-5>', self._on_rueda, add='+')
+        for tecla, paso in (('<Up>', -1), ('<Down>', 1), ('<Prior>', None), ('<Next>', None)):
+            self.tree.bind(tecla, lambda event, paso=paso: self._on_tecla(event, paso), add='+')
+
+    # --- Estado ---
+
+    def activar(self, total: int, conservar_posicion: bool = False,
+                primer_bloque: Optional[Dict] = None):
+        """
+        Mostrar un resultado nuevo (o el mismo actualizado) en modo virtual
+
+        Args:
+            total (int): Cantidad de filas del resultado completo
+            conservar_posicion (bool): True para seguir en la misma posición
+            primer_bloque (Optional[Dict]): Primera página ya consultada (de tamano_bloque
+                filas), para no volver a pedirla
+        """
+        self.activa = True
+        self.total = total
+        self._limpiar_bloques()
+        if primer_bloque is not None:
+            self._bloques[0] = primer_bloque
+        if not conservar_posicion:
+            self.inicio = 0
+            self._seleccion.clear()
+            self._seleccion_dibujada = set()
+        self.scrollbar.configure(command=self._on_scrollbar)
+        self.renderizar()
+
+    def desactivar(self):
+        """Volver al Treeview normal (la tabla queda como está para reconciliarla luego)"""
+        if not self.activa:
+            return
+        self.activa = False
+        self._limpiar_bloques()
+        self._seleccion.clear()
+        self.scrollbar.configure(command=self.tree.yview)
+
+    def filas_visibles(self) -> int:
+        """Cantidad de filas que entran en el alto actual de la tabla"""
+        alto_fila = ttk.Style().lookup('Treeview', 'rowheight')
+        try:
+            alto_fila = int(alto_fila) or ALTO_FILA_PREDETERMINADO
+        except (TypeError, ValueError):
+            alto_fila = ALTO_FILA_PREDETERMINADO
+
+        alto = self.tree.winfo_height()
+        if alto <= 1:
+            # Todavía no se dibujó: usar la altura configurada en filas
+            return int(self.tree.cget('height'))
+        # Una fila menos por el encabezado
+        return max(1, alto // alto_fila - 1)
+
+    # --- Datos ---
+
+    def _limpiar_bloques(self):
+        """Olvidar el búfer; los bloques pedidos antes de esto se descartan al llegar"""
+        self._bloques.clear()
+        self._pedidos.clear()
+        self._generacion += 1
+
+    def _pedir_bloque(self, numero: int):
+        """Pedir un bloque a la base si no está ni en el búfer ni pedido"""
+        if numero in self._bloques or numero in self._pedidos:
+            return
+
+        generacion = self._generacion
+        self._pedidos.add(numero)
+
+        def entregar(bloque: Optional[Dict]):
+            if generacion != self._generacion:
+                return
+            self._pedidos.discard(numero)
+            if bloque is None:
+                logger.error(f"No se pudo obtener el bloque {numero} de la lista virtual")
+                return
+            self._bloques[numero] = bloque
+            self.renderizar()
+
+        anterior = self._bloques.get(numero - 1)
+        if anterior is not None and anterior['siguiente'] is not None:
+            self.obtener_bloque(0, anterior['siguiente'], self.tamano_bloque, entregar)
+        else:
+            self.obtener_bloque(numero * self.tamano_bloque, None, self.tamano_bloque, entregar)
+
+    def _filas(self, inicio: int, fin: int) -> Optional[List[Dict]]:
+        """
+        Filas del resultado entre las posiciones inicio (incluida) y fin (excluida)
+
+        Devuelve None (y pide lo que falta) si algún bloque todavía no llegó.
+        """
+        numeros = range(inicio // self.tamano_bloque, (fin - 1) // self.tamano_bloque + 1)
+        faltantes = [numero for numero in numeros if numero not in self._bloques]
+        for numero in faltantes:
+            self._pedir_bloque(numero)
+        if faltantes:
+            return None
+
+        filas = []
+        for numero in numeros:
+            base = numero * self.tamano_bloque
+            self._bloques.move_to_end(numero)
+            filas.extend(self._bloques[numero]['reparaciones'][max(inicio - base, 0):fin - base])
+
+        # Recortar el búfer sin descartar los bloques de la ventana actual
+        while len(self._bloques) > max(self.bloques_en_memoria, len(numeros)):
+            self._bloques.popitem(last=False)
+        return filas
+
+    def renderizar(self):
+        """Dejar en el Treeview sólo las filas de la ventana visible"""
+        if not self.activa:
+            return
+
+        visibles = self.filas_visibles()
+        self.inicio = max(0, min(self.inicio, self.total - visibles))
+        fin = min(self.total, self.inicio + visibles)
+
+        # La barra sigue al usuario aunque las filas todavía no hayan llegado
+        if self.total:
+            self.scrollbar.set(self.inicio / self.total, fin / self.total)
+        else:
+            self.scrollbar.set(0, 1)
+
+        filas = self._filas(self.inicio, fin) if fin else []
+        if filas is None:
+            return
+
+        filas = [self.formatear(fila) for fila in filas]
+        self.tabla.reconciliar(filas)
+
+        # El resultado pudo achicarse desde el COUNT: ajustar el total
+        if fin and len(filas) < fin - self.inicio:
+            self.total = self.inicio + len(filas)
+
+        presentes = {iid for iid in self._seleccion if iid in self.tabla}
+        if set(self.tree.selection()) != presentes:
+            self.tree.selection_set(list(presentes))
+        self._seleccion_dibujada = presentes
+
+        # Fila elegida con el teclado cuya ventana acaba de llegar
+        if self._posicion_a_seleccionar is not None:
+            hijos = self.tree.get_children()
+            indice = self._posicion_a_seleccionar - self.inicio
+            self._posicion_a_seleccionar = None
+            if 0 <= indice < len(hijos):
+                self._seleccion = self._seleccion_dibujada = {hijos[indice]}
+                self.tree.selection_set(hijos[indice])
+                self.tree.focus(hijos[indice])
+                self.tree.see(hijos[indice])
+
+    def desplazar(self, inicio: int):
+        """Llevar la ventana a la fila indicada y volver a dibujar si cambió"""
+        inicio = max(0, min(inicio, self.total - self.filas_visibles()))
+        if inicio != self.inicio:
+            self.inicio = inicio
+            self.renderizar()
+
+    # --- Eventos ---
+
+    def _on_scrollbar(self, *args):
+        """Comando de la barra: 'moveto fracción' o 'scroll n units|pages'"""
+        if args[0] == 'moveto':
+            self.desplazar(int(float(args[1]) * self.total))
+        elif args[0] == 'scroll':
+            paso = int(args[1])
+            if args[2] == 'pages':
+                paso *= max(1, self.filas_visibles() - 1)
+            self.desplazar(self.inicio + paso)
+
+    def _on_rueda(self, event):
+        """Rueda del mouse: desplazar la ventana en lugar del Treeview"""
+        if not self.activa:
+            return None
+
+        if event.num == 4:
+            pasos = -1
+        elif event.num == 5:
+            pasos = 1
+        else:
+            pasos = -1 if event.delta > 0 else 1
+
+        self.desplazar(self.inicio + pasos * FILAS_POR_PASO_RUEDA)
+        return 'break'
+
+    def _on_tecla(self, event, paso: Optional[int]):
+        """Flechas y Re Pág/Av Pág: mover la selección y la ventana más allá de sus bordes"""
+        if not self.activa:
+            return None
+
+        hijos = self.tree.get_children()
+        foco = self.tree.focus()
+        if not hijos or foco not in hijos:
+            return None
+
+        visibles = self.filas_visibles()
+        if paso is None:
+            paso = -visibles if event.keysym == 'Prior' else visibles
+
+        # Dentro de la ventana las flechas las resuelve el Treeview
+        posicion = hijos.index(foco) + paso
+        if abs(paso) == 1 and 0 <= posicion < len(hijos):
+            return None
+
+        # La selección se aplica al dibujar, cuando las filas de la ventana ya llegaron
+        objetivo = max(0, min(self.total - 1, self.inicio + posicion))
+        self._posicion_a_seleccionar = objetivo
+        if objetivo < self.inicio:
+            self.inicio = objetivo
+        elif objetivo >= self.inicio + visibles:
+            self.inicio = objetivo - visibles + 1
+        self.renderizar()
+        return 'break'
+
+    def _on_seleccion(self, event):
+        """Recordar la selección del usuario aunque la fila salga de la ventana"""
+        if not self.activa:
+            return
+
+        # Los eventos que genera renderizar() al quitar filas no cambian la selección
+        actual = set(self.tree.selection())
+        if actual != self._seleccion_dibujada:
+            self._seleccion = actual
+            self._seleccion_dibujada = actual
+
+    def _on_configure(self, event):
+        """Al cambiar el alto de la tabla entran más o menos filas"""
+        if self.activa:
+            self.renderizar()
@@ -13,6 +13,8 @@ import os
 import subprocess
 import tempfile
 import platform
+import threading
+import time
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
@@ -22,11 +24,55 @@ from reportlab.lib import colors
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.db_manager import DatabaseManager
+from database.archivado import ANTIGUEDAD_POR_DEFECTO_DIAS, antiguedad_desde_entorno
 from whatsapp.client import WhatsAppClient
-from .dialogs import ReparacionDialog, ConfigDialog
+from .dialogs import (
+    ReparacionDialog, ConfigDialog, EstadisticasDialog, HistorialDialog, ArchivoDialog
+)
+from .tabla import ReconciliadorTabla
+from .lista_virtual import ListaVirtual
+from .trabajador import TrabajadorBD
 
 logger = logging.getLogger(__name__)
 
+# Reparaciones por página del listado principal
+TAMANO_PAGINA = 200
+
+# A partir de cuántas reparaciones el listado pasa a lista virtual
+# (el Treeview guarda sólo las filas visibles en lugar de todas las cargadas)
+UMBRAL_LISTA_VIRTUAL = 5000
+
+# Cada cuánto se actualiza el progreso de las tareas en segundo plano
+INTERVALO_PROGRESO_MS = 150
+
+# Cada cuánto se revisa si otro equipo o proceso modificó la base
+INTERVALO_SONDEO_MS = 2000
+
+# Cada cuántas revisiones se podan los cambios viejos del registro (unos 5 minutos)
+SONDEOS_ENTRE_PODAS = 150
+
+# Demora antes de mostrar el indicador de actividad (las consultas rápidas no lo muestran)
+DEMORA_INDICADOR_MS = 200
+
+# Espera tras cada tecla de la búsqueda: se adapta a lo que tardan las consultas
+# (las rápidas casi no esperan; las lentas esperan más para no lanzarse de más)
+DEMORA_BUSQUEDA_MIN_MS = 40
+DEMORA_BUSQUEDA_MAX_MS = 600
+DEMORA_BUSQUEDA_INICIAL_MS = 150
+
+# Reparaciones seleccionadas cuyo historial se muestra a la vez
+MAXIMO_HISTORIALES = 200
+
+# Clientes o productos parecidos que se sugieren cuando una búsqueda no encuentra nada
+SUGERENCIAS_SIN_RESULTADOS = 3
+
+# Mantenimiento liviano de la base cuando nadie usa la aplicación: cada cuánto
+# se revisa, cuántos segundos sin teclas ni clics cuentan como inactividad y
+# cada cuántas horas corresponde
+INTERVALO_INACTIVIDAD_MS = 60000
+INACTIVIDAD_MANTENIMIENTO_S = 600
+HORAS_ENTRE_MANTENIMIENTOS = 24
+
 def maximize_window(window):
     """
     Función auxiliar para maximizar una ventana de forma multiplataforma
@@ -51,17 +97,49 @@ def maximize_window(window):
 class MainWindow:
     """Ventana principal de la aplicación"""
     
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: tk.Tk, db_manager: Optional[DatabaseManager] = None):
         """
         Inicializar la ventana principal
         
         Args:
             root (tk.Tk): Ventana raíz de Tkinter
+            db_manager (Optional[DatabaseManager]): Gestor de base de datos ya inicializado
         """
         self.root = root
-        self.db_manager = DatabaseManager()
+        self.db_manager = db_manager or DatabaseManager()
         self.whatsapp_client = WhatsAppClient()
         
+        # Estado de la paginación del listado
+        self._filtros = {}
+        self._cursor_siguiente = None
+        self._cargando_pagina = False
+        self._total_reparaciones = 0
+        
+        # Sincronización incremental: última versión del registro de cambios
+        # aplicada, último PRAGMA data_version visto y clave de orden de cada fila
+        self._version_cambios = 0
+        self._version_datos = None
+        self._claves_orden = {}
+        self._sondeos = 0
+        
+        # Exportación o importación en segundo plano (None si no hay ninguna en curso)
+        self._tarea_archivo = None
+        
+        # Todas las consultas de la ventana pasan por un hilo de trabajo; cada carga
+        # del listado tiene un número para descartar las respuestas viejas
+        self._bd = TrabajadorBD(self.root, al_cambiar_ocupado=self._on_cambio_ocupado)
+        self._carga = 0
+        self._carga_mostrada = 0
+        self._futuro_carga = None
+        self._indicador_pendiente = None
+        
+        # Último momento en que el usuario tocó una tecla o el mouse
+        self._ultima_actividad = time.monotonic()
+        
+        # Búsqueda mientras se escribe: espera pendiente y latencia medida de las cargas
+        self._search_timer = None
+        self._latencia_carga_ms: Optional[float] = None
+        
         # Configurar ventana principal
         self._setup_window()
         
@@ -74,6 +152,21 @@ class MainWindow:
         # Cargar datos iniciales
         self._load_data()
         
+        # El índice de búsqueda aproximada se arma aparte para no demorar el listado
+        threading.Thread(target=self._preparar_busqueda_aproximada,
+                         name='indice-trigramas', daemon=True).start()
+        
+        # Respaldos periódicos de la base en su propio hilo
+        self.db_manager.iniciar_respaldos_automaticos()
+        
+        # Revisar periódicamente los cambios hechos desde otros equipos
+        self.root.after(INTERVALO_SONDEO_MS, self._sondear_cambios)
+        
+        # Mantenimiento de la base en los momentos de inactividad
+        for evento in ('<Any-KeyPress>', '<Any-ButtonPress>', '<MouseWheel>'):
+            self.root.bind_all(evento, self._registrar_actividad, add='+')
+        self.root.after(INTERVALO_INACTIVIDAD_MS, self._mantener_si_inactivo)
+        
         logger.info("Ventana principal inicializada")
     
     def _setup_window(self):
@@ -136,6 +229,7 @@ class MainWindow:
         menubar.add_cascade(label="Archivo", menu=file_menu)
         file_menu.add_command(label="Nueva Reparación", command=self._nueva_reparacion, accelerator="Ctrl+N")
         file_menu.add_separator()
+        file_menu.add_command(label="Importar...", command=self._importar_datos)
         file_menu.add_command(label="Exportar...", command=self._exportar_datos)
         file_menu.add_separator()
         file_menu.add_command(label="Salir", command=self.root.quit, accelerator="Ctrl+Q")
@@ -146,6 +240,7 @@ class MainWindow:
         view_menu.add_command(label="Actualizar", command=self._load_data, accelerator="F5")
         view_menu.add_separator()
         view_menu.add_command(label="Estadísticas", command=self._mostrar_estadisticas)
+        view_menu.add_command(label="🗄️ Reparaciones archivadas", command=self._mostrar_archivo)
         
         # Menú Herramientas
         tools_menu = tk.Menu(menubar, tearoff=0)
@@ -153,6 +248,13 @@ class MainWindow:
         tools_menu.add_command(label="⚙️ Configuración", command=self._mostrar_configuracion)
         tools_menu.add_separator()
         tools_menu.add_command(label="📱 Probar WhatsApp Web", command=self._test_whatsapp)
+        tools_menu.add_command(label="🔎 Reconstruir índice de búsqueda",
+                               command=self._reconstruir_indice_busqueda)
+        tools_menu.add_command(label="🧮 Verificar contadores de estadísticas",
+                               command=self._verificar_contadores)
+        tools_menu.add_command(label="🗄️ Archivar reparaciones retiradas...",
+                               command=self._archivar_reparaciones)
+        tools_menu.add_command(label="💾 Crear respaldo ahora", command=self._crear_respaldo)
         
         # Menú Ayuda
         help_menu = tk.Menu(menubar, tearoff=0)
@@ -273,11 +375,22 @@ class MainWindow:
         self.tree.column('estado', width=100, minwidth=90)
         self.tree.column('fecha_ingreso', width=120, minwidth=100)
         
+        # Colores por estado (una sola vez) y reconciliador de filas
+        self._configure_row_colors()
+        self._tabla = ReconciliadorTabla(self.tree)
+        
         # Scrollbars
         v_scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.tree.yview)
         h_scrollbar = ttk.Scrollbar(table_frame, orient=tk.HORIZONTAL, command=self.tree.xview)
+        self.v_scrollbar = v_scrollbar
+        
+        self.tree.configure(yscrollcommand=self._on_tree_yscroll, xscrollcommand=h_scrollbar.set)
         
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        # Lista virtual para resultados grandes (pide los bloques con los filtros actuales)
+        self._lista_virtual = ListaVirtual(
+            self._tabla, v_scrollbar, self._obtener_bloque, self._fila_tabla,
+            tamano_bloque=TAMANO_PAGINA
+        )
         
         # Posicionar elementos
         self.tree.grid(row=0, column=0, sticky='nsew')
@@ -332,70 +445,430 @@ class MainWindow:
         whatsapp_label = ttk.Label(status_content, textvariable=self.whatsapp_status, 
                                  style='Status.TLabel')
         whatsapp_label.pack(side=tk.RIGHT, padx=(0, 20))
+        
+        # Indicador de consultas en curso (visible sólo mientras el hilo de trabajo está ocupado)
+        self.indicador_ocupado = ttk.Progressbar(status_content, mode='indeterminate', length=80)
+        
+        # Botón para cancelar la exportación o importación (visible sólo mientras corre)
+        self.btn_cancelar_tarea = ttk.Button(status_content, text="Cancelar",
+                                             command=self._cancelar_tarea_archivo)
     
     def _load_data(self):
-        """Cargar datos en la tabla"""
+        """Cargar datos en la tabla (la consulta corre en el hilo de trabajo)"""
+        # Esta carga reemplaza a la búsqueda programada y a la que esté en curso
+        if self._search_timer is not None:
+            self.root.after_cancel(self._search_timer)
+            self._search_timer = None
+        self._cancelar_carga()
+        
+        # Búsqueda y filtro de estado se resuelven en una sola consulta
+        filtros = {
+            'termino': self.search_var.get().strip(),
+            'estado': self.filter_var.get()
+        }
+        
+        # Con los mismos filtros se recargan tantas filas como había, para no
+        # perder el desplazamiento; si cambiaron, sólo la primera página
+        mismos_filtros = filtros == self._filtros
+        tamano = TAMANO_PAGINA
+        if mismos_filtros and not self._lista_virtual.activa:
+            tamano = max(TAMANO_PAGINA, len(self._tabla))
+        
+        self._carga += 1
+        carga = self._carga
+        
+        def consultar():
+            # La versión se toma antes de consultar: un cambio que llegue en el
+            # medio se vuelve a aplicar en la próxima sincronización (sin efecto)
+            inicio = time.perf_counter()
+            version = self.db_manager.version_cambios()
+            pagina = self.db_manager.consultar_reparaciones(
+                **filtros, tamano=tamano, incluir_total=True
+            )
+            return version, pagina, (time.perf_counter() - inicio) * 1000
+        
+        def mostrar(resultado):
+            # Llegó otra carga pedida después: ésta ya no corresponde
+            if carga != self._carga:
+                return
+            self._carga_mostrada = carga
+            version, pagina, duracion_ms = resultado
+            self._registrar_latencia(duracion_ms)
+            self._mostrar_carga(filtros, mismos_filtros, tamano, version, pagina)
+        
+        def fallar(e: Exception):
+            # Una carga reemplazada (o interrumpida a propósito) no es un error
+            if carga != self._carga:
+                return
+            # Sin esto las sincronizaciones seguirían esperando a esta carga
+            self._carga_mostrada = carga
+            self._al_fallar("Error al cargar datos")(e)
+        
+        self._futuro_carga = self._bd.enviar(consultar, al_terminar=mostrar, al_fallar=fallar)
+    
+    def _cancelar_carga(self):
+        """
+        Descartar la carga en curso: si no empezó se saca de la cola y si ya está
+        corriendo se interrumpe la consulta SQLite (su resultado ya no sirve)
+        """
+        futuro = self._futuro_carga
+        self._futuro_carga = None
+        if futuro is None or futuro.done():
+            return
+        
+        # Cambiar el número de carga hace que su resultado o su error se ignoren
+        self._carga += 1
+        if not futuro.cancel() and self._bd.interrumpir(futuro,
+                                                        self.db_manager.interrumpir_consulta):
+            logger.debug("Consulta del listado interrumpida")
+    
+    def _registrar_latencia(self, duracion_ms: float):
+        """Actualizar el promedio móvil de lo que tarda una carga del listado"""
+        if self._latencia_carga_ms is None:
+            self._latencia_carga_ms = duracion_ms
+        else:
+            self._latencia_carga_ms = 0.7 * self._latencia_carga_ms + 0.3 * duracion_ms
+    
+    def _demora_busqueda(self) -> int:
+        """Espera tras una tecla: una vez y media la latencia medida, entre los límites"""
+        if self._latencia_carga_ms is None:
+            return DEMORA_BUSQUEDA_INICIAL_MS
+        demora = int(self._latencia_carga_ms * 1.5)
+        return max(DEMORA_BUSQUEDA_MIN_MS, min(DEMORA_BUSQUEDA_MAX_MS, demora))
+    
+    def _mostrar_carga(self, filtros: Dict, mismos_filtros: bool, tamano: int,
+                       version: int, pagina: Dict):
+        """Mostrar en la tabla el resultado de una carga"""
+        self._filtros = filtros
+        self._version_cambios = version
+        reparaciones = pagina['reparaciones']
+        self._total_reparaciones = pagina['total']
+        
+        if self._total_reparaciones > UMBRAL_LISTA_VIRTUAL:
+            # Resultado grande: la tabla guarda sólo las filas visibles y la
+            # primera página sirve como primer bloque de la lista virtual
+            self._cursor_siguiente = None
+            self._claves_orden = {}
+            self._lista_virtual.activar(
+                self._total_reparaciones,
+                conservar_posicion=mismos_filtros and self._lista_virtual.activa,
+                primer_bloque=pagina if tamano == TAMANO_PAGINA else None
+            )
+            self.count_text.set(f"{self._total_reparaciones} reparaciones")
+            self.status_text.set("Datos cargados correctamente")
+            logger.info(f"Lista virtual sobre {self._total_reparaciones} reparaciones")
+            return
+        
+        self._lista_virtual.desactivar()
+        self._cursor_siguiente = pagina['siguiente']
+        
+        # Aplicar sólo las diferencias con lo que ya muestra la tabla
+        self._claves_orden = {
+            reparacion['numero_presupuesto']: (reparacion['fecha_ingreso'], reparacion['id'])
+            for reparacion in reparaciones
+        }
+        self._tabla.reconciliar(self._fila_tabla(reparacion) for reparacion in reparaciones)
+        
+        # Actualizar contador
+        self.count_text.set(f"{self._total_reparaciones} reparaciones")
+        self.status_text.set("Datos cargados correctamente")
+        
+        if not reparaciones and len(filtros['termino']) >= 3:
+            self._sugerir_parecidos(filtros['termino'])
+        
+        logger.info(f"Cargadas {len(reparaciones)} de {self._total_reparaciones} reparaciones")
+    
+    def _preparar_busqueda_aproximada(self):
+        """Construir el índice de trigramas (en un hilo propio, al iniciar)"""
         try:
-            # Limpiar tabla
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            
-            # Obtener filtro de estado
-            estado_filtro = self.filter_var.get()
+            self.db_manager.preparar_busqueda_aproximada()
+        except Exception as e:
+            # Sin índice previo la primera búsqueda aproximada lo construye
+            logger.warning(f"No se pudo preparar la búsqueda aproximada: {e}")
+    
+    def _sugerir_parecidos(self, termino: str):
+        """Búsqueda sin resultados: sugerir en la barra de estado clientes o productos parecidos"""
+        carga = self._carga
+        
+        def mostrar(sugerencias: List[Dict]):
+            # Otra carga ya reemplazó a la que no encontró nada
+            if carga != self._carga or not sugerencias:
+                return
+            parecidos = ', '.join(sugerencia['valor'] for sugerencia in sugerencias)
+            self.status_text.set(f"Sin resultados para '{termino}'. ¿Quisiste decir: {parecidos}?")
+        
+        self._bd.enviar(self.db_manager.buscar_aproximado, termino,
+                        limite=SUGERENCIAS_SIN_RESULTADOS, al_terminar=mostrar)
+    
+    def _valores_fila(self, reparacion: Dict) -> tuple:
+        """Formatear una reparación como fila de la tabla"""
+        # Formatear datos
+        numero = reparacion['numero_presupuesto']
+        nombre = reparacion['cliente_nombre']
+        apellido = reparacion['cliente_apellido']
+        celular = reparacion['cliente_celular']
+        producto = reparacion['producto']
+        
+        # Formatear costo
+        costo = reparacion['costo_reparacion']
+        if costo is not None:
+            costo_str = f"${costo:,.2f}"
+        else:
+            costo_str = "-"
+        
+        # Formatear estado
+        estado = reparacion['estado'].title()
+        if estado == 'En_Proceso':
+            estado = 'En Proceso'
+        
+        # Formatear fecha
+        fecha_str = reparacion['fecha_ingreso'][:10]  # Solo la fecha, sin hora
+        
+        return (numero, nombre, apellido, celular, producto, costo_str, estado, fecha_str)
+    
+    def _fila_tabla(self, reparacion: Dict) -> tuple:
+        """Fila de la tabla (iid, valores, tags) para una reparación"""
+        tag = self._get_estado_tag(reparacion['estado'])
+        return (reparacion['numero_presupuesto'], self._valores_fila(reparacion), (tag,))
+    
+    def _obtener_bloque(self, desplazamiento: int, cursor, cantidad: int, entregar):
+        """Pedir un bloque de la lista virtual con los filtros del listado actual"""
+        def fallar(e: Exception):
+            logger.error(f"Error al cargar un bloque de la lista: {e}")
+            entregar(None)
+        
+        self._bd.enviar(self.db_manager.consultar_reparaciones, **self._filtros,
+                        cursor=cursor, desplazamiento=desplazamiento, tamano=cantidad,
+                        al_terminar=entregar, al_fallar=fallar)
+    
+    def _insertar_fila(self, reparacion: Dict, indice: Optional[int] = None):
+        """
+        Insertar una reparación en la tabla (o actualizarla si ya está)
+        
+        El número de presupuesto es el identificador del elemento del Treeview.
+        """
+        numero, valores, tags = self._fila_tabla(reparacion)
+        self._tabla.poner(numero, valores, tags, indice)
+        self._claves_orden[numero] = (reparacion['fecha_ingreso'], reparacion['id'])
+    
+    def _quitar_fila(self, numero: str):
+        """Sacar una reparación de la tabla si está cargada"""
+        self._tabla.quitar(numero)
+        self._claves_orden.pop(numero, None)
+    
+    def _ubicar_fila(self, reparacion: Dict):
+        """Insertar o actualizar una reparación respetando el orden del listado (recientes primero)"""
+        numero = reparacion['numero_presupuesto']
+        clave = (reparacion['fecha_ingreso'], reparacion['id'])
+        
+        if numero in self._tabla:
+            self._insertar_fila(reparacion)
+            return
+        
+        # Más vieja que la última fila cargada: llegará con la página que le corresponde
+        if self._cursor_siguiente and clave < tuple(self._cursor_siguiente):
+            return
+        
+        # Lo habitual es una reparación nueva, que va arriba de todo
+        primera = self._tabla.primera()
+        if primera is None or clave > self._claves_orden.get(primera, clave):
+            indice = 0
+        else:
+            indice = sum(1 for otra in self._claves_orden.values() if otra > clave)
+        
+        self._insertar_fila(reparacion, indice)
+    
+    def _sincronizar(self):
+        """
+        Aplicar a la tabla sólo las reparaciones que cambiaron desde la última carga
+        
+        Recarga todo si hay demasiados cambios o si el listado es una búsqueda
+        (ordenada por relevancia, donde la posición de una fila no se puede deducir).
+        """
+        # Hay una carga completa en camino, que ya traerá estos cambios
+        if self._carga != self._carga_mostrada:
+            return
+        
+        carga = self._carga
+        filtros = dict(self._filtros)
+        version = self._version_cambios
+        
+        def consultar():
+            cambios = self.db_manager.cambios_desde(version, **filtros)
+            total = None
+            if cambios['reparaciones'] or cambios['quitar']:
+                # Sin búsqueda el total sale de los contadores por estado (O(1))
+                total = self.db_manager.contar_reparaciones(filtros.get('estado'))
+            return cambios, total
+        
+        def aplicar(resultado):
+            # Una carga completa posterior ya incluye estos cambios
+            if carga != self._carga:
+                return
+            self._aplicar_cambios(*resultado)
+        
+        def fallar(e: Exception):
+            logger.error(f"Error al sincronizar cambios: {e}")
+            self._load_data()
+        
+        self._bd.enviar(consultar, al_terminar=aplicar, al_fallar=fallar)
+    
+    def _aplicar_cambios(self, cambios: Dict, total: Optional[int]):
+        """Aplicar en la tabla el resultado de cambios_desde"""
+        hay_cambios = cambios['reparaciones'] or cambios['quitar']
+        if cambios['completo'] or (self._filtros.get('termino') and hay_cambios):
+            self._load_data()
+            return
+        
+        if not self._lista_virtual.activa:
+            for numero in cambios['quitar']:
+                self._quitar_fila(numero)
             
-            # Obtener datos
-            if self.search_var.get().strip():
-                reparaciones = self.db_manager.buscar_reparaciones(self.search_var.get().strip())
-            else:
-                reparaciones = self.db_manager.obtener_todas_reparaciones()
+            for reparacion in cambios['reparaciones']:
+                self._ubicar_fila(reparacion)
+        
+        self._version_cambios = max(self._version_cambios, cambios['version'])
+        
+        if hay_cambios:
+            self._total_reparaciones = total
             
-            # Aplicar filtro de estado
-            if estado_filtro != "todos":
-                reparaciones = [r for r in reparaciones if r['estado'] == estado_filtro]
+            # En la lista virtual las posiciones cambian: se vuelven a pedir los
+            # bloques visibles y se reconcilian sólo las filas que difieren
+            if self._lista_virtual.activa:
+                self._lista_virtual.activar(self._total_reparaciones, conservar_posicion=True)
             
-            # Insertar datos en la tabla
-            for reparacion in reparaciones:
-                # Formatear datos
-                numero = reparacion['numero_presupuesto']
-                nombre = reparacion['cliente_nombre']
-                apellido = reparacion['cliente_apellido']
-                celular = reparacion['cliente_celular']
-                producto = reparacion['producto']
-                
-                # Formatear costo
-                costo = reparacion['costo_reparacion']
-                if costo is not None:
-                    costo_str = f"${costo:,.2f}"
-                else:
-                    costo_str = "-"
-                
-                # Formatear estado
-                estado = reparacion['estado'].title()
-                if estado == 'En_Proceso':
-                    estado = 'En Proceso'
-                
-                # Formatear fecha
-                fecha_str = reparacion['fecha_ingreso'][:10]  # Solo la fecha, sin hora
-                
-                # Configurar tags para colores
-                tag = self._get_estado_tag(reparacion['estado'])
-                
-                item = self.tree.insert('', tk.END, values=(
-                    numero, nombre, apellido, celular, producto, costo_str, estado, fecha_str
-                ), tags=(tag,))
+            self.count_text.set(f"{self._total_reparaciones} reparaciones")
+            logger.debug(f"Sincronización incremental: {len(cambios['reparaciones'])} "
+                         f"filas actualizadas, {len(cambios['quitar'])} quitadas")
+    
+    def _sondear_cambios(self):
+        """Revisar con PRAGMA data_version si otro proceso modificó la base"""
+        def comparar(version):
+            # None: el escritor está ocupado (p. ej. una importación); se reintenta luego
+            if version is not None:
+                if self._version_datos is not None and version != self._version_datos:
+                    self._sincronizar()
+                self._version_datos = version
+        
+        # Con consultas en curso se espera al próximo intervalo en lugar de encolar más
+        if not self._bd.ocupado:
+            self._bd.enviar(self.db_manager.version_datos, al_terminar=comparar,
+                            al_fallar=lambda e: logger.error(
+                                f"Error al revisar cambios externos: {e}"))
             
-            # Configurar colores por estado
-            self._configure_row_colors()
+            # En una sesión larga el registro de cambios crece: se poda cada tanto,
+            # nunca durante una importación o exportación (que ocupan el escritor)
+            self._sondeos += 1
+            if self._sondeos >= SONDEOS_ENTRE_PODAS and self._tarea_archivo is None:
+                self._sondeos = 0
+                self._bd.enviar(self.db_manager.podar_registro_cambios,
+                                al_fallar=lambda e: logger.error(
+                                    f"Error al podar el registro de cambios: {e}"))
+        
+        self.root.after(INTERVALO_SONDEO_MS, self._sondear_cambios)
+    
+    def _registrar_actividad(self, event=None):
+        """Anotar que el usuario está usando la aplicación"""
+        self._ultima_actividad = time.monotonic()
+    
+    def _mantener_si_inactivo(self):
+        """Lanzar el mantenimiento liviano de la base si la aplicación está inactiva"""
+        inactivo = time.monotonic() - self._ultima_actividad >= INACTIVIDAD_MANTENIMIENTO_S
+        
+        # Nunca junto a una exportación, importación o respaldo, ni con consultas en curso
+        if inactivo and self._tarea_archivo is None and not self._bd.ocupado:
+            def terminar(resultado: Optional[Dict]):
+                if resultado:
+                    liberados = resultado['antes']['bytes'] - resultado['despues']['bytes']
+                    logger.info(f"Mantenimiento en inactividad: {resultado['duracion']:.2f} s, "
+                                f"{liberados / 1024:.0f} KB liberados")
             
-            # Actualizar contador
-            self.count_text.set(f"{len(reparaciones)} reparaciones")
-            self.status_text.set("Datos cargados correctamente")
+            self._bd.enviar(self.db_manager.mantener_si_corresponde, HORAS_ENTRE_MANTENIMIENTOS,
+                            al_terminar=terminar,
+                            al_fallar=lambda e: logger.error(
+                                f"Error en el mantenimiento de la base: {e}"))
+        
+        self.root.after(INTERVALO_INACTIVIDAD_MS, self._mantener_si_inactivo)
+    
+    def _al_fallar(self, mensaje: str):
+        """Callback de error para el hilo de trabajo: registrar y avisar al usuario"""
+        def mostrar(e: Exception):
+            logger.error(f"{mensaje}: {e}")
+            messagebox.showerror("Error", f"{mensaje}:\n{e}")
+        return mostrar
+    
+    def _pedir_reparacion(self, numero_presupuesto: str, al_obtener, mensaje_error: str):
+        """Obtener una reparación en el hilo de trabajo y pasarla a al_obtener"""
+        def recibir(reparacion: Optional[Dict]):
+            if not reparacion:
+                messagebox.showerror("Error", mensaje_error)
+                return
+            al_obtener(reparacion)
+        
+        self._bd.enviar(self.db_manager.obtener_reparacion, numero_presupuesto,
+                        al_terminar=recibir, al_fallar=self._al_fallar(mensaje_error))
+    
+    def _on_cambio_ocupado(self, ocupado: bool):
+        """Mostrar el indicador de actividad si las consultas tardan"""
+        if self._indicador_pendiente is not None:
+            self.root.after_cancel(self._indicador_pendiente)
+            self._indicador_pendiente = None
+        
+        if ocupado:
+            self._indicador_pendiente = self.root.after(DEMORA_INDICADOR_MS,
+                                                        self._mostrar_indicador)
+        else:
+            self.indicador_ocupado.stop()
+            self.indicador_ocupado.pack_forget()
+    
+    def _mostrar_indicador(self):
+        """Mostrar la barra de actividad en la barra de estado"""
+        self._indicador_pendiente = None
+        self.indicador_ocupado.pack(side=tk.RIGHT, padx=(0, 20))
+        self.indicador_ocupado.start(15)
+    
+    def _on_tree_yscroll(self, first, last):
+        """Actualizar la scrollbar y pedir la página siguiente al llegar al final"""
+        # En la lista virtual la scrollbar representa el total, no las filas del Treeview
+        if self._lista_virtual.activa:
+            return
+        
+        self.v_scrollbar.set(first, last)
+        
+        if self._cursor_siguiente and not self._cargando_pagina and float(last) >= 0.95:
+            self._cargando_pagina = True
+            self.root.after_idle(self._cargar_pagina_siguiente)
+    
+    def _cargar_pagina_siguiente(self):
+        """Agregar la página siguiente del listado al final de la tabla"""
+        if not self._cursor_siguiente:
+            self._cargando_pagina = False
+            return
+        
+        carga = self._carga
+        
+        def agregar(pagina: Dict):
+            self._cargando_pagina = False
+            if carga != self._carga:
+                return
             
-            logger.info(f"Cargadas {len(reparaciones)} reparaciones")
+            for reparacion in pagina['reparaciones']:
+                self._insertar_fila(reparacion)
             
-        except Exception as e:
-            logger.error(f"Error al cargar datos: {e}")
-            messagebox.showerror("Error", f"Error al cargar datos:\n{e}")
+            self._cursor_siguiente = pagina['siguiente']
+            self.status_text.set(
+                f"Mostrando {len(self._tabla)} de {self._total_reparaciones} reparaciones"
+            )
+        
+        def fallar(e: Exception):
+            logger.error(f"Error al cargar más datos: {e}")
+            self._cargando_pagina = False
+            self._cursor_siguiente = None
+            self.status_text.set("Error al cargar más reparaciones")
+        
+        self._bd.enviar(self.db_manager.consultar_reparaciones, **self._filtros,
+                        cursor=self._cursor_siguiente, tamano=TAMANO_PAGINA,
+                        al_terminar=agregar, al_fallar=fallar)
     
     def _get_estado_tag(self, estado: str) -> str:
         """Obtener tag de color según el estado"""
@@ -410,11 +883,14 @@ class MainWindow:
     
     def _on_search_change(self, *args):
         """Evento cuando cambia el texto de búsqueda"""
-        # Realizar búsqueda con delay
-        if hasattr(self, '_search_timer'):
+        # El texto cambió: la búsqueda en curso ya no sirve
+        self._cancelar_carga()
+        
+        # Realizar búsqueda con una espera acorde a lo que tardan las consultas
+        if self._search_timer is not None:
             self.root.after_cancel(self._search_timer)
         
-        self._search_timer = self.root.after(500, self._load_data)
+        self._search_timer = self.root.after(self._demora_busqueda(), self._load_data)
     
     def _clear_search(self):
         """Limpiar búsqueda"""
@@ -434,18 +910,27 @@ class MainWindow:
             self.tree.selection_set(item)
             self.context_menu.post(event.x_root, event.y_root)
     
+    def _buscar_cliente(self, celular: str, entregar):
+        """Buscar la ficha de un cliente para ReparacionDialog (en el hilo de trabajo)"""
+        def fallar(e: Exception):
+            logger.error(f"Error al buscar el cliente {celular}: {e}")
+            entregar(None)
+        
+        self._bd.enviar(self.db_manager.obtener_cliente, celular,
+                        al_terminar=entregar, al_fallar=fallar)
+    
     def _nueva_reparacion(self):
         """Crear nueva reparación"""
-        dialog = ReparacionDialog(self.root, "Nueva Reparación")
+        dialog = ReparacionDialog(self.root, "Nueva Reparación", buscar_cliente=self._buscar_cliente)
         if dialog.result:
-            try:
-                numero = self.db_manager.crear_reparacion(dialog.result)
-                self._load_data()
+            def creada(numero: str):
+                self._sincronizar()
                 self.status_text.set(f"Reparación {numero} creada correctamente")
                 messagebox.showinfo("Éxito", f"Reparación {numero} creada correctamente")
-            except Exception as e:
-                logger.error(f"Error al crear reparación: {e}")
-                messagebox.showerror("Error", f"Error al crear reparación:\n{e}")
+            
+            self._bd.enviar(self.db_manager.crear_reparacion, dialog.result,
+                            al_terminar=creada,
+                            al_fallar=self._al_fallar("Error al crear reparación"))
     
     def _editar_reparacion(self):
         """Editar reparación seleccionada"""
@@ -459,36 +944,38 @@ class MainWindow:
         valores = self.tree.item(item, 'values')
         numero_presupuesto = valores[0]
         
-        # Obtener datos completos de la base de datos
-        reparacion = self.db_manager.obtener_reparacion(numero_presupuesto)
-        if not reparacion:
-            messagebox.showerror("Error", "No se pudo obtener los datos de la reparación")
-            return
-        
-        # Abrir diálogo de edición
-        dialog = ReparacionDialog(self.root, "Editar Reparación", reparacion)
-        if dialog.result:
-            try:
-                # Verificar cambios importantes para notificaciones
-                estado_anterior = reparacion['estado']
-                costo_anterior = reparacion['costo_reparacion']
-                
-                # Actualizar en base de datos
-                if self.db_manager.actualizar_reparacion(numero_presupuesto, dialog.result):
-                    self._load_data()
-                    self.status_text.set(f"Reparación {numero_presupuesto} actualizada")
-                    
-                    # Enviar notificaciones automáticas si corresponde
-                    self._check_and_send_notifications(
-                        dialog.result, estado_anterior, costo_anterior
-                    )
-                    
-                else:
+        def editar(reparacion: Dict):
+            # Abrir diálogo de edición
+            dialog = ReparacionDialog(self.root, "Editar Reparación", reparacion,
+                                      buscar_cliente=self._buscar_cliente)
+            if not dialog.result:
+                return
+            
+            # Verificar cambios importantes para notificaciones
+            estado_anterior = reparacion['estado']
+            costo_anterior = reparacion['costo_reparacion']
+            
+            def actualizada(ok: bool):
+                if not ok:
                     messagebox.showerror("Error", "No se pudo actualizar la reparación")
-                    
-            except Exception as e:
-                logger.error(f"Error al actualizar reparación: {e}")
-                messagebox.showerror("Error", f"Error al actualizar reparación:\n{e}")
+                    return
+                
+                self._sincronizar()
+                self.status_text.set(f"Reparación {numero_presupuesto} actualizada")
+                
+                # Enviar notificaciones automáticas si corresponde
+                self._check_and_send_notifications(
+                    dialog.result, estado_anterior, costo_anterior
+                )
+            
+            # Actualizar en base de datos
+            self._bd.enviar(self.db_manager.actualizar_reparacion, numero_presupuesto,
+                            dialog.result, al_terminar=actualizada,
+                            al_fallar=self._al_fallar("Error al actualizar reparación"))
+        
+        # Obtener datos completos de la base de datos
+        self._pedir_reparacion(numero_presupuesto, editar,
+                               "No se pudo obtener los datos de la reparación")
     
     def _check_and_send_notifications(self, datos: Dict, estado_anterior: str, costo_anterior: Optional[float]):
         """Verificar y mostrar opciones de notificaciones automáticas"""
@@ -592,26 +1079,30 @@ class MainWindow:
         )
         
         if nuevo_estado and nuevo_estado in estados:
-            try:
-                # Obtener datos actuales
+            def cambiar():
+                # Obtener datos actuales y actualizar el estado en el hilo de trabajo
                 reparacion = self.db_manager.obtener_reparacion(numero_presupuesto)
-                estado_anterior = reparacion['estado']
+                ok = self.db_manager.actualizar_reparacion(numero_presupuesto,
+                                                           {'estado': nuevo_estado})
+                return reparacion, ok
+            
+            def cambiado(resultado):
+                reparacion, ok = resultado
+                if not ok:
+                    return
                 
-                # Actualizar estado
-                if self.db_manager.actualizar_reparacion(numero_presupuesto, {'estado': nuevo_estado}):
-                    self._load_data()
-                    self.status_text.set(f"Estado actualizado a: {nuevo_estado}")
-                    
-                    # Verificar notificaciones
-                    self._check_and_send_notifications(
-                        {**reparacion, 'estado': nuevo_estado}, 
-                        estado_anterior, 
-                        reparacion['costo_reparacion']
-                    )
+                self._sincronizar()
+                self.status_text.set(f"Estado actualizado a: {nuevo_estado}")
                 
-            except Exception as e:
-                logger.error(f"Error al cambiar estado: {e}")
-                messagebox.showerror("Error", f"Error al cambiar estado:\n{e}")
+                # Verificar notificaciones
+                self._check_and_send_notifications(
+                    {**reparacion, 'estado': nuevo_estado}, 
+                    reparacion['estado'], 
+                    reparacion['costo_reparacion']
+                )
+            
+            self._bd.enviar(cambiar, al_terminar=cambiado,
+                            al_fallar=self._al_fallar("Error al cambiar estado"))
     
     def _enviar_whatsapp_menu(self):
         """Menú para enviar mensajes por WhatsApp Web"""
@@ -625,11 +1116,11 @@ class MainWindow:
         valores = self.tree.item(item, 'values')
         numero_presupuesto = valores[0]
         
-        reparacion = self.db_manager.obtener_reparacion(numero_presupuesto)
-        if not reparacion:
-            messagebox.showerror("Error", "No se pudieron obtener los datos")
-            return
-        
+        self._pedir_reparacion(numero_presupuesto, self._mostrar_menu_whatsapp,
+                               "No se pudieron obtener los datos")
+    
+    def _mostrar_menu_whatsapp(self, reparacion: Dict):
+        """Ventana con los mensajes de WhatsApp disponibles para una reparación"""
         # Crear ventana de opciones
         dialog = tk.Toplevel(self.root)
         dialog.title("📱 Enviar por WhatsApp")
@@ -739,42 +1230,199 @@ class MainWindow:
             messagebox.showerror("Error", f"Error al abrir WhatsApp Web:\n{e}")
     
     def _ver_historial(self):
-        """Ver historial de una reparación"""
-        messagebox.showinfo("Próximamente", "Funcionalidad de historial en desarrollo")
+        """Ver el historial de estados de las reparaciones seleccionadas"""
+        selection = self.tree.selection()
+        if not selection:
+            messagebox.showwarning("Advertencia", "Selecciona una reparación")
+            return
+        
+        # Número y descripción desde la tabla; los historiales en una sola consulta
+        reparaciones = []
+        for item in selection[:MAXIMO_HISTORIALES]:
+            valores = self.tree.item(item, 'values')
+            reparaciones.append({
+                'numero_presupuesto': valores[0],
+                'descripcion': f"{valores[1]} {valores[2]} ({valores[4]})"
+            })
+        
+        def mostrar(historiales: Dict[str, List[Dict]]):
+            HistorialDialog(self.root, reparaciones, historiales)
+        
+        self._bd.enviar(self.db_manager.obtener_historiales_estados,
+                        [reparacion['numero_presupuesto'] for reparacion in reparaciones],
+                        al_terminar=mostrar,
+                        al_fallar=self._al_fallar("Error al obtener el historial"))
+    
+    def _iniciar_tarea_archivo(self, descripcion: str, funcion, al_terminar) -> bool:
+        """
+        Ejecutar una exportación o importación en un hilo de trabajo
+        
+        Args:
+            descripcion (str): Texto de la barra de estado ("Exportando", "Importando")
+            funcion: Recibe (progreso, cancelar) y devuelve el resumen de la tarea
+            al_terminar: Recibe el resumen en el hilo de la interfaz
+            
+        Returns:
+            bool: False si ya había otra tarea en curso
+        """
+        if self._tarea_archivo is not None:
+            messagebox.showinfo("Tarea en curso",
+                                "Espere a que termine la exportación o importación en curso")
+            return False
+        
+        # El hilo sólo escribe en este diccionario; la interfaz lo lee con after()
+        tarea = {
+            'descripcion': descripcion,
+            'cancelar': threading.Event(),
+            'progreso': (0, 0),
+            'resultado': None,
+            'error': None,
+            'al_terminar': al_terminar
+        }
+        
+        def progreso(hechas: int, total: int):
+            tarea['progreso'] = (hechas, total)
+        
+        def trabajar():
+            try:
+                tarea['resultado'] = funcion(progreso, tarea['cancelar'])
+            except Exception as e:
+                tarea['error'] = e
+        
+        tarea['hilo'] = threading.Thread(target=trabajar, name=f"tarea-{descripcion.lower()}",
+                                         daemon=True)
+        self._tarea_archivo = tarea
+        
+        self.status_text.set(f"{descripcion}...")
+        self.btn_cancelar_tarea.pack(side=tk.LEFT, padx=(10, 0))
+        tarea['hilo'].start()
+        self.root.after(INTERVALO_PROGRESO_MS, self._revisar_tarea_archivo)
+        return True
+    
+    def _revisar_tarea_archivo(self):
+        """Mostrar el avance de la tarea en curso y avisar al terminar"""
+        tarea = self._tarea_archivo
+        if tarea is None:
+            return
+        
+        if tarea['hilo'].is_alive():
+            hechas, total = tarea['progreso']
+            if total:
+                self.status_text.set(
+                    f"{tarea['descripcion']}... {hechas} de {total} ({hechas * 100 // total}%)"
+                )
+            else:
+                self.status_text.set(f"{tarea['descripcion']}... {hechas} filas")
+            self.root.after(INTERVALO_PROGRESO_MS, self._revisar_tarea_archivo)
+            return
+        
+        self._tarea_archivo = None
+        self.btn_cancelar_tarea.pack_forget()
+        
+        if tarea['error'] is not None:
+            e = tarea['error']
+            logger.error(f"Error en la tarea '{tarea['descripcion']}': {e}")
+            self.status_text.set(f"Error: {tarea['descripcion'].lower()}")
+            messagebox.showerror("Error", f"Error al procesar el archivo:\n{e}")
+            return
+        
+        resultado = tarea['resultado']
+        if resultado['cancelado']:
+            self.status_text.set(f"{tarea['descripcion']}: cancelado")
+            return
+        
+        tarea['al_terminar'](resultado)
+    
+    def _cancelar_tarea_archivo(self):
+        """Pedir al hilo de la tarea en curso que se detenga"""
+        if self._tarea_archivo is not None:
+            self._tarea_archivo['cancelar'].set()
+            self.status_text.set("Cancelando...")
     
     def _exportar_datos(self):
-        """Exportar datos a CSV"""
+        """Exportar datos a CSV en segundo plano"""
         from tkinter import filedialog
-        import csv
         
-        try:
-            archivo = filedialog.asksaveasfilename(
-                defaultextension=".csv",
-                filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
-                title="Exportar datos"
+        archivo = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("CSV comprimido", "*.csv.gz"),
+                       ("All files", "*.*")],
+            title="Exportar datos"
+        )
+        
+        if not archivo:
+            return
+        
+        def al_terminar(resultado: Dict):
+            self.status_text.set(
+                f"Exportadas {resultado['filas']} reparaciones en {resultado['duracion']:.1f} s"
             )
+            incluidas = (" (incluye las reparaciones archivadas)"
+                         if len(resultado['tablas']) > 1 else "")
+            messagebox.showinfo("Éxito", f"Datos exportados a:\n{resultado['archivo']}{incluidas}")
+        
+        self._iniciar_tarea_archivo(
+            "Exportando",
+            lambda progreso, cancelar: self.db_manager.exportar_reparaciones_csv(
+                archivo, progreso=progreso, cancelar=cancelar
+            ),
+            al_terminar
+        )
+    
+    def _importar_datos(self):
+        """Importar reparaciones desde un CSV en segundo plano"""
+        from tkinter import filedialog
+        
+        archivo = filedialog.askopenfilename(
+            filetypes=[("CSV files", "*.csv"), ("CSV comprimido", "*.csv.gz"),
+                       ("All files", "*.*")],
+            title="Importar reparaciones"
+        )
+        
+        if not archivo:
+            return
+        
+        def al_terminar(resultado: Dict):
+            self._sincronizar()
+            self.status_text.set(f"Importadas {resultado['importadas']} reparaciones")
             
-            if archivo:
-                reparaciones = self.db_manager.obtener_todas_reparaciones()
-                
-                with open(archivo, 'w', newline='', encoding='utf-8') as csvfile:
-                    fieldnames = [
-                        'numero_presupuesto', 'cliente_nombre', 'cliente_apellido',
-                        'cliente_celular', 'producto', 'descripcion', 'costo_reparacion',
-                        'estado', 'fecha_ingreso', 'fecha_actualizacion', 'fecha_retiro'
-                    ]
-                    
-                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                    writer.writeheader()
-                    
-                    for reparacion in reparaciones:
-                        writer.writerow(reparacion)
-                
-                messagebox.showinfo("Éxito", f"Datos exportados a:\n{archivo}")
-                
-        except Exception as e:
-            logger.error(f"Error al exportar: {e}")
-            messagebox.showerror("Error", f"Error al exportar:\n{e}")
+            mensaje = (
+                f"Filas leídas: {resultado['leidas']}\n"
+                f"Importadas: {resultado['importadas']}\n"
+                f"Duplicadas (omitidas): {resultado['duplicadas']}\n"
+                f"Inválidas (omitidas): {resultado['invalidas']}\n"
+                f"Tiempo: {resultado['duracion']:.1f} s"
+            )
+            if resultado['detalle']:
+                mensaje += "\n\nPrimeras filas omitidas:\n" + "\n".join(
+                    f"Línea {error['linea']}: {error['motivo']}"
+                    for error in resultado['detalle'][:10]
+                )
+            messagebox.showinfo("Importación terminada", mensaje)
+        
+        self._iniciar_tarea_archivo(
+            "Importando",
+            lambda progreso, cancelar: self.db_manager.importar_reparaciones_csv(
+                archivo, progreso=progreso, cancelar=cancelar
+            ),
+            al_terminar
+        )
+    
+    def detener_tareas(self, espera: float = 5.0):
+        """
+        Detener las tareas en segundo plano antes de cerrar la base de datos
+        
+        Args:
+            espera (float): Segundos máximos de espera por cada hilo
+        """
+        tarea = self._tarea_archivo
+        if tarea is not None:
+            tarea['cancelar'].set()
+            tarea['hilo'].join(espera)
+            self._tarea_archivo = None
+        
+        # Las consultas encoladas se descartan; se espera a la que está en curso
+        self._bd.detener()
     
     def _test_whatsapp(self):
         """Probar WhatsApp Web"""
@@ -787,24 +1435,120 @@ class MainWindow:
                                "No se pudo abrir WhatsApp Web.\n\n"
                                "Verifica que tengas un navegador instalado.")
     
+    def _reconstruir_indice_busqueda(self):
+        """Regenerar el índice de búsqueda de texto completo"""
+        def terminado(ok: bool):
+            if ok:
+                self.status_text.set("Índice de búsqueda reconstruido")
+                messagebox.showinfo("Búsqueda", "Índice de búsqueda reconstruido correctamente")
+            else:
+                messagebox.showwarning("Búsqueda", 
+                                     "Esta versión de SQLite no incluye FTS5.\n"
+                                     "La búsqueda seguirá funcionando en modo básico.")
+        
+        self.status_text.set("Reconstruyendo índice de búsqueda...")
+        self._bd.enviar(self.db_manager.reconstruir_indice_busqueda, al_terminar=terminado,
+                        al_fallar=self._al_fallar("Error al reconstruir índice de búsqueda"))
+    
     def _mostrar_estadisticas(self):
-        """Mostrar estadísticas básicas"""
+        """Mostrar la ventana de estadísticas"""
         try:
-            stats = self.db_manager.obtener_estadisticas()
-            
-            mensaje = "📊 ESTADÍSTICAS\n\n"
-            mensaje += f"📋 Total de reparaciones: {stats['total']}\n"
-            mensaje += f"⏳ Pendientes: {stats['pendiente']}\n"
-            mensaje += f"🔧 En proceso: {stats['en_proceso']}\n"
-            mensaje += f"✅ Finalizadas: {stats['finalizado']}\n"
-            mensaje += f"📦 Retiradas: {stats['retirado']}\n"
-            
-            messagebox.showinfo("Estadísticas", mensaje)
-            
+            EstadisticasDialog(self.root, self.db_manager, trabajador=self._bd)
         except Exception as e:
             logger.error(f"Error al obtener estadísticas: {e}")
             messagebox.showerror("Error", f"Error al obtener estadísticas:\n{e}")
     
+    def _verificar_contadores(self):
+        """Comparar los contadores por estado con un conteo completo y ofrecer corregirlos"""
+        def corregidos(_resultado):
+            self._load_data()
+            self.status_text.set("Contadores de estadísticas corregidos")
+        
+        def verificados(resultado: Dict):
+            if resultado['consistente']:
+                messagebox.showinfo("Estadísticas", "Los contadores coinciden con los datos")
+                return
+            
+            detalle = "\n".join(
+                f"{estado}: {resultado['contadores'][estado]} (real: {resultado['real'][estado]})"
+                for estado in resultado['diferencias']
+            )
+            if messagebox.askyesno("Estadísticas",
+                                   f"Los contadores no coinciden:\n\n{detalle}\n\n¿Corregirlos?"):
+                self._bd.enviar(self.db_manager.verificar_contadores, corregir=True,
+                                al_terminar=corregidos,
+                                al_fallar=self._al_fallar("Error al verificar contadores"))
+        
+        self._bd.enviar(self.db_manager.verificar_contadores, al_terminar=verificados,
+                        al_fallar=self._al_fallar("Error al verificar contadores"))
+    
+    def _archivar_reparaciones(self):
+        """Mover al archivo las reparaciones retiradas hace tiempo, en segundo plano"""
+        dias = antiguedad_desde_entorno()
+        dias = simpledialog.askinteger(
+            "Archivar reparaciones",
+            "Archivar las reparaciones retiradas hace más de (días):",
+            initialvalue=dias if dias is not None else ANTIGUEDAD_POR_DEFECTO_DIAS,
+            minvalue=0
+        )
+        if dias is None:
+            return
+        
+        def al_terminar(resultado: Dict):
+            self._sincronizar()
+            self.status_text.set(
+                f"Archivadas {resultado['archivadas']} reparaciones en {resultado['duracion']:.1f} s"
+            )
+            messagebox.showinfo("Archivo",
+                                f"Reparaciones archivadas: {resultado['archivadas']}\n"
+                                f"Cambios de estado movidos: {resultado['historial']}\n\n"
+                                f"Se pueden consultar y restaurar desde "
+                                f"Ver > Reparaciones archivadas.")
+        
+        self._iniciar_tarea_archivo(
+            "Archivando",
+            lambda progreso, cancelar: self.db_manager.archivar_reparaciones(
+                dias, progreso=progreso, cancelar=cancelar
+            ),
+            al_terminar
+        )
+    
+    def _crear_respaldo(self):
+        """Respaldar la base en segundo plano sin dejar de usarla"""
+        def al_terminar(resultado: Dict):
+            metricas = self.db_manager.obtener_metricas_respaldos()
+            self.status_text.set(
+                f"Respaldo creado en {resultado['duracion']:.1f} s "
+                f"({resultado['bytes'] / 1024 / 1024:.1f} MB)"
+            )
+            detalle = "\n".join(
+                f"{os.path.basename(respaldo['archivo'])}: "
+                f"{respaldo['bytes_base'] / 1024 / 1024:.1f} MB -> "
+                f"{respaldo['bytes'] / 1024 / 1024:.1f} MB, verificado"
+                for respaldo in resultado['respaldos']
+            )
+            messagebox.showinfo("Respaldo",
+                                f"{detalle}\n\n"
+                                f"Respaldos guardados: {metricas['en_carpeta']} "
+                                f"({metricas['bytes_carpeta'] / 1024 / 1024:.1f} MB)\n"
+                                f"Carpeta: {metricas['carpeta']}")
+        
+        self._iniciar_tarea_archivo(
+            "Respaldando",
+            lambda progreso, cancelar: self.db_manager.crear_respaldo(
+                progreso=progreso, cancelar=cancelar
+            ),
+            al_terminar
+        )
+    
+    def _mostrar_archivo(self):
+        """Buscar reparaciones archivadas y restaurarlas"""
+        def restauradas(cantidad: int):
+            self._sincronizar()
+            self.status_text.set(f"{cantidad} reparaciones restauradas del archivo")
+        
+        ArchivoDialog(self.root, self.db_manager, self._bd, al_restaurar=restauradas)
+    
     def _mostrar_configuracion(self):
         """Mostrar diálogo de configuración"""
         try:
@@ -836,27 +1580,42 @@ class MainWindow:
             messagebox.showerror("Error", f"Error al mostrar configuración:\n{e}")
     
     def _guardar_configuracion(self, config: dict):
-        """Guardar configuración en archivo .env"""
+        """
+        Guardar configuración en archivo .env
+        
+        Sólo se reemplazan las claves BUSINESS_*; el resto del archivo (la
+        configuración de la base, claves desconocidas y comentarios) se conserva.
+        """
         try:
             env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.env')
             
-            lines = []
-            lines.append("# Variables de entorno para InstaFix")
-            lines.append("# Configuración del negocio")
-            lines.append(f"BUSINESS_NAME={config.get('business_name', 'InstaFix')}")
-            lines.append(f"BUSINESS_SLOGAN={config.get('business_slogan', '')}")
-            lines.append(f"BUSINESS_HOURS={config.get('business_hours', 'Lunes a Viernes 9:00-18:00')}")
-            lines.append(f"BUSINESS_ADDRESS={config.get('business_address', '')}")
-            lines.append(f"BUSINESS_PHONE={config.get('business_phone', '')}")
-            lines.append(f"BUSINESS_MOBILE={config.get('business_mobile', '')}")
-            lines.append(f"BUSINESS_EMAIL={config.get('business_email', '')}")
-            lines.append(f"BUSINESS_EXTRA={config.get('business_extra', '')}")
-            lines.append("")
-            lines.append("# WhatsApp Web no requiere tokens o configuración adicional")
-            lines.append("# Solo se necesita tener WhatsApp Web disponible en el navegador")
+            valores = {
+                'BUSINESS_NAME': config.get('business_name', 'InstaFix'),
+                'BUSINESS_SLOGAN': config.get('business_slogan', ''),
+                'BUSINESS_HOURS': config.get('business_hours', 'Lunes a Viernes 9:00-18:00'),
+                'BUSINESS_ADDRESS': config.get('business_address', ''),
+                'BUSINESS_PHONE': config.get('business_phone', ''),
+                'BUSINESS_MOBILE': config.get('business_mobile', ''),
+                'BUSINESS_EMAIL': config.get('business_email', ''),
+                'BUSINESS_EXTRA': config.get('business_extra', ''),
+            }
+            
+            if os.path.exists(env_path):
+                with open(env_path, 'r', encoding='utf-8') as f:
+                    lines = f.read().splitlines()
+            else:
+                lines = ["# Variables de entorno para InstaFix", "# Configuración del negocio"]
+            
+            # Reemplazar cada clave en su lugar; las que faltan se agregan al final
+            pendientes = dict(valores)
+            for i, line in enumerate(lines):
+                clave = line.split('=', 1)[0].strip()
+                if '=' in line and clave in pendientes:
+                    lines[i] = f"{clave}={pendientes.pop(clave)}"
+            lines.extend(f"{clave}={valor}" for clave, valor in pendientes.items())
             
             with open(env_path, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(lines))
+                f.write('\n'.join(lines) + '\n')
                 
             logger.info("Configuración guardada en .env")
             
@@ -866,11 +1625,18 @@ class MainWindow:
     
     def _mostrar_acerca_de(self):
         """Mostrar información sobre la aplicación"""
+        self._bd.enviar(self.db_manager.obtener_perfil_activo,
+                        al_terminar=self._mostrar_ventana_acerca_de,
+                        al_fallar=self._al_fallar("Error al leer el perfil de la base de datos"))
+    
+    def _mostrar_ventana_acerca_de(self, perfil: Dict):
+        """Mostrar el diálogo 'Acerca de' con el perfil activo de la base"""
         business_name = os.getenv('BUSINESS_NAME', 'InstaFix')
         mensaje = f"""🔧 {business_name}
 Sistema de Gestión de Reparaciones
 
 Versión: 1.0.0
+Base de datos: perfil {perfil['nombre']} ({perfil['pragmas']['journal_mode']})
 
 Características:
 • Gestión completa de reparaciones
@@ -919,11 +1685,11 @@ la gestión de tu negocio de reparaciones."""
         numero_presupuesto = valores[0]
         
         # Obtener datos completos de la base de datos
-        reparacion = self.db_manager.obtener_reparacion(numero_presupuesto)
-        if not reparacion:
-            messagebox.showerror("Error", "No se pudieron obtener los datos del presupuesto")
-            return
-        
+        self._pedir_reparacion(numero_presupuesto, self._abrir_pdf_presupuesto,
+                               "No se pudieron obtener los datos del presupuesto")
+    
+    def _abrir_pdf_presupuesto(self, reparacion: Dict):
+        """Generar el PDF de un presupuesto y abrirlo con el visor del sistema"""
         try:
             # Generar PDF
             pdf_path = self._generar_pdf_presupuesto(reparacion)
@@ -0,0 +1,179 @@
+"""
+Reconciliación de la tabla principal
+Aplica al Treeview sólo las diferencias con la lista de filas deseada
+"""
+
+import logging
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Una fila de la tabla: (iid, valores, tags)
+Fila = Tuple[str, tuple, tuple]
+
+
+def _subsecuencia_creciente(posiciones: List[int]) -> set:
+    """
+    Índices de una subsecuencia creciente más larga de posiciones (O(n log n))
+
+    Las filas de esa subsecuencia ya están en orden relativo correcto y no se mueven.
+    """
+    colas: List[int] = []      # posición final de cada largo posible
+    indices_colas: List[int] = []
+    anterior = [-1] * len(posiciones)
+
+    for i, posicion in enumerate(posiciones):
+        j = bisect_left(colas, posicion)
+        if j == len(colas):
+            colas.append(posicion)
+            indices_colas.append(i)
+        else:
+            colas[j] = posicion
+            indices_colas[j] = i
+        anterior[i] = indices_colas[j - 1] if j > 0 else -1
+
+    resultado = set()
+    i = indices_colas[-1] if indices_colas else -1
+    while i != -1:
+        resultado.add(i)
+        i = anterior[i]
+    return resultado
+
+
+class ReconciliadorTabla:
+    """
+    Mantiene un Treeview plano sincronizado con una lista de filas identificadas por iid
+
+    Guarda una copia de los valores y tags de cada fila para decidir sin consultar
+    a Tcl qué filas insertar, mover, actualizar o quitar. Todas las modificaciones
+    de la tabla deben pasar por esta clase para que la copia no se desincronice.
+    """
+
+    def __init__(self, tree):
+        """
+        Args:
+            tree: ttk.Treeview sin jerarquía (todas las filas cuelgan de '')
+        """
+        self.tree = tree
+        self._filas: Dict[str, Tuple[tuple, tuple]] = {}
+        self._orden: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._orden)
+
+    def __contains__(self, iid: str) -> bool:
+        return iid in self._filas
+
+    def primera(self) -> Optional[str]:
+        """iid de la primera fila, o None si la tabla está vacía"""
+        return self._orden[0] if self._orden else None
+
+    def poner(self, iid: str, valores: tuple, tags: tuple = (), indice: Optional[int] = None):
+        """
+        Insertar una fila en la posición indicada, o actualizarla si ya está
+
+        Una fila existente conserva su posición; sólo se reescribe si cambió.
+
+        Args:
+            iid (str): Identificador de la fila
+            valores (tuple): Valores de las columnas
+            tags (tuple): Tags de la fila
+            indice (Optional[int]): Posición para una fila nueva; None para el final
+        """
+        valores, tags = tuple(valores), tuple(tags)
+
+        if iid in self._filas:
+            if self._filas[iid] != (valores, tags):
+                self.tree.item(iid, values=valores, tags=tags)
+                self._filas[iid] = (valores, tags)
+            return
+
+        if indice is None or indice >= len(self._orden):
+            self.tree.insert('', 'end', iid=iid, values=valores, tags=tags)
+            self._orden.append(iid)
+        else:
+            self.tree.insert('', indice, iid=iid, values=valores, tags=tags)
+            self._orden.insert(indice, iid)
+        self._filas[iid] = (valores, tags)
+
+    def quitar(self, iid: str):
+        """Quitar una fila si está en la tabla"""
+        if iid in self._filas:
+            self.tree.delete(iid)
+            del self._filas[iid]
+            self._orden.remove(iid)
+
+    def reconciliar(self, filas: Iterable[Fila]) -> Dict[str, int]:
+        """
+        Dejar la tabla exactamente con las filas dadas, en ese orden
+
+        Quita en una sola llamada las filas que sobran, deja quietas las que forman
+        la subsecuencia más larga ya ordenada, reubica el resto y reescribe sólo
+        los valores que cambiaron. La selección se conserva para las filas que
+        siguen presentes; el desplazamiento lo conserva el propio Treeview porque
+        nunca se vacía la tabla.
+
+        Args:
+            filas (Iterable[Fila]): Filas deseadas (iid, valores, tags), sin iid repetidos
+
+        Returns:
+            Dict[str, int]: Cantidad de filas insertadas, movidas, actualizadas y quitadas
+        """
+        deseadas: List[Fila] = [(iid, tuple(valores), tuple(tags)) for iid, valores, tags in filas]
+        posicion_deseada = {iid: i for i, (iid, _, _) in enumerate(deseadas)}
+
+        if len(posicion_deseada) != len(deseadas):
+            raise ValueError("Las filas a reconciliar tienen identificadores repetidos")
+
+        seleccion = self.tree.selection() if self._orden else ()
+
+        # Quitar lo que ya no corresponde
+        sobrantes = [iid for iid in self._orden if iid not in posicion_deseada]
+        if sobrantes:
+            self.tree.delete(*sobrantes)
+            for iid in sobrantes:
+                del self._filas[iid]
+
+        # Filas que quedan, en su orden actual, y cuáles no hace falta mover
+        actuales = [iid for iid in self._orden if iid in posicion_deseada]
+        fijas_idx = _subsecuencia_creciente([posicion_deseada[iid] for iid in actuales])
+        moviles = [iid for i, iid in enumerate(actuales) if i not in fijas_idx]
+
+        # Las móviles se desenganchan para que los índices de move() e insert()
+        # coincidan con la lista deseada a medida que se recorre
+        if moviles:
+            self.tree.detach(*moviles)
+        moviles = set(moviles)
+
+        insertadas = actualizadas = 0
+        for indice, (iid, valores, tags) in enumerate(deseadas):
+            anterior = self._filas.get(iid)
+
+            if anterior is None:
+                self.tree.insert('', indice, iid=iid, values=valores, tags=tags)
+                insertadas += 1
+            else:
+                if iid in moviles:
+                    self.tree.move(iid, '', indice)
+                if anterior != (valores, tags):
+                    self.tree.item(iid, values=valores, tags=tags)
+                    actualizadas += 1
+
+            self._filas[iid] = (valores, tags)
+
+        self._orden = [iid for iid, _, _ in deseadas]
+
+        # Restaurar la selección (las filas desenganchadas pueden haberla perdido)
+        seleccion = [iid for iid in seleccion if iid in self._filas]
+        if seleccion and tuple(self.tree.selection()) != tuple(seleccion):
+            self.tree.selection_set(seleccion)
+
+        resumen = {
+            'insertadas': insertadas,
+            'movidas': len(moviles),
+            'actualizadas': actualizadas,
+            'quitadas': len(sobrantes),
+        }
+        logger.debug(f"Tabla reconciliada: {resumen}")
+        return resumen
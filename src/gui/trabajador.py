@@ -0,0 +1,180 @@
+"""
+Hilo de trabajo para la base de datos
+Ejecuta las llamadas al DatabaseManager fuera del hilo de Tk y entrega los resultados con after()
+"""
+
+import queue
+import logging
+import itertools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Cada cuánto revisa la interfaz si hay resultados listos mientras hay pedidos pendientes
+INTERVALO_ENTREGA_MS = 20
+
+
+class TrabajadorBD:
+    """
+    Ejecutor de un solo hilo dueño del acceso a la base desde la interfaz
+
+    Los pedidos se ejecutan en orden de llegada y devuelven un Future. Las
+    funciones al_terminar/al_fallar se llaman siempre en el hilo de Tk: el hilo
+    de trabajo deja el Future terminado en una cola y la interfaz la vacía con
+    after() sólo mientras haya pedidos pendientes.
+    """
+
+    def __init__(self, root, al_cambiar_ocupado: Optional[Callable[[bool], None]] = None,
+                 intervalo_ms: int = INTERVALO_ENTREGA_MS):
+        """
+        Args:
+            root: Ventana raíz de Tkinter (para programar las entregas)
+            al_cambiar_ocupado (Optional[Callable]): Recibe True al empezar a haber
+                pedidos pendientes y False cuando se entregaron todos
+            intervalo_ms (int): Intervalo de revisión de resultados
+        """
+        self.root = root
+        self.al_cambiar_ocupado = al_cambiar_ocupado
+        self.intervalo_ms = intervalo_ms
+
+        self.hilo: Optional[int] = None
+        self._ejecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='trabajador-bd',
+                                            initializer=self._registrar_hilo)
+        self._listos = queue.SimpleQueue()
+        # Pedidos sin terminar y su número; el del que se está ejecutando se
+        # guarda aparte (con su lock) para interrumpir sólo a ese
+        self._en_cola: Dict[Future, int] = {}
+        self._numeros = itertools.count(1)
+        self._en_curso: Optional[int] = None
+        self._lock_en_curso = threading.Lock()
+        self._pendientes = 0
+        self._entrega_programada = False
+        self._detenido = False
+
+    def _registrar_hilo(self):
+        """Guardar el identificador del hilo de trabajo (para interrumpir sus consultas)"""
+        self.hilo = threading.get_ident()
+
+    @property
+    def ocupado(self) -> bool:
+        """True si hay pedidos sin entregar"""
+        return self._pendientes > 0
+
+    def _ejecutar(self, numero: int, funcion: Callable, args, kwargs):
+        """Ejecutar un pedido en el hilo de trabajo anotando cuál está en curso"""
+        with self._lock_en_curso:
+            self._en_curso = numero
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            with self._lock_en_curso:
+                self._en_curso = None
+
+    def interrumpir(self, future: Future, interrumpir_hilo: Callable[[int], object]) -> bool:
+        """
+        Interrumpir la consulta de un pedido, sólo si es el que se está ejecutando
+
+        El lock impide que el pedido termine y empiece el siguiente mientras se
+        interrumpe, así la interrupción nunca alcanza a otro pedido.
+
+        Args:
+            future (Future): Pedido devuelto por enviar()
+            interrumpir_hilo (Callable): Recibe el identificador del hilo de trabajo
+                e interrumpe su consulta (p. ej. DatabaseManager.interrumpir_consulta)
+
+        Returns:
+            bool: True si el pedido estaba en curso y se interrumpió
+        """
+        numero = self._en_cola.get(future)
+        with self._lock_en_curso:
+            if numero is None or self._en_curso != numero or self.hilo is None:
+                return False
+            interrumpir_hilo(self.hilo)
+            return True
+
+    def enviar(self, funcion: Callable, *args,
+               al_terminar: Optional[Callable] = None,
+               al_fallar: Optional[Callable[[Exception], None]] = None, **kwargs) -> Future:
+        """
+        Encolar una llamada para el hilo de trabajo (llamar desde el hilo de Tk)
+
+        Args:
+            funcion (Callable): Función a ejecutar con *args y **kwargs
+            al_terminar (Optional[Callable]): Recibe el resultado en el hilo de Tk
+            al_fallar (Optional[Callable]): Recibe la excepción en el hilo de Tk;
+                si no se indica, el error sólo se registra en el log
+
+        Returns:
+            Future: Resultado de la llamada
+        """
+        if self._detenido:
+            raise RuntimeError("El trabajador de base de datos está detenido")
+
+        numero = next(self._numeros)
+        future = self._ejecutor.submit(self._ejecutar, numero, funcion, args, kwargs)
+        self._en_cola[future] = numero
+        self._pendientes += 1
+        if self._pendientes == 1 and self.al_cambiar_ocupado:
+            self.al_cambiar_ocupado(True)
+
+        # Se ejecuta en el hilo de trabajo (o acá mismo si ya terminó)
+        def terminado(f: Future):
+            self._en_cola.pop(f, None)
+            self._listos.put((f, al_terminar, al_fallar))
+
+        future.add_done_callback(terminado)
+
+        if not self._entrega_programada:
+            self._entrega_programada = True
+            self.root.after(self.intervalo_ms, self._entregar)
+        return future
+
+    def _entregar(self):
+        """Llamar a los callbacks de los pedidos terminados"""
+        self._entrega_programada = False
+        if self._detenido:
+            return
+
+        while True:
+            try:
+                future, al_terminar, al_fallar = self._listos.get_nowait()
+            except queue.Empty:
+                break
+
+            self._pendientes -= 1
+            if future.cancelled():
+                continue
+
+            try:
+                error = future.exception()
+                if error is not None:
+                    if al_fallar:
+                        al_fallar(error)
+                    else:
+                        logger.error(f"Error en una consulta en segundo plano: {error}")
+                elif al_terminar:
+                    al_terminar(future.result())
+            except Exception as e:
+                logger.error(f"Error al entregar un resultado de la base de datos: {e}")
+
+        # Un callback pudo haber encolado otro pedido (y programado su entrega)
+        if self._pendientes > 0:
+            if not self._entrega_programada:
+                self._entrega_programada = True
+                self.root.after(self.intervalo_ms, self._entregar)
+        elif self.al_cambiar_ocupado:
+            self.al_cambiar_ocupado(False)
+
+    def detener(self, espera: bool = True):
+        """
+        Descartar los pedidos que no empezaron y esperar al que está en curso
+
+        Args:
+            espera (bool): True para esperar a que termine el pedido en curso
+        """
+        self._detenido = True
+        for future in list(self._en_cola):
+            future.cancel()
+        self._ejecutor.shutdown(wait=espera)
@@ -9,6 +9,8 @@ import logging
 import os
 from typing import Optional, Dict
 
+from database.validacion import formatear_celular_whatsapp
+
 logger = logging.getLogger(__name__)
 
 class WhatsAppClient:
@@ -70,25 +72,7 @@ class WhatsAppClient:
         Returns:
             Optional[str]: Número limpio o None si es inválido
         """
-        if not phone:
-            return None
-        
-        # Remover espacios, guiones y paréntesis
-        phone = ''.join(filter(str.isdigit, phone))
-        
-        # Si no tiene código de país, agregar 54 (Argentina)
-        if len(phone) == 10 and phone.startswith('11'):
-            phone = '54' + phone
-        elif len(phone) == 10:
-            phone = '549' + phone
-        elif len(phone) == 11 and not phone.startswith('54'):
-            phone = '54' + phone[1:]  # Remover el 0 inicial
-        
-        # Validar longitud
-        if len(phone) < 10 or len(phone) > 15:
-            return None
-        
-        return phone
+        return formatear_celular_whatsapp(phone)
     
     def enviar_notificacion_costo(self, cliente_nombre: str, cliente_apellido: str, 
                                  celular: str, producto: str, costo: float, 